@@ -1,35 +1,75 @@
-import numpy as np
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, File, UploadFile
-from fastapi.responses import JSONResponse
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Depends, File, Header, UploadFile, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-import psutil
-import shutil
 import os
-import pandas as pd
-import io
-from sklearn.metrics import mean_absolute_error, mean_squared_error
+import time
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from utils.data_preprocessing import (
-    get_stock_data,
-    preprocess_data,
-    prepare_prediction_input,
-    prepare_test_data,
-    preprocess_user_data,
+    START_DATE,
+    data_end_date,
+    settled_end_date,
+    refresh_stock_data,
+    refresh_stock_data_async,
+    refresh_many_stock_data_async,
+    iter_user_window_batches,
+    FEATURE_COLUMNS,
 )
-from utils.model_utils import build_model, train_model, save_model, predict_price, load_trained_model
+from utils.model_utils import (
+    inverse_transform_close,
+    load_metadata,
+    save_metadata,
+)
+from utils.evaluation import evaluate_series
+from utils.feature_store import get_feature_series
+from utils.system_monitor import SystemMonitor
+from utils.model_registry import ModelRegistry, ENGINES
+from utils.prediction_cache import PredictionCache
+from utils.prediction_table import PredictionTable, PREDICTION_TABLE_PATH, PREDICTION_TABLE_MAX_AGE
+from utils.batch_scoring import PredictionScoringScheduler
+from utils.forecasting import forecast_prices
+from utils.backtesting import backtest_ticker, get_backtest_pool, shutdown_backtest_pool, BACKTEST_ENGINE
+from utils.singleflight import SingleFlight
+from utils.batching import BatcherPool
+from utils.jobs import JobStore, TrainingWorkerPool, StaleModelScheduler, TRAIN, RETRAIN
+from utils.training import DEFAULT_EPOCHS, INCREMENTAL_EPOCHS
+from utils.market_data import get_market_data_store
+from utils import executor
+from utils.executor import run_blocking
 from utils.security import get_api_key
-import joblib
+from utils.windowing import SEQUENCE_LENGTH
+from utils.metrics import track_stage, PREDICTION_CACHE_REQUESTS
 
 # Verifica se o modo de depuração está habilitado
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 
+# Tickers cujos modelos são carregados (e aquecidos) antes de a API atender requisições
+# WARMUP_TICKERS: lista separada por vírgulas (ex.: "AAPL,MSFT")
+WARMUP_TICKERS = [ticker.strip().upper() for ticker in os.getenv("WARMUP_TICKERS", "").split(",") if ticker.strip()]
+
+
+# Ciclo de vida da aplicação: serviços em segundo plano, aquecimento e encerramento
+@asynccontextmanager
+async def lifespan(app):
+    start_background_workers()
+    await warm_up(WARMUP_TICKERS)
+    yield
+    shutdown_workers()
+
+
 # Inicializa a aplicação FastAPI com detalhes para a documentação
 app = FastAPI(
     title="API de Previsão de Ações",
     description="API para treinar modelos e prever preços de ações usando modelos LSTM.",
     version="1.0.0",
-    debug=DEBUG
+    debug=DEBUG,
+    lifespan=lifespan,
 )
 
 # Configura o Prometheus para monitoramento
@@ -40,33 +80,196 @@ MODEL_DIR = "models"
 if not os.path.exists(MODEL_DIR):
     os.makedirs(MODEL_DIR)  # Cria o diretório se ele não existir
 
+# Registro em memória dos modelos carregados, com remoção LRU
+# MODEL_CACHE_MAX_MODELS: quantidade máxima de modelos em memória (0 = sem limite)
+# MODEL_CACHE_MAX_MB: memória máxima estimada em MB (0 = sem limite)
+# MODEL_LOAD_TIMEOUT: tempo máximo (s) de espera pelo carregamento de um modelo (0 = sem limite)
+MODEL_LOAD_TIMEOUT = float(os.getenv("MODEL_LOAD_TIMEOUT", "60")) or None
+model_registry = ModelRegistry(
+    MODEL_DIR,
+    max_models=int(os.getenv("MODEL_CACHE_MAX_MODELS", "8")),
+    max_memory_mb=float(os.getenv("MODEL_CACHE_MAX_MB", "0")),
+    load_timeout=MODEL_LOAD_TIMEOUT,
+)
+
+# Registro dos modelos carregados no motor de inferência NumPy (sem TensorFlow)
+# INFERENCE_ENGINE: motor padrão de inferência ("keras" ou "numpy")
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "keras")
+numpy_registry = ModelRegistry(
+    MODEL_DIR,
+    max_models=int(os.getenv("MODEL_CACHE_MAX_MODELS", "8")),
+    max_memory_mb=float(os.getenv("MODEL_CACHE_MAX_MB", "0")),
+    engine="numpy",
+    load_timeout=MODEL_LOAD_TIMEOUT,
+)
+
+# Cache das previsões de /predict, por versão do modelo e data do último pregão
+# PREDICTION_CACHE_MAX_ENTRIES: quantidade máxima de previsões em memória (0 = desativado)
+# PREDICTION_CACHE_TTL: validade (s) de cada previsão (0 = sem expiração)
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL", "3600")),
+)
+
+# Previsões do próximo fechamento calculadas em lote (utils.batch_scoring), servidas por /predict enquanto frescas
+# PREDICTION_TABLE_PATH: caminho da tabela de previsões
+# PREDICTION_TABLE_MAX_AGE: idade máxima (s) de uma previsão servida pela tabela (0 = sem limite)
+prediction_table = PredictionTable(PREDICTION_TABLE_PATH, max_age=PREDICTION_TABLE_MAX_AGE)
+
+# Agrupamento de requisições concorrentes de /predict em lotes de inferência
+# BATCH_WINDOW_MS: tempo máximo de espera para completar um lote
+# BATCH_MAX_SIZE: quantidade máxima de amostras por lote (1 = sem agrupamento)
+batchers = BatcherPool(
+    max_batch_size=int(os.getenv("BATCH_MAX_SIZE", "32")),
+    window_ms=float(os.getenv("BATCH_WINDOW_MS", "5")),
+)
+
+# Fila persistente de jobs de treinamento, consumida por processos separados
+# JOBS_DB_PATH: caminho do banco SQLite da fila
+# TRAINING_WORKERS: quantidade de processos de treinamento (0 = não iniciar)
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join("data", "jobs.db"))
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", "1"))
+job_store = JobStore(JOBS_DB_PATH)
+# Pedidos de treinamento simultâneos do mesmo ticker compartilham uma única inclusão na fila
+training_kickoffs = SingleFlight()
+training_pool = TrainingWorkerPool(JOBS_DB_PATH, MODEL_DIR, workers=TRAINING_WORKERS)
+
+# Atualização incremental periódica dos modelos treinados antes do último pregão
+# RETRAIN_INTERVAL: intervalo (s) entre as verificações (0 = desativada)
+RETRAIN_INTERVAL = float(os.getenv("RETRAIN_INTERVAL", "0"))
+stale_model_scheduler = StaleModelScheduler(JOBS_DB_PATH, MODEL_DIR, interval=RETRAIN_INTERVAL)
+
+# Previsão em lote periódica de todos os modelos, gravada na tabela de previsões
+# PREDICTION_SCORING_INTERVAL: intervalo (s) entre as execuções (0 = desativada)
+# PREDICTION_SCORING_WORKERS: processos da previsão em lote
+PREDICTION_SCORING_INTERVAL = float(os.getenv("PREDICTION_SCORING_INTERVAL", "0"))
+prediction_scoring_scheduler = PredictionScoringScheduler(
+    MODEL_DIR,
+    PREDICTION_TABLE_PATH,
+    interval=PREDICTION_SCORING_INTERVAL,
+    workers=int(os.getenv("PREDICTION_SCORING_WORKERS", "1")),
+)
+
+# Amostragem do uso de recursos do sistema em segundo plano
+# SYSTEM_MONITOR_INTERVAL: intervalo (s) entre as amostras
+system_monitor = SystemMonitor(interval=float(os.getenv("SYSTEM_MONITOR_INTERVAL", "5")))
+
+# Leitura em partes dos arquivos enviados para /predict_from_file
+# PREDICT_FILE_BATCH_SIZE: quantidade de janelas por lote de inferência
+# PREDICT_FILE_CHUNK_ROWS: quantidade de linhas do CSV lidas por vez
+PREDICT_FILE_BATCH_SIZE = int(os.getenv("PREDICT_FILE_BATCH_SIZE", "256"))
+PREDICT_FILE_CHUNK_ROWS = int(os.getenv("PREDICT_FILE_CHUNK_ROWS", "10000"))
+
+# Previsões de vários tickers em /predict/batch
+# PREDICT_BATCH_CONCURRENCY: tickers carregados e previstos ao mesmo tempo em cada requisição
+# PREDICT_BATCH_MAX_TICKERS: quantidade máxima de tickers por requisição
+PREDICT_BATCH_CONCURRENCY = int(os.getenv("PREDICT_BATCH_CONCURRENCY", "8"))
+PREDICT_BATCH_MAX_TICKERS = int(os.getenv("PREDICT_BATCH_MAX_TICKERS", "500"))
+
+# Previsões de vários dias em /forecast
+# FORECAST_MAX_DAYS: quantidade máxima de dias à frente
+# FORECAST_ENGINE: motor de inferência padrão (uma chamada ao modelo por dia; no "numpy" não há o custo fixo do Keras)
+FORECAST_MAX_DAYS = int(os.getenv("FORECAST_MAX_DAYS", "30"))
+FORECAST_ENGINE = os.getenv("FORECAST_ENGINE", "numpy")
+
+# Backtests walk-forward em /backtest
+# BACKTEST_WORKERS: processos que executam os backtests (0 = pool de threads da própria API)
+# BACKTEST_MAX_TICKERS: quantidade máxima de tickers por requisição
+# BACKTEST_MAX_HORIZON: quantidade máxima de dias à frente
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", "1"))
+BACKTEST_MAX_TICKERS = int(os.getenv("BACKTEST_MAX_TICKERS", "100"))
+BACKTEST_MAX_HORIZON = int(os.getenv("BACKTEST_MAX_HORIZON", "30"))
+
+# Recálculos de métricas em andamento, por ticker
+recompute_tasks = {}
+
 
 # Definição dos modelos de entrada e saída para os endpoints
 class TrainRequest(BaseModel):
     ticker: str = Field(..., description="Código da ação a ser treinada",
                         example="AAPL")  # Código da ação a ser treinada
+    mode: Optional[str] = Field(None, description="Modo de treinamento: full ou incremental",
+                                example="full")  # Modo de treinamento
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "ticker": "AAPL",
+                "mode": "full"
+            }
+        }
+
+
+class BatchTrainRequest(BaseModel):
+    tickers: list = Field(..., description="Códigos das ações a serem treinadas",
+                          example=["AAPL", "MSFT", "GOOG"])  # Lista de tickers
 
     class Config:
         schema_extra = {
             "example": {
-                "ticker": "AAPL"
+                "tickers": ["AAPL", "MSFT", "GOOG"]
             }
         }
 
 
+class BatchTrainResponse(BaseModel):
+    batch_id: str = Field(..., description="Identificador do lote de treinamento")
+    items: list = Field(
+        ...,
+        description="Resultado por ticker: exists, queued, duplicate, no_data ou o estado atual do job",
+        example=[
+            {"ticker": "AAPL", "status": "queued", "job_id": "3f2a9c0e4b1d4e7f9a8b6c5d4e3f2a1b"},
+            {"ticker": "MSFT", "status": "exists", "job_id": None},
+        ]
+    )  # Resultado por ticker
+
+
 class PredictResponse(BaseModel):
     ticker: str = Field(..., description="Código da ação prevista", example="AAPL")  # Código da ação
     predicted_price: float = Field(..., description="Preço previsto da ação", example=150.25)  # Preço previsto
+    source: str = Field("live", description="Origem da previsão: table (calculada em lote) ou live",
+                        example="table")  # Origem da previsão
+    data_date: Optional[str] = Field(None, description="Data do último pregão usado na previsão",
+                                     example="2023-12-29")  # Último pregão
+    scored_at: Optional[str] = Field(None, description="Quando a previsão da tabela foi calculada (ISO 8601)",
+                                     example="2023-12-29T22:00:00+00:00")  # Momento do cálculo em lote
 
     class Config:
         schema_extra = {
             "example": {
                 "ticker": "AAPL",
-                "predicted_price": 150.25
+                "predicted_price": 150.25,
+                "source": "table",
+                "data_date": "2023-12-29",
+                "scored_at": "2023-12-29T22:00:00+00:00"
+            }
+        }
+
+
+class BatchPredictRequest(BaseModel):
+    tickers: list = Field(..., description="Códigos das ações a serem previstas",
+                          example=["AAPL", "MSFT", "GOOG"])  # Lista de tickers
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "tickers": ["AAPL", "MSFT", "GOOG"]
             }
         }
 
 
+class BatchPredictResponse(BaseModel):
+    predictions: list = Field(
+        ...,
+        description="Resultado por ticker, na ordem do pedido: o preço previsto (status_code 200) ou o erro",
+        example=[
+            {"ticker": "AAPL", "status_code": 200, "predicted_price": 150.25, "error": None},
+            {"ticker": "XYZ", "status_code": 404, "predicted_price": None,
+             "error": "Modelo para XYZ não encontrado. Treine o modelo primeiro."},
+        ]
+    )  # Resultado por ticker
+
+
 class StatusResponse(BaseModel):
     model_exists: bool = Field(..., description="Indica se o modelo existe")  # Indica se o modelo existe
     performance_metrics: dict = Field(
@@ -86,6 +289,25 @@ class StatusResponse(BaseModel):
             "disk_free_gb": 128.0,
         }
     )  # Uso de recursos do sistema
+    model_cache: dict = Field(
+        default={},
+        description="Contadores do registro de modelos em memória",
+        example={"hits": 10, "misses": 2, "evictions": 0, "reloads": 1, "loaded_models": 2}
+    )  # Estatísticas do registro de modelos
+    prediction_cache: dict = Field(
+        default={},
+        description="Contadores do cache de previsões de /predict",
+        example={"hits": 40, "misses": 3, "evictions": 0, "entries": 3}
+    )  # Estatísticas do cache de previsões
+    model_metadata: dict = Field(
+        default={},
+        description="Metadados do treinamento (data, período dos dados, épocas etc.)",
+        example={"trained_at": "2024-01-02T10:00:00+00:00", "data_end": "2023-12-29", "epochs": 10}
+    )  # Metadados do treinamento
+    recompute_scheduled: bool = Field(
+        default=False,
+        description="Indica se o recálculo das métricas foi agendado nesta requisição"
+    )  # Recálculo das métricas agendado
 
 
 class PredictionsResponse(BaseModel):
@@ -93,11 +315,87 @@ class PredictionsResponse(BaseModel):
                               example=[150.25, 151.30, 152.10])  # Lista de preços previstos
 
 
+class ForecastResponse(BaseModel):
+    ticker: str = Field(..., description="Código da ação prevista", example="AAPL")  # Código da ação
+    last_date: str = Field(..., description="Data do último pregão usado na previsão",
+                           example="2023-12-29")  # Último pregão
+    forecast: list = Field(
+        ...,
+        description="Fechamento previsto para cada um dos próximos dias úteis",
+        example=[{"date": "2024-01-02", "predicted_price": 150.25}, {"date": "2024-01-03", "predicted_price": 150.61}]
+    )  # Previsões por dia
+
+
+class BacktestRequest(BaseModel):
+    tickers: list = Field(..., description="Códigos das ações", example=["AAPL", "MSFT"])  # Lista de tickers
+    start: Optional[str] = Field(None, description="Primeira data em que uma previsão é feita (AAAA-MM-DD)",
+                                 example="2023-01-02")  # Início do período
+    end: Optional[str] = Field(None, description="Última data em que uma previsão é feita (AAAA-MM-DD)",
+                               example="2023-12-29")  # Fim do período
+    horizon: int = Field(1, description="Quantidade de dias à frente avaliados", example=5)  # Horizonte
+    engine: Optional[str] = Field(None, description="Motor de inferência: keras ou numpy")  # Motor de inferência
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "tickers": ["AAPL", "MSFT"],
+                "start": "2023-01-02",
+                "end": "2023-12-29",
+                "horizon": 5
+            }
+        }
+
+
+class BacktestResponse(BaseModel):
+    results: list = Field(
+        ...,
+        description="Resultado por ticker, na ordem do pedido: as métricas de cada dia à frente ou o erro",
+        example=[
+            {"ticker": "AAPL", "status_code": 200, "error": None, "model_version": [3],
+             "start": "2023-01-03", "end": "2023-12-28", "seconds": 0.41,
+             "horizons": [{"horizon": 1, "MAE": 2.1, "RMSE": 2.8, "MAPE": 1.3,
+                           "directional_accuracy": 0.52, "samples": 249}]},
+        ]
+    )  # Resultado por ticker
+
+
+class JobResponse(BaseModel):
+    job_id: str = Field(..., description="Identificador do job", example="3f2a9c0e4b1d4e7f9a8b6c5d4e3f2a1b")
+    ticker: str = Field(..., description="Código da ação treinada", example="AAPL")
+    status: str = Field(..., description="Estado do job: queued, running, done ou failed", example="running")
+    created_at: float = Field(..., description="Momento em que o job entrou na fila (epoch, em segundos)")
+    started_at: Optional[float] = Field(None, description="Momento em que o treinamento começou (epoch, em segundos)")
+    finished_at: Optional[float] = Field(None, description="Momento em que o treinamento terminou (epoch, em segundos)")
+    queue_seconds: Optional[float] = Field(None, description="Tempo de espera na fila, em segundos")
+    run_seconds: Optional[float] = Field(None, description="Duração do treinamento, em segundos")
+    epochs_completed: int = Field(..., description="Épocas concluídas", example=4)
+    epochs_total: Optional[int] = Field(None, description="Épocas previstas", example=10)
+    error: Optional[str] = Field(None, description="Mensagem de erro, se o job falhou")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "job_id": "3f2a9c0e4b1d4e7f9a8b6c5d4e3f2a1b",
+                "ticker": "AAPL",
+                "status": "running",
+                "created_at": 1700000000.0,
+                "started_at": 1700000002.5,
+                "finished_at": None,
+                "queue_seconds": 2.5,
+                "run_seconds": 30.1,
+                "epochs_completed": 4,
+                "epochs_total": 10,
+                "error": None,
+            }
+        }
+
+
 # Endpoint para treinar um modelo com base em um ticker
 @app.post(
     "/train",
     summary="Treinar modelo para um ticker",
-    description="Inicia o treinamento de um modelo LSTM para o ticker fornecido. O treinamento ocorre em segundo plano e o modelo será salvo para uso futuro.",
+    description="Inicia o treinamento de um modelo LSTM para o ticker fornecido. O treinamento ocorre em segundo plano e o modelo será salvo para uso futuro. "
+                "Com `mode=incremental`, o modelo existente é ajustado apenas com os pregões posteriores ao último treinamento.",
     responses={
         202: {
             "description": "Treinamento iniciado. O modelo estará disponível após o término do treinamento.",
@@ -117,25 +415,41 @@ class PredictionsResponse(BaseModel):
                 }
             },
         },
+        404: {
+            "description": "Modelo não encontrado para a atualização incremental.",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Modelo para AAPL não encontrado. Treine o modelo primeiro."}
+                }
+            },
+        },
     },
 )
 async def train_endpoint(
     ticker: str = None,  # Parâmetro opcional como query string
+    mode: str = None,  # Modo de treinamento: full (padrão) ou incremental
     request: TrainRequest = None,  # Modelo opcional como corpo da requisição
-    background_tasks: BackgroundTasks = None,
     api_key: str = Depends(get_api_key)
 ):
     """
     Endpoint para iniciar o treinamento de um modelo LSTM com base em um ticker.
 
+    O treinamento é colocado na fila persistente de jobs e executado pelos
+    processos de treinamento, fora do processo da API. Requisições repetidas
+    para um ticker com job ativo retornam o job já existente.
+
+    No modo incremental, o modelo existente é carregado e ajustado apenas com
+    os pregões posteriores à data final do último treinamento, mantendo o
+    scaler (ou treinado do zero, se os novos dados saírem da faixa do scaler).
+
     Parâmetros:
         ticker (str): Código do ticker da ação (query string ou corpo).
+        mode (str): 'full' (padrão) ou 'incremental' (query string ou corpo).
         request (TrainRequest): Modelo contendo o ticker (corpo da requisição).
-        background_tasks (BackgroundTasks): Gerenciamento de tarefas em segundo plano.
         api_key (str): Chave de API para autenticação.
 
     Retorna:
-        JSONResponse: Mensagem indicando o status do treinamento.
+        JSONResponse: Mensagem indicando o status do treinamento e o ID do job.
     """
     # Prioriza o ticker vindo da query string
     if ticker is None and request:
@@ -145,51 +459,167 @@ async def train_endpoint(
         raise HTTPException(status_code=400, detail="Ticker não fornecido. Informe o ticker como query string ou JSON.")
 
     ticker = ticker.upper()  # Converte o ticker para letras maiúsculas
-    model_path = os.path.join(MODEL_DIR, f"{ticker}_model.h5")
+    mode = (mode or (request.mode if request else None) or "full").lower()
+    if mode not in ("full", "incremental"):
+        raise HTTPException(status_code=400, detail="Modo inválido. Use 'full' ou 'incremental'.")
+
+    if mode == "incremental":
+        # A atualização incremental parte do modelo existente
+        if not model_registry.exists(ticker):
+            raise HTTPException(status_code=404, detail=f"Modelo para {ticker} não encontrado. Treine o modelo primeiro.")
+        job, created = await enqueue_training(ticker, kind=RETRAIN)
+        if created:
+            message = f"Atualização incremental iniciada para {ticker}."
+        else:
+            message = f"Treinamento para {ticker} já está em andamento."
+        return JSONResponse(
+            status_code=202,
+            content={"message": message, "job_id": job["id"], "status": job["status"]}
+        )
 
     # Verifica se o modelo já existe
-    if os.path.exists(model_path):
+    if model_registry.exists(ticker):
         return {"message": f"Modelo para {ticker} já existe."}
 
-    # Adiciona a tarefa de treinamento em segundo plano
-    background_tasks.add_task(train_and_save_model, ticker)
+    # Adiciona o job à fila (ou reaproveita o job ativo do mesmo ticker)
+    job, created = await enqueue_training(ticker)
+    if created:
+        message = f"Treinamento iniciado para {ticker}. O modelo estará disponível após o término do treinamento."
+    else:
+        message = f"Treinamento para {ticker} já está em andamento."
 
     # Retorna o status 202 Accepted
     return JSONResponse(
         status_code=202,
-        content={"message": f"Treinamento iniciado para {ticker}. O modelo estará disponível após o término do treinamento."}
+        content={"message": message, "job_id": job["id"], "status": job["status"]}
+    )
+
+
+# Coloca o treinamento de um ticker na fila, uma única vez para pedidos simultâneos
+async def enqueue_training(ticker, kind=TRAIN):
+    epochs = INCREMENTAL_EPOCHS if kind == RETRAIN else DEFAULT_EPOCHS
+    (job, created), shared = await training_kickoffs.do(
+        ticker, run_blocking, job_store.enqueue, ticker, kind=kind, epochs_total=epochs
     )
+    # Apenas o pedido que incluiu o job na fila o informa como criado
+    return job, created and not shared
 
 
-def train_and_save_model(ticker):
+# Endpoint para treinar vários tickers de uma vez
+@app.post(
+    "/train/batch",
+    response_model=BatchTrainResponse,
+    status_code=202,
+    summary="Treinar modelos para vários tickers",
+    description="Busca os dados de todos os tickers em uma consulta agrupada e coloca um job de treinamento por ticker na fila. Os jobs são executados em paralelo pelos processos de treinamento (TRAINING_WORKERS)."
+)
+async def train_batch_endpoint(request: BatchTrainRequest, api_key: str = Depends(get_api_key)):
     """
-    Realiza o treinamento do modelo e o salva no diretório especificado.
+    Endpoint para iniciar o treinamento de vários tickers.
 
     Parâmetros:
-        ticker (str): Código da ação para treinamento.
+        request (BatchTrainRequest): Lista de tickers.
+        api_key (str): Chave de API para autenticação.
+
+    Retorna:
+        BatchTrainResponse: ID do lote e o resultado da submissão de cada ticker.
+    """
+    tickers = list(dict.fromkeys(str(ticker).upper() for ticker in request.tickers if ticker))
+    if not tickers:
+        raise HTTPException(status_code=400, detail="Nenhum ticker fornecido.")
+
+    pending = [ticker for ticker in tickers if not model_registry.exists(ticker)]
+
+    # Busca agrupada dos dados dos tickers que serão treinados
+    store = get_market_data_store()
+    if pending:
+        await run_blocking(store.refresh_many, pending, START_DATE, data_end_date(),
+                           settled_end=settled_end_date())
+
+    items = []
+    for ticker in tickers:
+        if ticker not in pending:
+            items.append({"ticker": ticker, "status": "exists", "job_id": None})
+        elif store.read_array(ticker) is None:
+            items.append({"ticker": ticker, "status": "no_data", "job_id": None})
+        else:
+            job, created = await enqueue_training(ticker)
+            items.append({"ticker": ticker, "status": "queued" if created else "duplicate", "job_id": job["id"]})
+
+    batch_id = await run_blocking(job_store.create_batch, items)
+    return {"batch_id": batch_id, "items": items}
+
+
+# Endpoint para consultar o andamento de um lote de treinamento
+@app.get(
+    "/train/batch/{batch_id}",
+    response_model=BatchTrainResponse,
+    summary="Consultar um lote de treinamento",
+    description="Retorna o estado atual do job de cada ticker de um lote de treinamento."
+)
+async def train_batch_status_endpoint(batch_id: str, api_key: str = Depends(get_api_key)):
     """
-    # Busca os dados históricos
-    df = get_stock_data(ticker)
-    if df is None or df.empty:
-        print(f"Nenhum dado encontrado para o ticker {ticker}.")
-        return
+    Endpoint para consultar o andamento de um lote de treinamento.
 
-    # Pré-processa os dados
-    X_train, y_train, scaler = preprocess_data(df)
+    Parâmetros:
+        batch_id (str): Identificador retornado por /train/batch.
+        api_key (str): Chave de API para autenticação.
 
-    # Constrói o modelo
-    model = build_model(input_shape=(X_train.shape[1], X_train.shape[2]))
+    Retorna:
+        BatchTrainResponse: Estado de cada ticker do lote.
+    """
+    batch = await run_blocking(job_store.get_batch, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"Lote {batch_id} não encontrado.")
+    return {"batch_id": batch["batch_id"], "items": batch["items"]}
 
-    # Treina o modelo
-    train_model(model, X_train, y_train)
 
-    # Salva o modelo e o scaler
-    model_path = os.path.join(MODEL_DIR, f"{ticker}_model.h5")
-    model.save(model_path)
-    scaler_path = os.path.join(MODEL_DIR, f"{ticker}_scaler.pkl")
-    joblib.dump(scaler, scaler_path)
+# Endpoint para consultar o andamento de um job de treinamento
+@app.get(
+    "/jobs/{job_id}",
+    response_model=JobResponse,
+    summary="Consultar um job de treinamento",
+    description="Retorna o estado (queued, running, done ou failed), os tempos e as épocas concluídas de um job de treinamento."
+)
+async def job_endpoint(job_id: str, api_key: str = Depends(get_api_key)):
+    """
+    Endpoint para consultar o andamento de um job de treinamento.
 
-    print(f"Modelo para {ticker} salvo com sucesso.")
+    Parâmetros:
+        job_id (str): Identificador do job retornado por /train.
+        api_key (str): Chave de API para autenticação.
+
+    Retorna:
+        JobResponse: Estado, tempos e progresso do job.
+    """
+    job = await run_blocking(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} não encontrado.")
+
+    queue_end = job["started_at"] or job["finished_at"]
+    return {
+        "job_id": job["id"],
+        "ticker": job["ticker"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "queue_seconds": queue_end - job["created_at"] if queue_end else None,
+        "run_seconds": (
+            (job["finished_at"] or time.time()) - job["started_at"] if job["started_at"] else None
+        ),
+        "epochs_completed": job["epochs_completed"],
+        "epochs_total": job["epochs_total"],
+        "error": job["error"],
+    }
+
+
+# Retorna o registro de modelos do motor de inferência solicitado
+def get_registry(engine=None):
+    engine = engine or INFERENCE_ENGINE
+    if engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Motor de inferência inválido: {engine}. Use um destes: {list(ENGINES)}.")
+    return numpy_registry if engine == "numpy" else model_registry
 
 
 # Endpoint para fazer previsões com base em um ticker
@@ -197,44 +627,363 @@ def train_and_save_model(ticker):
     "/predict",
     response_model=PredictResponse,
     summary="Prever o preço de fechamento para um ticker",
-    description="Utiliza o modelo treinado para prever o próximo preço de fechamento da ação especificada pelo ticker."
+    description="Utiliza o modelo treinado para prever o próximo preço de fechamento da ação especificada pelo ticker. "
+                "O parâmetro `engine` escolhe o motor de inferência (`keras` ou `numpy`). "
+                "Quando a previsão em lote (`python -m utils.batch_scoring`) tem uma entrada fresca para o ticker, ela é "
+                "servida diretamente (`source=table`); senão, a previsão é calculada na hora (`source=live`). "
+                "A resposta traz um `ETag`, que muda quando o modelo é retreinado ou chega um novo pregão; "
+                "com `If-None-Match`, a API responde 304 se a previsão não mudou.",
+    responses={304: {"description": "A previsão não mudou desde o ETag informado em If-None-Match."}},
 )
-async def predict_endpoint(ticker: str):
+async def predict_endpoint(
+    ticker: str,
+    response: Response,
+    engine: str = None,
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Endpoint para prever o preço de fechamento de uma ação.
 
+    Se a tabela de previsões em lote tiver uma entrada fresca para o ticker
+    (calculada com a versão atual do modelo e o último pregão armazenado, há
+    no máximo PREDICTION_TABLE_MAX_AGE segundos), ela é servida sem carregar o modelo,
+    buscar os dados nem fazer inferência. Senão, a previsão é guardada em
+    cache pela versão do modelo e pela data do último pregão; enquanto ambas
+    forem as mesmas, a resposta é servida do cache, sem pré-processamento nem
+    inferência.
+
     Parâmetros:
         ticker (str): Código da ação.
+        response (Response): Resposta, usada para enviar o cabeçalho ETag.
+        engine (str): Motor de inferência ("keras" ou "numpy"; padrão: INFERENCE_ENGINE).
+        if_none_match (str): ETag de uma resposta anterior (cabeçalho If-None-Match).
 
     Retorna:
-        PredictResponse: Resposta contendo o ticker e o preço previsto.
+        PredictResponse: Resposta contendo o ticker, o preço previsto e a sua
+        origem e data (ou 304, sem corpo, se o ETag informado ainda for válido).
     """
     ticker = ticker.upper()
-    model_path = os.path.join(MODEL_DIR, f"{ticker}_model.h5")
-    scaler_path = os.path.join(MODEL_DIR, f"{ticker}_scaler.pkl")
+    registry = get_registry(engine)
+
+    # Previsão calculada em lote, se ainda estiver fresca
+    entry = fresh_table_entry(ticker, engine)
+    if entry is not None:
+        cache_key = prediction_cache.key(ticker, entry["engine"], tuple(entry["model_version"]), entry["last_date"])
+        etag = prediction_cache.etag(cache_key)
+        if etag_matches(if_none_match, etag):
+            PREDICTION_CACHE_REQUESTS.labels("not_modified").inc()
+            return Response(status_code=304, headers={"ETag": etag})
+        PREDICTION_CACHE_REQUESTS.labels("table").inc()
+        response.headers["ETag"] = etag
+        return {"ticker": ticker, "predicted_price": entry["predicted_price"], "source": "table",
+                "data_date": entry["last_date"], "scored_at": entry["scored_at"]}
+
+    # Obtém o modelo e o scaler do registro (carregando-os apenas se necessário)
+    model, scaler, model_version = await load_prediction_model(registry, ticker)
+
+    # Obtém as features normalizadas mais recentes
+    series = await load_feature_series(ticker, scaler)
+
+    # A previsão depende apenas da versão do modelo e dos dados até o último pregão
+    cache_key = prediction_cache.key(ticker, registry.engine, model_version, series.last_date)
+    etag = prediction_cache.etag(cache_key)
+    if etag_matches(if_none_match, etag):
+        PREDICTION_CACHE_REQUESTS.labels("not_modified").inc()
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    predicted_price = await predict_next_close(ticker, registry, model, scaler, series, cache_key)
+    return {"ticker": ticker, "predicted_price": predicted_price, "source": "live", "data_date": series.last_date}
+
+
+# Obtém a previsão do ticker na tabela de previsões em lote, se ela puder ser servida
+def fresh_table_entry(ticker, engine=None):
+    """
+    Retorna a entrada fresca da tabela de previsões para o ticker ou None.
+    A entrada só é usada se o motor pedido (quando informado) for o mesmo em
+    que ela foi calculada, se a versão atual do modelo for a do cálculo e se
+    nenhum pregão posterior ao usado no cálculo já estiver no armazenamento
+    de cotações (nesse caso, a previsão é calculada na hora).
+    """
+    entry = prediction_table.get(ticker)
+    if entry is None or entry.get("engine") not in ENGINES or (engine and engine != entry["engine"]):
+        return None
+    try:
+        model_version = get_registry(entry["engine"]).version(ticker)
+        last_bar = get_market_data_store().last_date(ticker, data_end_date())
+    except Exception:
+        return None
+    if last_bar is not None and last_bar > entry["last_date"]:
+        return None
+    return entry if prediction_table.is_fresh(entry, model_version) else None
+
 
-    # Verifica se o modelo existe
-    if not os.path.exists(model_path) or not os.path.exists(scaler_path):
+# Obtém o modelo e o scaler de um ticker, convertendo as falhas em respostas HTTP
+async def load_prediction_model(registry, ticker, pipeline="predict"):
+    try:
+        with track_stage(pipeline, "model_load", ticker):
+            return await registry.get_versioned_async(ticker)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Modelo para {ticker} não encontrado. Treine o modelo primeiro.")
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Tempo esgotado ao carregar o modelo de {ticker}.")
+
+
+# Atualiza os dados de um ticker e obtém as suas features normalizadas, convertendo as falhas em respostas HTTP
+async def load_feature_series(ticker, scaler, pipeline="predict", refresh=True):
+    # Busca na fonte apenas os pregões que ainda não estão no armazenamento local
+    if refresh:
+        try:
+            with track_stage(pipeline, "data_fetch", ticker):
+                await refresh_stock_data_async(ticker)
+        except TimeoutError:
+            raise HTTPException(status_code=504, detail=f"Tempo esgotado ao buscar os dados do ticker {ticker}.")
+    # Normaliza apenas os pregões que ainda não estão no armazenamento de features
+    with track_stage(pipeline, "preprocess", ticker):
+        series = await run_blocking(get_feature_series, ticker, scaler)
+    if series is None or not len(series):
+        raise HTTPException(status_code=404, detail=f"Nenhum dado encontrado para o ticker {ticker}.")
+    return series
 
-    # Carrega o modelo e o scaler
-    model = load_trained_model(model_path)
-    scaler = joblib.load(scaler_path)
 
-    # Obtém os dados mais recentes
-    df = get_stock_data(ticker)
-    if df is None or df.empty:
-        raise HTTPException(status_code=404, detail=f"Nenhum dado encontrado para o ticker {ticker}.")
+# Calcula a previsão do próximo fechamento, ou a obtém do cache
+async def predict_next_close(ticker, registry, model, scaler, series, cache_key):
+    predicted_price = prediction_cache.get(cache_key)
+    if predicted_price is not None:
+        return predicted_price
 
-    # Prepara os dados para previsão
-    X_input = prepare_prediction_input(df, scaler)
+    # A janela de entrada é uma fatia das features já normalizadas
+    X_input = series.window()
     if X_input is None:
         raise HTTPException(status_code=400, detail="Dados insuficientes para previsão.")
 
-    # Realiza a previsão
-    predicted_price = predict_price(model, X_input, scaler)
+    # Realiza a previsão, agrupada com outras requisições concorrentes do mesmo modelo
+    with track_stage("predict", "inference", ticker):
+        prediction = await batchers.get(f"{ticker}:{registry.engine}", model).submit(X_input)
+    with track_stage("predict", "inverse_scale", ticker):
+        predicted_price = float(inverse_transform_close(scaler, prediction)[0])
+    prediction_cache.put(cache_key, predicted_price)
+    return predicted_price
+
+
+# Endpoint para prever o fechamento dos próximos dias
+@app.get(
+    "/forecast",
+    response_model=ForecastResponse,
+    summary="Prever o fechamento dos próximos dias",
+    description="Prevê o fechamento dos próximos `days` dias úteis de forma autorregressiva: cada previsão entra na "
+                "janela do dia seguinte (preços iguais ao fechamento previsto e volume do último pregão). "
+                "Por padrão usa o motor NumPy (FORECAST_ENGINE), em que cada dia custa poucos milissegundos."
+)
+async def forecast_endpoint(ticker: str, days: int = 5, engine: str = None):
+    """
+    Endpoint para prever o fechamento dos próximos dias de uma ação.
+
+    O resultado é guardado no mesmo cache de `/predict`, pela versão do
+    modelo, pela data do último pregão e pela quantidade de dias.
+
+    Parâmetros:
+        ticker (str): Código da ação.
+        days (int): Quantidade de dias úteis à frente (1 a FORECAST_MAX_DAYS).
+        engine (str): Motor de inferência ("keras" ou "numpy"; padrão: FORECAST_ENGINE).
+
+    Retorna:
+        ForecastResponse: Datas e preços previstos.
+    """
+    import numpy as np
+
+    ticker = ticker.upper()
+    if not 1 <= days <= FORECAST_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days deve estar entre 1 e {FORECAST_MAX_DAYS}.")
+    registry = get_registry(engine or FORECAST_ENGINE)
+
+    model, scaler, model_version = await load_prediction_model(registry, ticker, pipeline="forecast")
+    series = await load_feature_series(ticker, scaler, pipeline="forecast")
+
+    last_date = series.last_date
+    cache_key = prediction_cache.key(ticker, f"{registry.engine}:forecast:{days}", model_version, last_date)
+    prices = prediction_cache.get(cache_key)
+    if prices is None:
+        X_input = series.window()
+        if X_input is None:
+            raise HTTPException(status_code=400, detail="Dados insuficientes para previsão.")
+        with track_stage("forecast", "inference", ticker):
+            prices = [float(price) for price in await run_blocking(forecast_prices, model, scaler, X_input, days)]
+        prediction_cache.put(cache_key, prices)
+
+    # Próximos dias úteis depois do último pregão
+    dates = np.busday_offset(np.datetime64(last_date, "D"), np.arange(1, days + 1), roll="backward")
+    return {
+        "ticker": ticker,
+        "last_date": last_date,
+        "forecast": [{"date": str(date), "predicted_price": price} for date, price in zip(dates, prices)],
+    }
+
+
+# Endpoint para prever o próximo fechamento de vários tickers
+@app.post(
+    "/predict/batch",
+    response_model=BatchPredictResponse,
+    summary="Prever o próximo fechamento de vários tickers",
+    description="Busca os dados de todos os tickers em uma consulta agrupada e carrega os modelos e faz as previsões "
+                "em paralelo (até PREDICT_BATCH_CONCURRENCY tickers por vez). Os erros são informados por ticker. "
+                "Com `stream=true`, cada resultado é devolvido em NDJSON assim que fica pronto."
+)
+async def predict_batch_endpoint(request: BatchPredictRequest, stream: bool = False, engine: str = None):
+    """
+    Endpoint para prever o próximo preço de fechamento de vários tickers.
+
+    Os dados dos tickers com modelo são buscados em uma única consulta
+    agrupada, em paralelo com o carregamento dos modelos; cada previsão usa o
+    mesmo cache e o mesmo agrupamento de inferência de `/predict`.
+
+    Parâmetros:
+        request (BatchPredictRequest): Lista de tickers.
+        stream (bool): Devolve os resultados em NDJSON, na ordem em que ficam prontos.
+        engine (str): Motor de inferência ("keras" ou "numpy"; padrão: INFERENCE_ENGINE).
 
-    return {"ticker": ticker, "predicted_price": predicted_price}
+    Retorna:
+        BatchPredictResponse ou StreamingResponse: Resultado por ticker.
+    """
+    tickers = list(dict.fromkeys(str(ticker).upper() for ticker in request.tickers if ticker))
+    if not tickers:
+        raise HTTPException(status_code=400, detail="Nenhum ticker fornecido.")
+    if len(tickers) > PREDICT_BATCH_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"No máximo {PREDICT_BATCH_MAX_TICKERS} tickers por requisição.")
+    registry = get_registry(engine)
+
+    # Atualização agrupada dos dados, em paralelo com o carregamento dos modelos
+    available = [ticker for ticker in tickers if registry.exists(ticker)]
+    refreshed = asyncio.ensure_future(refresh_many_stock_data_async(available)) if available else None
+    semaphore = asyncio.Semaphore(max(1, PREDICT_BATCH_CONCURRENCY))
+
+    async def predict_item(ticker):
+        try:
+            if ticker not in available:
+                raise HTTPException(status_code=404, detail=f"Modelo para {ticker} não encontrado. Treine o modelo primeiro.")
+            async with semaphore:
+                model, scaler, model_version = await load_prediction_model(registry, ticker)
+            try:
+                # shield: o cancelamento de um ticker não cancela a atualização dos demais
+                await asyncio.shield(refreshed)
+            except TimeoutError:
+                raise HTTPException(status_code=504, detail=f"Tempo esgotado ao buscar os dados do ticker {ticker}.")
+            async with semaphore:
+                series = await load_feature_series(ticker, scaler, refresh=False)
+                cache_key = prediction_cache.key(ticker, registry.engine, model_version, series.last_date)
+                predicted_price = await predict_next_close(ticker, registry, model, scaler, series, cache_key)
+        except HTTPException as e:
+            return {"ticker": ticker, "status_code": e.status_code, "predicted_price": None, "error": e.detail}
+        except Exception as e:
+            print(f"Erro ao prever o ticker {ticker}: {e}")
+            return {"ticker": ticker, "status_code": 500, "predicted_price": None, "error": str(e) or type(e).__name__}
+        return {"ticker": ticker, "status_code": 200, "predicted_price": predicted_price, "error": None}
+
+    if stream:
+        async def ndjson_lines():
+            tasks = [asyncio.ensure_future(predict_item(ticker)) for ticker in tickers]
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    yield json.dumps(await finished) + "\n"
+            finally:
+                # Cliente desconectado: interrompe as previsões restantes
+                for task in tasks:
+                    task.cancel()
+
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+    return {"predictions": await asyncio.gather(*(predict_item(ticker) for ticker in tickers))}
+
+
+# Endpoint para o backtest walk-forward de um ou mais tickers
+@app.post(
+    "/backtest",
+    response_model=BacktestResponse,
+    summary="Backtest walk-forward dos modelos",
+    description="A cada pregão do período, prevê os próximos `horizon` fechamentos com o modelo atual usando apenas "
+                "os pregões anteriores e compara com os fechamentos observados (MAE, RMSE, MAPE e acerto da direção "
+                "por dia à frente). Os tickers são avaliados em processos separados (BACKTEST_WORKERS). "
+                "Com `stream=true`, cada resultado é devolvido em NDJSON assim que fica pronto, com o progresso.",
+)
+async def backtest_endpoint(request: BacktestRequest, stream: bool = False, api_key: str = Depends(get_api_key)):
+    """
+    Endpoint para o backtest walk-forward de vários tickers.
+
+    Os dados dos tickers com modelo são atualizados em uma única consulta
+    agrupada; em seguida, cada ticker é avaliado em um processo do pool de
+    backtests, que lê apenas os armazenamentos locais.
+
+    Parâmetros:
+        request (BacktestRequest): Tickers, período, horizonte e motor de inferência.
+        stream (bool): Devolve os resultados em NDJSON, na ordem em que ficam prontos,
+            com a quantidade de tickers concluídos ('completed') e o total ('total').
+
+    Retorna:
+        BacktestResponse ou StreamingResponse: Resultado por ticker.
+    """
+    import numpy as np
+
+    tickers = list(dict.fromkeys(str(ticker).upper() for ticker in request.tickers if ticker))
+    if not tickers:
+        raise HTTPException(status_code=400, detail="Nenhum ticker fornecido.")
+    if len(tickers) > BACKTEST_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"No máximo {BACKTEST_MAX_TICKERS} tickers por requisição.")
+    if not 1 <= request.horizon <= BACKTEST_MAX_HORIZON:
+        raise HTTPException(status_code=400, detail=f"horizon deve estar entre 1 e {BACKTEST_MAX_HORIZON}.")
+    try:
+        start, end = (str(np.datetime64(date, "D")) if date else None for date in (request.start, request.end))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Datas inválidas. Use o formato AAAA-MM-DD.")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start deve ser anterior a end.")
+    registry = get_registry(request.engine or BACKTEST_ENGINE)
+
+    # Atualização agrupada dos dados; os backtests leem apenas o armazenamento local
+    available = [ticker for ticker in tickers if registry.exists(ticker)]
+    if available:
+        try:
+            await refresh_many_stock_data_async(available)
+        except TimeoutError:
+            raise HTTPException(status_code=504, detail="Tempo esgotado ao buscar os dados dos tickers.")
+    pool = get_backtest_pool(BACKTEST_WORKERS)
+
+    async def backtest_item(ticker):
+        if ticker not in available:
+            return {"ticker": ticker, "status_code": 404, "model_version": None,
+                    "error": f"Modelo para {ticker} não encontrado. Treine o modelo primeiro."}
+        args = (ticker, MODEL_DIR, registry.engine, request.horizon, start, end)
+        try:
+            with track_stage("backtest", "evaluate", ticker):
+                if pool is None:
+                    # Sem processos: usa o registro de modelos da própria API
+                    return await run_blocking(backtest_ticker, *args, registry=registry)
+                return await asyncio.wrap_future(pool.submit(backtest_ticker, *args))
+        except Exception as e:
+            print(f"Erro no backtest do ticker {ticker}: {e}")
+            return {"ticker": ticker, "status_code": 500, "model_version": None, "error": str(e) or type(e).__name__}
+
+    if stream:
+        async def ndjson_lines():
+            tasks = [asyncio.ensure_future(backtest_item(ticker)) for ticker in tickers]
+            try:
+                for completed, finished in enumerate(asyncio.as_completed(tasks), start=1):
+                    yield json.dumps(dict(await finished, completed=completed, total=len(tickers))) + "\n"
+            finally:
+                # Cliente desconectado: descarta os backtests restantes
+                for task in tasks:
+                    task.cancel()
+
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+    return {"results": await asyncio.gather(*(backtest_item(ticker) for ticker in tickers))}
+
+
+# Verifica se o cabeçalho If-None-Match contém o ETag atual
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
 
 
 # Endpoint para verificar o status do modelo e os recursos do sistema
@@ -242,123 +991,254 @@ async def predict_endpoint(ticker: str):
     "/status",
     response_model=StatusResponse,
     summary="Obter o status do modelo e uso do sistema",
-    description="Fornece informações sobre a existência do modelo, métricas de desempenho e uso atual de recursos do sistema."
+    description="Fornece informações sobre a existência do modelo, métricas de desempenho (calculadas no treinamento) e uso atual de recursos do sistema. Use `recompute=true` para recalcular as métricas em segundo plano."
 )
-async def status_endpoint(ticker: str, api_key: str = Depends(get_api_key)):
+async def status_endpoint(ticker: str, recompute: bool = False, api_key: str = Depends(get_api_key)):
     """
     Endpoint para verificar o status do modelo e o uso de recursos do sistema.
 
+    As métricas de desempenho são lidas dos metadados gravados no treinamento
+    e o uso do sistema vem do amostrador em segundo plano, de modo que a
+    resposta é imediata. Com `recompute=true`, as métricas são recalculadas
+    em segundo plano e ficam disponíveis nas próximas consultas.
+
     Parâmetros:
         ticker (str): Código da ação.
+        recompute (bool): Agenda o recálculo assíncrono das métricas.
         api_key (str): Chave de API para autenticação.
 
     Retorna:
         StatusResponse: Informações sobre o modelo e o sistema.
     """
     ticker = ticker.upper()
-    model_path = os.path.join(MODEL_DIR, f"{ticker}_model.h5")
-    scaler_path = os.path.join(MODEL_DIR, f"{ticker}_scaler.pkl")
 
-    model_exists = os.path.exists(model_path) and os.path.exists(scaler_path)
-    performance_metrics = {}
+    model_exists = model_registry.exists(ticker)
+    metadata = load_metadata(MODEL_DIR, ticker) if model_exists else None
+    recompute_scheduled = False
 
-    # Calcula as métricas de desempenho se o modelo existir
+    # Lê as métricas calculadas no treinamento, se o modelo existir
     if model_exists:
-        model = load_trained_model(model_path)
-        scaler = joblib.load(scaler_path)
-        df = get_stock_data(ticker)
-        X_test, y_test = prepare_test_data(df, scaler)
-        if X_test is not None and y_test is not None:
-            predictions = model.predict(X_test)
-            predicted_prices = scaler.inverse_transform(
-                np.concatenate([predictions, np.zeros((predictions.shape[0], 4))], axis=1)
-            )[:, 0]
-            real_prices = scaler.inverse_transform(
-                np.concatenate([y_test.reshape(-1, 1), np.zeros((y_test.shape[0], 4))], axis=1)
-            )[:, 0]
-            mae = mean_absolute_error(real_prices, predicted_prices)
-            rmse = np.sqrt(mean_squared_error(real_prices, predicted_prices))
-            performance_metrics = {"MAE": mae, "RMSE": rmse}
+        performance_metrics = (metadata or {}).get("metrics") or {"MAE": None, "RMSE": None}
+        if recompute:
+            recompute_scheduled = schedule_metrics_recompute(ticker)
     else:
         performance_metrics = {"MAE": None, "RMSE": None}
 
-    # Obtém o uso de recursos do sistema
-    cpu_usage = psutil.cpu_percent(interval=1)
-    memory = psutil.virtual_memory()
-    disk = shutil.disk_usage("/")
-
-    system_usage = {
-        "cpu_usage_percent": cpu_usage,
-        "memory_total_mb": memory.total / (1024 * 1024),
-        "memory_available_mb": memory.available / (1024 * 1024),
-        "disk_total_gb": disk.total / (1024 * 1024 * 1024),
-        "disk_used_gb": disk.used / (1024 * 1024 * 1024),
-        "disk_free_gb": disk.free / (1024 * 1024 * 1024),
-    }
-
     return {
         "model_exists": model_exists,
         "performance_metrics": performance_metrics,
-        "system_usage": system_usage,
+        "system_usage": system_monitor.snapshot(),
+        "model_cache": get_registry().stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "model_metadata": {key: value for key, value in (metadata or {}).items() if key != "metrics"},
+        "recompute_scheduled": recompute_scheduled,
     }
 
 
+def recompute_metrics(ticker):
+    """
+    Recalcula as métricas de desempenho de um ticker e atualiza os metadados.
+
+    Parâmetros:
+        ticker (str): Código da ação.
+    """
+    model, scaler = model_registry.get(ticker)
+    refresh_stock_data(ticker)
+    series = get_feature_series(ticker, scaler)
+    if series is None or not len(series):
+        raise ValueError(f"Nenhum dado encontrado para o ticker {ticker}.")
+
+    metadata = load_metadata(MODEL_DIR, ticker) or {"ticker": ticker}
+    metadata["metrics"] = evaluate_series(model, scaler, series.values)
+    metadata["metrics_computed_at"] = datetime.now(timezone.utc).isoformat()
+    save_metadata(MODEL_DIR, ticker, metadata)
+
+
+def schedule_metrics_recompute(ticker):
+    """
+    Agenda o recálculo das métricas de um ticker no pool de threads.
+
+    Parâmetros:
+        ticker (str): Código da ação.
+
+    Retorna:
+        bool: True se o recálculo foi agendado; False se já havia um em andamento.
+    """
+    task = recompute_tasks.get(ticker)
+    if task is not None and not task.done():
+        return False
+
+    def report_error(finished):
+        if not finished.cancelled() and finished.exception() is not None:
+            print(f"Erro ao recalcular as métricas do ticker {ticker}: {finished.exception()}")
+
+    task = asyncio.ensure_future(run_blocking(recompute_metrics, ticker))
+    task.add_done_callback(report_error)
+    recompute_tasks[ticker] = task
+    return True
+
+
+# Obtém o próximo lote de janelas do arquivo enviado (None ao final do arquivo)
+async def next_file_batch(batches, ticker):
+    try:
+        with track_stage("predict_file", "preprocess", ticker):
+            return await run_blocking(next, batches, None)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erro ao pré-processar os dados: {e}")
+
+
+# Faz as previsões de um lote de janelas e as converte para a escala original
+async def predict_file_batch(model, scaler, X_batch, ticker):
+    try:
+        with track_stage("predict_file", "inference", ticker):
+            predictions = await run_blocking(model.predict, X_batch, verbose=0)
+        with track_stage("predict_file", "inverse_scale", ticker):
+            return inverse_transform_close(scaler, predictions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao fazer as previsões: {e}")
+
+
 # Endpoint para prever preços com base em um arquivo enviado
 @app.post(
     "/predict_from_file",
     response_model=PredictionsResponse,
     summary="Prever preços a partir de um arquivo CSV enviado",
-    description="Permite ao usuário enviar um arquivo CSV com dados históricos para gerar previsões personalizadas usando o modelo treinado."
+    description="Permite ao usuário enviar um arquivo CSV com dados históricos para gerar previsões personalizadas usando o modelo treinado. "
+                "O arquivo é lido em partes e apenas as janelas do intervalo [offset, offset + limit) são calculadas. "
+                "Com `stream=true`, as previsões são devolvidas em NDJSON à medida que cada lote é processado."
 )
 async def predict_from_file(
-        ticker: str, file: UploadFile = File(...), api_key: str = Depends(get_api_key)
+        ticker: str,
+        file: UploadFile = File(...),
+        stream: bool = False,
+        offset: int = 0,
+        limit: int = None,
+        engine: str = None,
+        api_key: str = Depends(get_api_key)
 ):
     """
     Endpoint para realizar previsões com base em dados enviados via arquivo CSV.
 
+    O CSV é lido em partes de `PREDICT_FILE_CHUNK_ROWS` linhas, mantendo em
+    memória apenas as últimas 60 linhas entre as partes, e a inferência é feita
+    em lotes de `PREDICT_FILE_BATCH_SIZE` janelas.
+
     Parâmetros:
         ticker (str): Código da ação.
         file (UploadFile): Arquivo CSV contendo os dados históricos.
+        stream (bool): Devolve as previsões em NDJSON, uma linha por janela.
+        offset (int): Índice da primeira janela a prever.
+        limit (int): Quantidade de janelas a prever (padrão: 7; com `stream=true`, todas).
+        engine (str): Motor de inferência ("keras" ou "numpy"; padrão: INFERENCE_ENGINE).
         api_key (str): Chave de API para autenticação.
 
     Retorna:
-        PredictionsResponse: Lista de preços previstos.
+        PredictionsResponse ou StreamingResponse: Lista de preços previstos.
     """
     ticker = ticker.upper()
-    model_path = os.path.join(MODEL_DIR, f"{ticker}_model.h5")
-    scaler_path = os.path.join(MODEL_DIR, f"{ticker}_scaler.pkl")
-
-    if not os.path.exists(model_path) or not os.path.exists(scaler_path):
-        raise HTTPException(status_code=404, detail=f"Modelo para {ticker} não encontrado. Treine o modelo primeiro.")
-
-    # Carrega o modelo e o scaler
-    model = load_trained_model(model_path)
-    scaler = joblib.load(scaler_path)
-
-    # Lê o arquivo enviado
-    try:
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao ler o arquivo enviado: {e}")
+    if limit is None and not stream:
+        limit = 7
+    if offset < 0 or (limit is not None and limit < 1):
+        raise HTTPException(status_code=400, detail="offset deve ser >= 0 e limit deve ser >= 1.")
+    registry = get_registry(engine)
+
+    # Obtém o modelo e o scaler do registro (carregando-os apenas se necessário)
+    model, scaler, _ = await load_prediction_model(registry, ticker, pipeline="predict_file")
+
+    # Lê o arquivo enviado em partes, sem carregá-lo inteiro na memória
+    batches = iter_user_window_batches(
+        file.file, scaler,
+        batch_size=PREDICT_FILE_BATCH_SIZE,
+        offset=offset,
+        limit=limit,
+        chunksize=PREDICT_FILE_CHUNK_ROWS,
+    )
 
-    # Pré-processa os dados
-    try:
-        X_input = preprocess_user_data(df, scaler)
-        if X_input is None:
-            raise HTTPException(status_code=400, detail="Dados insuficientes para previsão após o pré-processamento.")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao pré-processar os dados: {e}")
+    # O primeiro lote é lido antes da resposta para que erros de leitura resultem em 400
+    first_batch = await next_file_batch(batches, ticker)
+    if first_batch is None:
+        raise HTTPException(status_code=400, detail="Dados insuficientes para previsão após o pré-processamento.")
+
+    if stream:
+        async def ndjson_lines():
+            batch = first_batch
+            try:
+                while batch is not None:
+                    start, X_batch = batch
+                    prices = await predict_file_batch(model, scaler, X_batch, ticker)
+                    yield "".join(
+                        json.dumps({"index": start + i, "predicted_price": float(price)}) + "\n"
+                        for i, price in enumerate(prices)
+                    )
+                    batch = await next_file_batch(batches, ticker)
+            except HTTPException as e:
+                # O status já foi enviado; o erro é informado na última linha
+                yield json.dumps({"error": e.detail}) + "\n"
+
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+    predicted_prices = []
+    batch = first_batch
+    while batch is not None:
+        predicted_prices.extend(float(price) for price in await predict_file_batch(model, scaler, batch[1], ticker))
+        batch = await next_file_batch(batches, ticker)
+
+    return {"predictions": predicted_prices}
+
+
+# Inicia os processos de treinamento e o amostrador do sistema junto com a aplicação
+def start_background_workers():
+    system_monitor.start()
+    # Apenas o processo responsável pelos processos de treinamento agenda as atualizações e a previsão em lote
+    if TRAINING_WORKERS > 0 and training_pool.start():
+        if RETRAIN_INTERVAL > 0:
+            stale_model_scheduler.start()
+        if PREDICTION_SCORING_INTERVAL > 0:
+            prediction_scoring_scheduler.start()
+
+
+# Carrega o modelo de um ticker e executa uma inferência de teste
+def warm_up_ticker(ticker, engine=None):
+    """
+    Carrega o modelo e o scaler de um ticker no registro e executa uma
+    inferência com dados fictícios, para que a primeira requisição real não
+    pague o carregamento do modelo nem a inicialização do motor de inferência.
 
-    # Faz as previsões
-    try:
-        predictions = model.predict(X_input)
-        predictions_full = np.concatenate([predictions, np.zeros((predictions.shape[0], 4))], axis=1)
-        predicted_prices = scaler.inverse_transform(predictions_full)[:, 0]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao fazer as previsões: {e}")
+    Parâmetros:
+        ticker (str): Código da ação.
+        engine (str): Motor de inferência (padrão: INFERENCE_ENGINE).
 
-    return {"predictions": [float(price) for price in predicted_prices][:7]}
+    Retorna:
+        float: Tempo gasto (s).
+    """
+    import numpy as np
+
+    start = time.perf_counter()
+    model, scaler = get_registry(engine).get(ticker)
+    # Mesmo formato e tipo (float32) da janela lida do armazenamento de features
+    dummy_input = np.zeros((1, SEQUENCE_LENGTH, len(FEATURE_COLUMNS)), dtype=np.float32)
+    inverse_transform_close(scaler, model.predict(dummy_input, verbose=0))
+    return time.perf_counter() - start
+
+
+# Aquece os modelos configurados antes de a API começar a atender requisições
+async def warm_up(tickers):
+    for ticker in tickers:
+        try:
+            seconds = await run_blocking(warm_up_ticker, ticker)
+            print(f"Modelo de {ticker} pré-carregado em {seconds:.2f}s.")
+        except Exception as e:
+            print(f"Erro ao pré-carregar o modelo de {ticker}: {e}")
+
+
+# Encerra os processos de treinamento e de backtest, o amostrador e o pool de threads ao desligar a aplicação
+def shutdown_workers():
+    stale_model_scheduler.stop()
+    prediction_scoring_scheduler.stop()
+    training_pool.stop()
+    system_monitor.stop()
+    shutdown_backtest_pool()
+    executor.shutdown()
 
 
 # Executa a aplicação se o script for executado diretamente
@@ -0,0 +1,114 @@
+# benchmarks/bench_backtest.py
+#
+# Compara o backtest walk-forward vetorizado (utils.backtesting, janelas em
+# lotes e uma chamada ao modelo por passo do horizonte) com a avaliação
+# pregão a pregão (uma chamada de `forecast_prices` por data de origem), nos
+# motores NumPy e Keras, e mede o backtest de vários tickers com 1 e com
+# `--workers` processos.
+#
+# Os dados e os modelos são sintéticos (benchmarks.fixtures), lidos pelos
+# processos do pool a partir de um armazenamento local temporário.
+#
+# Uso:
+#     python -m benchmarks.bench_backtest [--tickers 4] [--rows 1500] [--horizon 5] [--workers 4] [--output relatorio.json]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _timed(function):
+    """Executa `function` e retorna a duração (s) e o resultado."""
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do backtest walk-forward.")
+    parser.add_argument("--tickers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=1500)
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        import pandas as pd
+
+        from benchmarks.fixtures import train_fixture_models, write_offline_data
+
+        # Os processos do pool herdam a configuração do armazenamento local pelas variáveis de ambiente
+        tickers = [f"T{i:02d}" for i in range(args.tickers)]
+        write_offline_data(os.path.join(workdir, "offline"), tickers, args.rows)
+        os.environ.update({
+            "MARKET_DATA_DIR": os.path.join(workdir, "data"),
+            "MARKET_DATA_SOURCE": "file",
+            "MARKET_DATA_FILE_DIR": os.path.join(workdir, "offline"),
+            "MARKET_DATA_END": str((pd.bdate_range("2020-01-01", periods=args.rows)[-1] + pd.Timedelta(days=1)).date()),
+        })
+        model_dir = os.path.join(workdir, "models")
+        train_fixture_models(model_dir, tickers, args.rows)
+
+        import numpy as np
+
+        from utils.backtesting import backtest_many, backtest_series
+        from utils.data_preprocessing import refresh_many_stock_data
+        from utils.feature_store import get_feature_series
+        from utils.forecasting import forecast_prices
+        from utils.model_bundle import latest_bundle, load_bundle
+
+        refresh_many_stock_data(tickers)
+        path = latest_bundle(model_dir, tickers[0])[1]
+        engines = {engine: load_bundle(path, engine=engine)[:2] for engine in ("numpy", "keras")}
+        series = get_feature_series(tickers[0], engines["numpy"][1])
+        origins = range(59, len(series) - 1)
+
+        results = {"origins": len(origins), "horizon": args.horizon}
+        for engine, (model, scaler) in engines.items():
+            backtest_series(model, scaler, series, args.horizon)  # aquecimento
+            seconds, report = _timed(lambda: backtest_series(model, scaler, series, args.horizon))
+            results[f"vectorized_{engine}_s"] = seconds
+            results[f"vectorized_{engine}_mae"] = [item["MAE"] for item in report["horizons"]]
+
+        # Pregão a pregão, como uma chamada a /forecast por data de origem (apenas no motor NumPy, o mais rápido)
+        model, scaler = engines["numpy"]
+        seconds, forecasts = _timed(lambda: [forecast_prices(model, scaler, series.window(end=i + 1), args.horizon)
+                                             for i in origins])
+        closes = scaler.inverse_transform(series.values)[:, 0]
+        forecasts = np.array(forecasts)
+        results["per_origin_numpy_s"] = seconds
+        results["per_origin_numpy_mae"] = [
+            float(np.mean(np.abs(forecasts[:len(origins) - day + 1, day - 1] - closes[60 + day - 1:])))
+            for day in range(1, args.horizon + 1)
+        ]
+        results["speedup_numpy"] = results["per_origin_numpy_s"] / results["vectorized_numpy_s"]
+
+        for workers in sorted({1, args.workers}):
+            seconds, report = _timed(lambda: list(backtest_many(tickers, model_dir, "numpy", args.horizon,
+                                                                max_workers=workers)))
+            results[f"many_{workers}_workers_s"] = seconds
+            results[f"many_{workers}_workers_ok"] = sum(item["status_code"] == 200 for item in report)
+
+    print(f"{results['origins']} datas de origem, horizonte {results['horizon']}:")
+    print(f"  pregão a pregão (numpy): {results['per_origin_numpy_s']:8.3f}s")
+    print(f"  vetorizado (numpy):      {results['vectorized_numpy_s']:8.3f}s  ({results['speedup_numpy']:.1f}x)")
+    print(f"  vetorizado (keras):      {results['vectorized_keras_s']:8.3f}s")
+    print(f"  MAE (d+1): pregão a pregão {results['per_origin_numpy_mae'][0]:.6f}, "
+          f"vetorizado {results['vectorized_numpy_mae'][0]:.6f}")
+    for workers in sorted({1, args.workers}):
+        print(f"  {args.tickers} tickers, {workers} processo(s): {results[f'many_{workers}_workers_s']:8.3f}s "
+              f"({results[f'many_{workers}_workers_ok']} concluídos)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# benchmarks/bench_batching.py
+#
+# Compara a vazão de /predict com muitas requisições simultâneas para o mesmo
+# ticker, com e sem o agrupamento de inferências em lote (utils.batching).
+#
+# Uso:
+#     python -m benchmarks.bench_batching [--concurrency 32] [--requests 256]
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fixtures import install_offline_environment
+from benchmarks.load_test import ServerThread, run_load
+from utils.batching import BatcherPool
+
+TICKER = "AAA"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do agrupamento de inferências.")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        api = install_offline_environment(workdir, [TICKER])
+
+        for label, batch_size in (("sem_lote", 1), ("com_lote", args.max_batch_size)):
+            api.batchers = BatcherPool(max_batch_size=batch_size, window_ms=args.window_ms)
+            with ServerThread(api.app) as server:
+                result = asyncio.run(run_load(server.url, [TICKER], args.concurrency, args.requests))
+            print(f"{label:>9} (max_batch_size={batch_size}): "
+                  f"p50={result['p50_ms']:.1f}ms p99={result['p99_ms']:.1f}ms "
+                  f"throughput={result['throughput_rps']:.1f} req/s errors={result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_forecast.py
+#
+# Compara as previsões de vários dias de /forecast (uma chamada ao modelo por
+# dia, com a janela deslizada) no motor Keras e no motor NumPy: latência por
+# horizonte e maior diferença entre os preços previstos pelos dois motores.
+#
+# Uso:
+#     python -m benchmarks.bench_forecast [--days 1 5 30] [--repeat 5] [--output relatorio.json]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _best_of(function, repeat):
+    """Menor duração (s) entre `repeat` execuções de `function`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das previsões de vários dias.")
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 5, 30])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    import numpy as np
+    from tensorflow.keras.utils import set_random_seed
+
+    from benchmarks.fixtures import synthetic_ohlcv
+    from utils.data_preprocessing import prepare_prediction_input, scale_training_series
+    from utils.forecasting import forecast_prices
+    from utils.model_utils import build_model, train_model
+    from utils.numpy_engine import export_weights, load_numpy_model
+    from utils.windowing import training_dataset
+
+    set_random_seed(0)
+    df = synthetic_ohlcv("AAA", args.rows)
+    scaled, scaler = scale_training_series(df, dtype=np.float32)
+    model = build_model(input_shape=(60, scaled.shape[1]))
+    train_model(model, training_dataset(scaled, seed=0)[0], epochs=1)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "AAA_weights.json")
+        export_weights(model, path)
+        engine = load_numpy_model(path, mmap=False)
+    X_input = prepare_prediction_input(df, scaler)
+
+    results = []
+    for days in args.days:
+        keras_s, keras_prices = _best_of(lambda: forecast_prices(model, scaler, X_input, days), args.repeat)
+        numpy_s, numpy_prices = _best_of(lambda: forecast_prices(engine, scaler, X_input, days), args.repeat)
+        result = {
+            "days": days,
+            "keras_ms": keras_s * 1000,
+            "numpy_ms": numpy_s * 1000,
+            "speedup": keras_s / numpy_s,
+            "max_abs_diff": float(np.max(np.abs(keras_prices - numpy_prices))),
+        }
+        results.append(result)
+        print(f"days={days:<4} keras {result['keras_ms']:9.2f}ms  numpy {result['numpy_ms']:8.2f}ms  "
+              f"{result['speedup']:6.1f}x  "
+              f"diferença máx. {result['max_abs_diff']:.2e}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
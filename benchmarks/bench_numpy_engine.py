@@ -0,0 +1,99 @@
+# benchmarks/bench_numpy_engine.py
+#
+# Compara o motor de inferência NumPy (utils.numpy_engine) com o Keras
+# (modelo reconstruído a partir do pacote + model.predict): tempo de
+# importação e carregamento, memória residente (RSS) do processo e latência
+# de previsão com lotes de 1 e 32.
+#
+# Cada motor é medido em um processo novo, para que o RSS reflita apenas as
+# bibliotecas que ele realmente importa.
+#
+# Uso:
+#     python -m benchmarks.bench_numpy_engine [--repeats 200]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+TICKER = "AAA"
+
+
+def _rss_mb():
+    """Memória residente atual do processo, em MB."""
+    import psutil
+
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def measure(engine, model_dir, repeats):
+    """
+    Mede um motor de inferência no processo atual.
+
+    Parâmetros:
+        engine (str): "keras" ou "numpy".
+        model_dir (str): Diretório com o modelo de teste.
+        repeats (int): Quantidade de previsões por tamanho de lote.
+
+    Retorna:
+        dict: Tempos de carregamento, RSS e latências (ms).
+    """
+    import numpy as np
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    from utils.model_bundle import latest_bundle, load_bundle
+    model, _, _ = load_bundle(latest_bundle(model_dir, TICKER)[1], engine=engine)
+    load_seconds = time.perf_counter() - start
+
+    X = np.random.default_rng(0).random((32, 60, 5)).astype(np.float32)
+    model.predict(X[:1], verbose=0)  # aquecimento
+    result = {"engine": engine, "load_s": load_seconds}
+    for batch in (1, 32):
+        latencies = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict(X[:batch], verbose=0)
+            latencies.append((time.perf_counter() - start) * 1000)
+        result[f"batch{batch}_p50_ms"] = float(np.percentile(latencies, 50))
+        result[f"batch{batch}_p99_ms"] = float(np.percentile(latencies, 99))
+    result["rss_mb"] = _rss_mb()
+    result["rss_added_mb"] = result["rss_mb"] - rss_before
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do motor de inferência NumPy.")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--child", choices=("keras", "numpy"), help=argparse.SUPPRESS)
+    parser.add_argument("--model-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.model_dir, args.repeats)))
+        return
+
+    from benchmarks.fixtures import train_fixture_models
+
+    with tempfile.TemporaryDirectory() as workdir:
+        train_fixture_models(workdir, [TICKER])
+        for engine in ("keras", "numpy"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_numpy_engine", "--child", engine,
+                 "--model-dir", workdir, "--repeats", str(args.repeats)],
+                check=True, capture_output=True, text=True,
+                cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{engine:>6}: load={result['load_s']:.2f}s rss={result['rss_mb']:.0f}MB "
+                  f"batch1 p50={result['batch1_p50_ms']:.2f}ms p99={result['batch1_p99_ms']:.2f}ms "
+                  f"batch32 p50={result['batch32_p50_ms']:.2f}ms p99={result['batch32_p99_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
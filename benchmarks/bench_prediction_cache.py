@@ -0,0 +1,48 @@
+# benchmarks/bench_prediction_cache.py
+#
+# Compara a vazão de /predict com consultas repetidas aos mesmos tickers (e ao
+# mesmo pregão), com o cache de previsões (utils.prediction_cache) desativado
+# e ativo. Com o cache ativo, apenas a primeira consulta de cada ticker executa
+# a inferência.
+#
+# Uso:
+#     python -m benchmarks.bench_prediction_cache [--concurrency 16] [--requests 256]
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fixtures import install_offline_environment
+from benchmarks.load_test import ServerThread, run_load
+from utils import executor
+from utils.prediction_cache import PredictionCache
+
+TICKERS = ["AAA", "BBB", "CCC", "DDD"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do cache de previsões de /predict.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        api = install_offline_environment(workdir, TICKERS)
+
+        for label, max_entries in (("sem_cache", 0), ("com_cache", 1024)):
+            api.prediction_cache = PredictionCache(max_entries=max_entries)
+            with ServerThread(api.app) as server:
+                result = asyncio.run(run_load(server.url, TICKERS, args.concurrency, args.requests))
+            stats = api.prediction_cache.stats()
+            print(f"{label:>9}: p50={result['p50_ms']:.1f}ms p99={result['p99_ms']:.1f}ms "
+                  f"throughput={result['throughput_rps']:.1f} req/s errors={result['errors']} "
+                  f"hits={stats['hits']} misses={stats['misses']}")
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
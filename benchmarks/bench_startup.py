@@ -0,0 +1,137 @@
+# benchmarks/bench_startup.py
+#
+# Mede o custo de inicialização da API: o tempo de `import api.main` e, para
+# cada motor de inferência, com e sem aquecimento (WARMUP_TICKERS), o tempo
+# até o servidor aceitar conexões, a latência da primeira chamada a /predict
+# e o tempo total até a primeira resposta de /predict.
+#
+# Cada cenário inicia um processo uvicorn novo, apontado para dados e
+# modelos sintéticos (sem acesso à rede).
+#
+# Uso:
+#     python -m benchmarks.bench_startup [--output startup.json]
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fixtures import train_fixture_models, write_offline_data
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TICKER = "AAA"
+
+
+def _free_port():
+    """Reserva uma porta TCP livre no localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _environment(workdir, **extra):
+    """Variáveis de ambiente que apontam a API para o ambiente sintético."""
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": ROOT,
+        "API_KEY": env.get("API_KEY", "benchmark"),
+        "MARKET_DATA_SOURCE": "file",
+        "MARKET_DATA_FILE_DIR": os.path.join(workdir, "offline"),
+        "MARKET_DATA_DIR": os.path.join(workdir, "data"),
+        "TRAINING_WORKERS": "0",
+    })
+    env.update(extra)
+    return env
+
+
+def measure_import(workdir):
+    """Tempo (s) de `import api.main` em um processo novo."""
+    code = "import time; t = time.perf_counter(); import api.main; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=_environment(workdir),
+                            check=True, capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_server(workdir, engine, warmup, timeout=300):
+    """
+    Inicia o uvicorn e mede o tempo até a primeira resposta de /predict.
+
+    Parâmetros:
+        workdir (str): Diretório do ambiente sintético.
+        engine (str): Motor de inferência ("keras" ou "numpy").
+        warmup (bool): Se o modelo deve ser aquecido na inicialização.
+        timeout (float): Tempo máximo de espera (s).
+
+    Retorna:
+        dict: Tempo até aceitar conexões, latência da primeira previsão e total (s).
+    """
+    import httpx
+
+    port = _free_port()
+    env = _environment(workdir, INFERENCE_ENGINE=engine, WARMUP_TICKERS=TICKER if warmup else "")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            while True:
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError("O servidor não iniciou a tempo.")
+                try:
+                    client.get("/metrics")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.05)
+            ready = time.perf_counter() - start
+
+            request_start = time.perf_counter()
+            response = client.get("/predict", params={"ticker": TICKER})
+            response.raise_for_status()
+            first_predict = time.perf_counter() - request_start
+    finally:
+        process.terminate()
+        process.wait(30)
+
+    return {
+        "engine": engine,
+        "warmup": warmup,
+        "ready_s": ready,
+        "first_predict_s": first_predict,
+        "time_to_first_response_s": ready + first_predict,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de inicialização da API.")
+    parser.add_argument("--output", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        write_offline_data(os.path.join(workdir, "offline"), [TICKER])
+        train_fixture_models(os.path.join(workdir, "models"), [TICKER])
+
+        results = {"import_s": measure_import(workdir), "servers": []}
+        print(f"import api.main: {results['import_s']:.2f}s")
+        for engine in ("keras", "numpy"):
+            for warmup in (False, True):
+                result = measure_server(workdir, engine, warmup)
+                results["servers"].append(result)
+                print(f"{engine:>6} warmup={str(warmup):<5}: pronto em {result['ready_s']:.2f}s, "
+                      f"primeira previsão {result['first_predict_s'] * 1000:.0f}ms, "
+                      f"total {result['time_to_first_response_s']:.2f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/bench_training_pipeline.py
+#
+# Compara o treinamento com as janelas materializadas (preprocess_data +
+# model.fit com arrays) com o pipeline tf.data que gera as janelas sob
+# demanda (utils.windowing.training_dataset): pico de memória residente
+# (VmHWM) acrescentado pelo pré-processamento e pelo treinamento, e vazão em
+# amostras por segundo.
+#
+# Cada cenário roda em um processo novo, depois de importar o TensorFlow e
+# construir o modelo, para que o pico reflita apenas os dados de treinamento.
+# Com --tickers N, a série de N tickers sintéticos é treinada em conjunto.
+#
+# Uso:
+#     python -m benchmarks.bench_training_pipeline [--rows 5000 20000] [--tickers 1] [--epochs 1]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PIPELINES = ("materialized", "dataset")
+
+
+def _peak_rss_mb():
+    """Pico de memória residente do processo (VmHWM), em MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rss_mb():
+    """Memória residente atual do processo, em MB."""
+    import psutil
+
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def measure(pipeline, rows, tickers, epochs):
+    """
+    Treina um modelo no processo atual e mede memória e vazão.
+
+    Parâmetros:
+        pipeline (str): "materialized" ou "dataset".
+        rows (int): Dias sintéticos por ticker.
+        tickers (int): Quantidade de tickers sintéticos.
+        epochs (int): Épocas de treinamento.
+
+    Retorna:
+        dict: Amostras, pico de memória acrescentado (MB) e amostras/s.
+    """
+    import numpy as np
+    from tensorflow.keras.utils import set_random_seed
+
+    from benchmarks.fixtures import synthetic_ohlcv
+    from utils.data_preprocessing import preprocess_data, scale_training_series
+    from utils.model_utils import build_model, train_model
+    from utils.windowing import training_dataset
+
+    set_random_seed(0)
+    frames = [synthetic_ohlcv(f"T{i:03d}", rows) for i in range(tickers)]
+    model = build_model(input_shape=(60, 5))
+    # Compila o grafo de treinamento antes da medição
+    X, y, _ = preprocess_data(frames[0].iloc[:200])
+    train_model(model, X, y, epochs=1)
+    del X, y
+
+    baseline = _rss_mb()
+    start = time.perf_counter()
+    if pipeline == "materialized":
+        parts = [preprocess_data(df)[:2] for df in frames]
+        X = np.concatenate([X for X, _ in parts]) if tickers > 1 else parts[0][0]
+        y = np.concatenate([y for _, y in parts]) if tickers > 1 else parts[0][1]
+        samples = len(X)
+        prepared = time.perf_counter()
+        train_model(model, X, y, epochs=epochs)
+    else:
+        series = [scale_training_series(df, dtype=np.float32)[0] for df in frames]
+        dataset, samples = training_dataset(series)
+        prepared = time.perf_counter()
+        train_model(model, dataset, epochs=epochs)
+    end = time.perf_counter()
+
+    return {
+        "pipeline": pipeline,
+        "rows": rows,
+        "tickers": tickers,
+        "samples": samples,
+        "peak_rss_added_mb": _peak_rss_mb() - baseline,
+        "prepare_s": prepared - start,
+        "samples_per_s": samples * epochs / (end - prepared),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de dados do treinamento.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--tickers", type=int, default=1)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--output", help="Grava os resultados em JSON neste arquivo")
+    parser.add_argument("--child", choices=PIPELINES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.rows[0], args.tickers, args.epochs)))
+        return
+
+    results = []
+    for rows in args.rows:
+        for pipeline in PIPELINES:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_training_pipeline", "--child", pipeline,
+                 "--rows", str(rows), "--tickers", str(args.tickers), "--epochs", str(args.epochs)],
+                check=True, capture_output=True, text=True, cwd=ROOT,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{pipeline:>12} rows={rows:<6} tickers={args.tickers:<3} amostras={result['samples']:<7} "
+                  f"pico +{result['peak_rss_added_mb']:7.1f}MB  {result['samples_per_s']:8.0f} amostras/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/bench_training_schedule.py
+#
+# Compara o cronograma fixo de treinamento (DEFAULT_EPOCHS antigo: 10 épocas,
+# sem validação) com o cronograma controlado de utils.training (limite de
+# épocas, parada antecipada pela perda de validação, redução da taxa de
+# aprendizado e checkpoints por época): duração, épocas executadas e perda
+# final de treinamento e de validação, medidas nas mesmas janelas de validação.
+#
+# Cada ticker sintético é treinado pelos dois cronogramas, a partir da mesma
+# semente, no processo atual.
+#
+# Uso:
+#     python -m benchmarks.bench_training_schedule [--tickers AAA BBB CCC] [--rows 2000] [--output relatorio.json]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+FIXED_EPOCHS = 10
+
+
+def run(ticker, rows, schedule_name, max_epochs, time_budget=None):
+    """
+    Treina um modelo para o ticker sintético com um dos cronogramas.
+
+    Parâmetros:
+        ticker (str): Ticker sintético.
+        rows (int): Dias sintéticos.
+        schedule_name (str): "fixed" ou "budgeted".
+        max_epochs (int): Limite de épocas do cronograma controlado.
+        time_budget (float): Tempo máximo (s) do cronograma controlado.
+
+    Retorna:
+        dict: Duração, épocas, perda final de treinamento e de validação.
+    """
+    import numpy as np
+    from tensorflow.keras.utils import set_random_seed
+
+    from benchmarks.fixtures import synthetic_ohlcv
+    from utils.data_preprocessing import scale_training_series
+    from utils.model_utils import build_model, train_model
+    from utils.training import schedule_callbacks, schedule_report, EARLY_STOPPING_PATIENCE, VALIDATION_FRACTION
+    from utils.windowing import training_dataset, split_validation
+
+    set_random_seed(0)
+    scaled, _ = scale_training_series(synthetic_ohlcv(ticker, rows), dtype=np.float32)
+    train_series, validation_series = split_validation(scaled, VALIDATION_FRACTION)
+    dataset, samples = training_dataset(train_series, seed=0)
+    validation, _ = training_dataset(validation_series, shuffle=False)
+    model = build_model(input_shape=(60, scaled.shape[1]))
+
+    start = time.perf_counter()
+    if schedule_name == "fixed":
+        history = train_model(model, dataset, epochs=FIXED_EPOCHS)
+        report = {"epochs_run": len(history.epoch), "stopped_by": "max_epochs"}
+    else:
+        with tempfile.TemporaryDirectory() as backup_dir:
+            schedule = schedule_callbacks(backup_dir, time_budget, EARLY_STOPPING_PATIENCE)
+            history = train_model(model, dataset, epochs=max_epochs, callbacks=list(schedule.values()),
+                                  validation_data=validation)
+            report = schedule_report(history, schedule, max_epochs, time.perf_counter() - start)
+    seconds = time.perf_counter() - start
+
+    return {
+        "ticker": ticker,
+        "schedule": schedule_name,
+        "samples": samples,
+        "seconds": seconds,
+        "epochs_run": report["epochs_run"],
+        "stopped_by": report["stopped_by"],
+        "final_loss": float(history.history["loss"][-1]),
+        # Perda de validação com os pesos finais (os melhores, no cronograma controlado)
+        "val_loss": float(model.evaluate(validation, verbose=0)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do cronograma de treinamento.")
+    parser.add_argument("--tickers", nargs="+", default=["AAA", "BBB", "CCC"])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--max-epochs", type=int, default=30)
+    parser.add_argument("--time-budget", type=float, default=None)
+    parser.add_argument("--output", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    results = []
+    for ticker in args.tickers:
+        fixed = run(ticker, args.rows, "fixed", args.max_epochs)
+        budgeted = run(ticker, args.rows, "budgeted", args.max_epochs, args.time_budget)
+        results.extend([fixed, budgeted])
+        for result in (fixed, budgeted):
+            print(f"{ticker:>6} {result['schedule']:>9}: {result['epochs_run']:>3} épocas "
+                  f"({result['stopped_by']:<14}) {result['seconds']:7.1f}s  "
+                  f"loss={result['final_loss']:.6f}  val_loss={result['val_loss']:.6f}")
+
+    fixed = [r for r in results if r["schedule"] == "fixed"]
+    budgeted = [r for r in results if r["schedule"] == "budgeted"]
+    fixed_seconds = sum(r["seconds"] for r in fixed)
+    budgeted_seconds = sum(r["seconds"] for r in budgeted)
+    summary = {
+        "fixed_seconds": fixed_seconds,
+        "budgeted_seconds": budgeted_seconds,
+        "time_saved_pct": 100 * (1 - budgeted_seconds / fixed_seconds),
+        "fixed_mean_val_loss": sum(r["val_loss"] for r in fixed) / len(fixed),
+        "budgeted_mean_val_loss": sum(r["val_loss"] for r in budgeted) / len(budgeted),
+    }
+    print(f"Tempo: fixo {fixed_seconds:.1f}s, controlado {budgeted_seconds:.1f}s "
+          f"({summary['time_saved_pct']:+.1f}% economizado); val_loss médio: "
+          f"fixo {summary['fixed_mean_val_loss']:.6f}, controlado {summary['budgeted_mean_val_loss']:.6f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"summary": summary, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
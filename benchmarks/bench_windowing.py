@@ -0,0 +1,82 @@
+# benchmarks/bench_windowing.py
+#
+# Micro-benchmark que compara a criação de janelas com laço Python (implementação
+# anterior de preprocess_data/prepare_test_data/preprocess_user_data) com as
+# visões somente leitura de utils.windowing.
+#
+# Uso:
+#     python -m benchmarks.bench_windowing [--rows 3500] [--repeat 20]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from utils.windowing import SEQUENCE_LENGTH, supervised_windows, materialize
+
+
+def loop_windows(scaled_data, sequence_length=SEQUENCE_LENGTH):
+    """Implementação anterior: laço Python com append e np.array ao final."""
+    X, y = [], []
+    for i in range(sequence_length, len(scaled_data)):
+        X.append(scaled_data[i - sequence_length:i])
+        y.append(scaled_data[i, 0])
+    return np.array(X), np.array(y)
+
+
+def best_time(func, repeat):
+    """Executa a função `repeat` vezes e retorna o menor tempo (em segundos)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(rows, repeat):
+    """
+    Executa o benchmark e retorna os resultados.
+
+    Parâmetros:
+        rows (int): Quantidade de linhas (dias) da série sintética.
+        repeat (int): Número de repetições de cada medição.
+
+    Retorna:
+        dict: Tempos (ms) e memória (MB) de cada abordagem.
+    """
+    rng = np.random.default_rng(42)
+    scaled_data = rng.random((rows, 5))
+
+    loop_X, _ = loop_windows(scaled_data)
+    view_X, _ = supervised_windows(scaled_data)
+    assert np.array_equal(loop_X, view_X)
+
+    test_size = int(len(view_X) * 0.2)
+    results = {
+        "rows": rows,
+        "loop_all_ms": best_time(lambda: loop_windows(scaled_data), repeat) * 1000,
+        "view_all_ms": best_time(lambda: supervised_windows(scaled_data), repeat) * 1000,
+        "view_float32_ms": best_time(lambda: supervised_windows(scaled_data, dtype=np.float32), repeat) * 1000,
+        "view_test_split_ms": best_time(
+            lambda: materialize(supervised_windows(scaled_data)[0], -test_size), repeat
+        ) * 1000,
+        "loop_memory_mb": loop_X.nbytes / (1024 * 1024),
+        "view_memory_mb": scaled_data.nbytes / (1024 * 1024),
+        "test_split_memory_mb": view_X[-test_size:].nbytes / (1024 * 1024),
+    }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da criação de janelas temporais.")
+    parser.add_argument("--rows", type=int, default=3500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, value in run(args.rows, args.repeat).items():
+        print(f"{name:>22}: {value:.3f}" if isinstance(value, float) else f"{name:>22}: {value}")
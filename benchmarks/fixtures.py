@@ -0,0 +1,114 @@
+# benchmarks/fixtures.py
+#
+# Dados e modelos sintéticos usados pelos benchmarks, permitindo executá-los
+# sem acesso à rede e sem modelos treinados previamente.
+
+import os
+import sys
+import zlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+
+def synthetic_ohlcv(ticker, rows=750, start="2020-01-01"):
+    """
+    Gera uma série OHLCV determinística para um ticker (passeio aleatório com
+    semente derivada do próprio ticker).
+
+    Parâmetros:
+        ticker (str): Código da ação.
+        rows (int): Quantidade de dias úteis.
+        start (str): Data inicial.
+
+    Retorna:
+        pd.DataFrame: Colunas Date, Open, High, Low, Close e Volume.
+    """
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    spread = np.abs(rng.normal(0, 0.005, rows)) * close
+    return pd.DataFrame({
+        "Date": pd.bdate_range(start, periods=rows),
+        "Open": close + rng.normal(0, 0.002, rows) * close,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 5_000_000, rows).astype(float),
+    })
+
+
+def write_offline_data(directory, tickers, rows=750):
+    """Grava os CSVs sintéticos no formato lido por `utils.market_data.FileSource`."""
+    os.makedirs(directory, exist_ok=True)
+    for ticker in tickers:
+        synthetic_ohlcv(ticker, rows).to_csv(os.path.join(directory, f"{ticker}.csv"), index=False)
+
+
+def train_fixture_models(model_dir, tickers, rows=750, epochs=1):
+    """
+    Treina modelos pequenos (poucas épocas) com a arquitetura de `build_model`
+    e publica o modelo e o scaler como um pacote, no formato usado pela API.
+    """
+    from tensorflow.keras.utils import set_random_seed
+
+    from utils.data_preprocessing import preprocess_data
+    from utils.model_bundle import write_bundle
+    from utils.model_utils import build_model, train_model
+
+    os.makedirs(model_dir, exist_ok=True)
+    for ticker in tickers:
+        set_random_seed(zlib.crc32(ticker.encode()))
+        X, y, scaler = preprocess_data(synthetic_ohlcv(ticker, rows))
+        model = build_model(input_shape=(X.shape[1], X.shape[2]))
+        train_model(model, X, y, epochs=epochs)
+        write_bundle(model_dir, ticker, model, scaler)
+
+
+def install_offline_environment(workdir, tickers, rows=750, epochs=1, prediction_cache=False):
+    """
+    Prepara um ambiente isolado (dados offline, modelos de teste e fila de
+    jobs própria, sem processos de treinamento nem de backtest) e aponta a
+    API para ele.
+
+    O cache de previsões fica desativado por padrão: os benchmarks repetem o
+    mesmo ticker e o mesmo pregão, e com o cache ativo toda requisição após
+    a primeira deixaria de executar a inferência (ver
+    benchmarks.bench_prediction_cache).
+
+    Parâmetros:
+        workdir (str): Diretório temporário do ambiente.
+        tickers (list): Tickers a preparar.
+        rows (int): Dias úteis de histórico sintético.
+        epochs (int): Épocas de treinamento dos modelos de teste.
+        prediction_cache (bool): Mantém o cache de previsões de /predict ativo.
+
+    Retorna:
+        module: O módulo `api.main` já configurado.
+    """
+    from utils.jobs import JobStore
+    from utils.market_data import FileSource, MarketDataStore, set_market_data_store
+    from utils.model_registry import ModelRegistry
+    from utils.prediction_cache import PredictionCache
+    from utils.prediction_table import PredictionTable
+
+    offline_dir = os.path.join(workdir, "offline")
+    model_dir = os.path.join(workdir, "models")
+    write_offline_data(offline_dir, tickers, rows)
+    train_fixture_models(model_dir, tickers, rows, epochs)
+    set_market_data_store(MarketDataStore(os.path.join(workdir, "data"), FileSource(offline_dir)))
+
+    import api.main as main
+    main.MODEL_DIR = model_dir
+    main.model_registry = ModelRegistry(model_dir, max_models=0)
+    main.numpy_registry = ModelRegistry(model_dir, max_models=0, engine="numpy")
+    main.job_store = JobStore(os.path.join(workdir, "data", "jobs.db"))
+    main.TRAINING_WORKERS = 0
+    if not prediction_cache:
+        main.prediction_cache = PredictionCache(max_entries=0)
+    # Sem previsões em lote: a tabela do ambiente começa vazia
+    main.prediction_table = PredictionTable(os.path.join(workdir, "data", "predictions.json"))
+    # Os backtests usam o armazenamento de cotações configurado neste processo
+    main.BACKTEST_WORKERS = 0
+    return main
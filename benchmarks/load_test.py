@@ -0,0 +1,127 @@
+# benchmarks/load_test.py
+#
+# Teste de carga do endpoint /predict com requisições concorrentes para
+# tickers diferentes. Compara a latência com as chamadas bloqueantes
+# executadas diretamente no event loop (EXECUTOR_MAX_WORKERS=0, comportamento
+# anterior) e no pool de threads limitado.
+#
+# A API roda em um servidor uvicorn real, em uma thread separada, para que o
+# bloqueio do event loop do servidor apareça na latência medida pelo cliente.
+#
+# Uso:
+#     python -m benchmarks.load_test [--concurrency 16] [--requests 128] [--workers 8]
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from benchmarks.fixtures import install_offline_environment
+from utils import executor
+
+TICKERS = ["AAA", "BBB", "CCC", "DDD"]
+
+
+def percentile(values, q):
+    """Percentil `q` (0-100) de uma lista de latências, em milissegundos."""
+    return float(np.percentile(np.asarray(values) * 1000, q))
+
+
+class ServerThread:
+    """Executa a aplicação em um servidor uvicorn dentro de uma thread."""
+
+    def __init__(self, app):
+        import uvicorn
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def run_load(base_url, tickers, concurrency, total_requests):
+    """
+    Dispara `total_requests` chamadas a /predict com no máximo `concurrency`
+    requisições simultâneas, alternando entre os tickers.
+
+    Retorna:
+        dict: Latências p50/p99 (ms), vazão (req/s) e quantidade de erros.
+    """
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        # Aquece o registro de modelos e o armazenamento de dados
+        for ticker in tickers:
+            await client.get("/predict", params={"ticker": ticker})
+
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get("/predict", params={"ticker": tickers[i % len(tickers)]})
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total_requests)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "throughput_rps": total_requests / elapsed,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do endpoint /predict.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=128)
+    parser.add_argument("--workers", type=int, default=executor.DEFAULT_MAX_WORKERS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        api = install_offline_environment(workdir, TICKERS)
+
+        for label, workers in (("event_loop", 0), ("thread_pool", args.workers)):
+            executor.configure(workers)
+            with ServerThread(api.app) as server:
+                result = asyncio.run(run_load(server.url, TICKERS, args.concurrency, args.requests))
+            print(f"{label:>12} (workers={workers}): "
+                  f"p50={result['p50_ms']:.1f}ms p99={result['p99_ms']:.1f}ms "
+                  f"throughput={result['throughput_rps']:.1f} req/s errors={result['errors']}")
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+# benchmarks/suite.py
+#
+# Conjunto de benchmarks reprodutível e sem acesso à rede. Usa dados OHLCV
+# sintéticos e determinísticos (benchmarks.fixtures) no lugar de
+# get_stock_data e modelos pequenos treinados na hora, e mede:
+#
+#   - windowing:  criação das janelas temporais (utils.windowing);
+#   - preprocess: preprocess_data, prepare_prediction_input, prepare_test_data e
+#                 a janela de previsão lida do armazenamento de features;
+#   - training:   vazão de train_model (amostras/s), com o pipeline tf.data e
+#                 com as janelas materializadas;
+#   - inference:  latência de predict_price (Keras) e do motor NumPy;
+#   - endpoints:  latência e vazão de cada endpoint, por um cliente em
+#                 processo (ASGI), em vários níveis de concorrência.
+#
+# Os resultados são gravados em JSON (--output) e podem ser comparados com
+# os de outro commit (--compare).
+#
+# Uso:
+#     python -m benchmarks.suite --output atual.json [--compare base.json] [--quick]
+#     python -m benchmarks.suite --only windowing,endpoints
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from benchmarks import bench_windowing
+from benchmarks.fixtures import install_offline_environment, synthetic_ohlcv
+from benchmarks.load_test import percentile
+
+SECTIONS = ("windowing", "preprocess", "training", "inference", "endpoints")
+TICKERS = ["AAA", "BBB"]
+
+
+def _latencies(func, repeat):
+    """Executa `func` `repeat` vezes e retorna as latências (s)."""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _summary(latencies):
+    """Resumo (ms) de uma lista de latências em segundos."""
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "min_ms": min(latencies) * 1000,
+    }
+
+
+def bench_preprocess(rows, repeat):
+    """
+    Tempos das funções de pré-processamento sobre `rows` dias sintéticos e
+    da obtenção da janela de previsão a partir do armazenamento local: pelo
+    DataFrame da série (`MarketDataStore.get` + `prepare_prediction_input`) e
+    pelo armazenamento de features (`FeatureStore.get` + `FeatureSeries.window`).
+    """
+    from utils.data_preprocessing import preprocess_data, prepare_prediction_input, prepare_test_data
+    from utils.feature_store import FeatureStore
+    from utils.market_data import FileSource, MarketDataStore
+
+    df = synthetic_ohlcv("AAA", rows)
+    _, _, scaler = preprocess_data(df)
+    results = {
+        "rows": rows,
+        "preprocess_data": _summary(_latencies(lambda: preprocess_data(df), repeat)),
+        "prepare_prediction_input": _summary(_latencies(lambda: prepare_prediction_input(df, scaler), repeat)),
+        "prepare_test_data": _summary(_latencies(lambda: prepare_test_data(df, scaler), repeat)),
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        df.to_csv(os.path.join(workdir, "AAA.csv"), index=False)
+        market = MarketDataStore(workdir, FileSource(workdir))
+        end = str((df["Date"].iloc[-1] + np.timedelta64(1, "D")).date())
+        market.refresh("AAA", "2000-01-01", end)
+        features = FeatureStore(market)
+        features.get("AAA", scaler, "2000-01-01", end)
+        results["window_from_market_frame"] = _summary(_latencies(
+            lambda: prepare_prediction_input(market.get("AAA", "2000-01-01", end), scaler), repeat))
+        results["window_from_feature_store"] = _summary(_latencies(
+            lambda: features.get("AAA", scaler, "2000-01-01", end).window(), repeat))
+    return results
+
+
+def bench_training(rows, epochs):
+    """
+    Vazão de `train_model` (amostras/s) com a arquitetura de `build_model`,
+    pelo pipeline usado no treinamento (`training_dataset`, janelas geradas
+    sob demanda) e com as janelas materializadas em arrays.
+    """
+    import numpy as np
+    from tensorflow.keras.utils import set_random_seed
+
+    from utils.data_preprocessing import preprocess_data, scale_training_series
+    from utils.model_utils import build_model, train_model
+    from utils.windowing import training_dataset
+
+    df = synthetic_ohlcv("AAA", rows)
+    set_random_seed(0)
+    scaled, _ = scale_training_series(df, dtype=np.float32)
+    dataset, samples = training_dataset(scaled)
+    X, y, _ = preprocess_data(df)
+    model = build_model(input_shape=(X.shape[1], X.shape[2]))
+    train_model(model, X[:64], y[:64], epochs=1)  # compilação do grafo fora da medição
+    train_model(model, training_dataset(scaled[:130])[0], epochs=1)
+
+    start = time.perf_counter()
+    train_model(model, dataset, epochs=epochs)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    train_model(model, X, y, epochs=epochs)
+    materialized = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "samples": samples,
+        "epochs": epochs,
+        "seconds": elapsed,
+        "samples_per_s": samples * epochs / elapsed,
+        "materialized_samples_per_s": len(X) * epochs / materialized,
+    }
+
+
+def bench_inference(model_dir, repeat):
+    """
+    Latência de `predict_price` (Keras) e do motor NumPy para um lote de 1 e
+    do carregamento do pacote do modelo com cada motor.
+    """
+    from utils.data_preprocessing import prepare_prediction_input
+    from utils.model_bundle import latest_bundle, load_bundle
+    from utils.model_utils import predict_price
+
+    _, path = latest_bundle(model_dir, "AAA")
+    model, scaler, _ = load_bundle(path, engine="keras")
+    engine, _, _ = load_bundle(path, engine="numpy")
+    X_input = prepare_prediction_input(synthetic_ohlcv("AAA"), scaler)
+
+    predict_price(model, X_input, scaler)  # aquecimento
+    return {
+        "load_bundle_keras": _summary(_latencies(lambda: load_bundle(path, engine="keras"), min(repeat, 10))),
+        "load_bundle_numpy": _summary(_latencies(lambda: load_bundle(path, engine="numpy"), repeat)),
+        "predict_price_keras": _summary(_latencies(lambda: predict_price(model, X_input, scaler), repeat)),
+        "predict_numpy_engine": _summary(_latencies(lambda: engine.predict(X_input), repeat)),
+    }
+
+
+def endpoint_requests(csv_bytes, headers):
+    """
+    Requisições usadas para medir cada endpoint. Cada item recebe o cliente,
+    o índice da requisição e os IDs criados na preparação.
+    """
+    def upload():
+        return {"file": ("dados.csv", csv_bytes, "text/csv")}
+
+    return {
+        "predict": lambda c, i, ids: c.get("/predict", params={"ticker": TICKERS[i % len(TICKERS)]}),
+        "predict_numpy": lambda c, i, ids: c.get("/predict", params={"ticker": TICKERS[i % len(TICKERS)], "engine": "numpy"}),
+        "predict_not_modified": lambda c, i, ids: c.get("/predict", params={"ticker": TICKERS[i % len(TICKERS)]},
+                                                        headers={"If-None-Match": ids["etags"][i % len(TICKERS)]}),
+        "predict_batch": lambda c, i, ids: c.post("/predict/batch", json={"tickers": TICKERS}),
+        "forecast": lambda c, i, ids: c.get("/forecast", params={"ticker": TICKERS[i % len(TICKERS)], "days": 5}),
+        "backtest": lambda c, i, ids: c.post("/backtest", json={"tickers": TICKERS, "horizon": 5}, headers=headers),
+        "status": lambda c, i, ids: c.get("/status", params={"ticker": TICKERS[i % len(TICKERS)]}, headers=headers),
+        "predict_from_file": lambda c, i, ids: c.post("/predict_from_file", params={"ticker": "AAA"},
+                                                      files=upload(), headers=headers),
+        "train": lambda c, i, ids: c.post("/train", json={"ticker": "NEW"}, headers=headers),
+        "train_batch": lambda c, i, ids: c.post("/train/batch", json={"tickers": TICKERS + ["NEW"]}, headers=headers),
+        "train_batch_status": lambda c, i, ids: c.get(f"/train/batch/{ids['batch_id']}", headers=headers),
+        "job": lambda c, i, ids: c.get(f"/jobs/{ids['job_id']}", headers=headers),
+        "metrics": lambda c, i, ids: c.get("/metrics"),
+    }
+
+
+async def run_endpoint(client, request, ids, concurrency, total):
+    """
+    Dispara `total` requisições com no máximo `concurrency` simultâneas.
+
+    Retorna:
+        dict: Latências (ms), vazão (req/s) e contagem de códigos de status.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], Counter()
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await request(client, i, ids)
+            latencies.append(time.perf_counter() - start)
+            statuses[str(response.status_code)] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return dict(_summary(latencies), throughput_rps=total / elapsed, statuses=dict(statuses))
+
+
+async def bench_endpoints(api, concurrency_levels, total):
+    """Mede todos os endpoints da API com um cliente ASGI em processo."""
+    import httpx
+
+    from utils.security import API_KEY, API_KEY_NAME
+
+    headers = {API_KEY_NAME: API_KEY} if API_KEY else {}
+    csv_bytes = synthetic_ohlcv("AAA", 250).to_csv(index=False).encode()
+    requests = endpoint_requests(csv_bytes, headers)
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Preparação: aquece os modelos e cria os IDs consultados pelos endpoints de acompanhamento
+        etags = []
+        for ticker in TICKERS:
+            etags.append((await client.get("/predict", params={"ticker": ticker})).headers["ETag"])
+            await client.get("/predict", params={"ticker": ticker, "engine": "numpy"})
+        ids = {
+            "etags": etags,
+            "job_id": (await client.post("/train", json={"ticker": "NEW"}, headers=headers)).json()["job_id"],
+            "batch_id": (await client.post("/train/batch", json={"tickers": TICKERS}, headers=headers)).json()["batch_id"],
+        }
+
+        results = {}
+        for name, request in requests.items():
+            results[name] = {}
+            for concurrency in concurrency_levels:
+                results[name][f"c{concurrency}"] = await run_endpoint(client, request, ids, concurrency, total)
+                level = results[name][f"c{concurrency}"]
+                print(f"  {name:>19} c={concurrency:<3} p50={level['p50_ms']:8.2f}ms "
+                      f"p99={level['p99_ms']:8.2f}ms {level['throughput_rps']:8.1f} req/s {level['statuses']}")
+    return results
+
+
+def environment_info():
+    """Informações do ambiente, gravadas junto com os resultados."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def flatten(results, prefix=""):
+    """Achata os resultados em {"secao.metrica": valor} (apenas valores numéricos)."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, current):
+    """
+    Compara dois resultados, métrica a métrica.
+
+    Parâmetros:
+        baseline (dict): Resultados de referência (conteúdo de um JSON do suite).
+        current (dict): Resultados atuais.
+
+    Retorna:
+        list: Tuplas (métrica, referência, atual, variação em %).
+    """
+    base, now = flatten(baseline["results"]), flatten(current["results"])
+    rows = []
+    for name in sorted(base.keys() & now.keys()):
+        change = (now[name] - base[name]) / base[name] * 100 if base[name] else float("nan")
+        rows.append((name, base[name], now[name], change))
+    return rows
+
+
+def run(sections, quick=False):
+    """
+    Executa as seções selecionadas do suite.
+
+    Parâmetros:
+        sections (list): Seções a executar (ver SECTIONS).
+        quick (bool): Usa menos dados e repetições (útil em CI).
+
+    Retorna:
+        dict: {"environment": ..., "parameters": ..., "results": ...}.
+    """
+    parameters = {
+        "rows": 750 if quick else 3500,
+        "repeat": 10 if quick else 50,
+        "train_epochs": 1 if quick else 2,
+        "requests": 32 if quick else 128,
+        "concurrency": [1, 8] if quick else [1, 8, 32],
+    }
+    results = {}
+
+    if "windowing" in sections:
+        print("windowing...")
+        results["windowing"] = bench_windowing.run(parameters["rows"], parameters["repeat"])
+    if "preprocess" in sections:
+        print("preprocess...")
+        results["preprocess"] = bench_preprocess(parameters["rows"], parameters["repeat"])
+    if "training" in sections:
+        print("training...")
+        results["training"] = bench_training(parameters["rows"], parameters["train_epochs"])
+
+    if "inference" in sections or "endpoints" in sections:
+        with tempfile.TemporaryDirectory() as workdir:
+            api = install_offline_environment(workdir, TICKERS)
+            if "inference" in sections:
+                print("inference...")
+                results["inference"] = bench_inference(os.path.join(workdir, "models"), parameters["repeat"])
+            if "endpoints" in sections:
+                print("endpoints...")
+                results["endpoints"] = asyncio.run(
+                    bench_endpoints(api, parameters["concurrency"], parameters["requests"])
+                )
+            from utils import executor
+            executor.shutdown()
+
+    return {"environment": environment_info(), "parameters": parameters, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks offline da API e dos caminhos críticos.")
+    parser.add_argument("--only", help=f"Seções separadas por vírgula (padrão: todas): {','.join(SECTIONS)}")
+    parser.add_argument("--quick", action="store_true", help="Menos dados e repetições")
+    parser.add_argument("--output", help="Grava os resultados em JSON neste arquivo")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    sections = args.only.split(",") if args.only else list(SECTIONS)
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"Seções desconhecidas: {', '.join(sorted(unknown))}")
+
+    report = run(sections, quick=args.quick)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados gravados em {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nComparação com {args.compare} (commit {baseline['environment'].get('commit')}):")
+        for name, before, after, change in compare(baseline, report):
+            print(f"{name:<60} {before:12.3f} {after:12.3f} {change:+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,20 @@
 #!/bin/bash
 
+# Quantidade de processos da API. Com o motor NumPy (INFERENCE_ENGINE=numpy),
+# os processos mapeiam os mesmos arquivos de pesos e compartilham uma única
+# cópia em memória de cada modelo
+WORKERS=${WEB_CONCURRENCY:-1}
+
+# Diretório em que cada processo (da API e de treinamento) grava as suas
+# métricas Prometheus; /metrics agrega todos eles. Esvaziado a cada início
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 if [ "$DEBUG" = "true" ] ; then
     echo "Iniciando em modo de depuração"
     uvicorn api.main:app --host 0.0.0.0 --port 8000 --reload
 else
-    echo "Iniciando em modo de produção"
-    uvicorn api.main:app --host 0.0.0.0 --port 8000
+    echo "Iniciando em modo de produção com $WORKERS processo(s)"
+    uvicorn api.main:app --host 0.0.0.0 --port 8000 --workers "$WORKERS"
 fi
\ No newline at end of file
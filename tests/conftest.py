@@ -0,0 +1,103 @@
+# tests/conftest.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from utils.feature_store import FeatureSeries
+
+
+@pytest.fixture
+def latest_series():
+    """Features normalizadas fictícias (60 pregões), com o último pregão em 2023-12-29."""
+    return FeatureSeries(np.zeros((60, 5), dtype=np.float32), np.full(60, "2023-12-29", dtype="datetime64[D]"))
+
+
+@pytest.fixture
+def random_model():
+    """
+    Fábrica de modelos com a arquitetura de `build_model` e pesos aleatórios
+    (inclusive os vieses, que começam zerados), para exercitar todas as portas.
+    Uso: `random_model(seed=1)`.
+    """
+    from utils.model_utils import build_model
+
+    def make(seed=0):
+        rng = np.random.default_rng(seed)
+        model = build_model(input_shape=(60, 5))
+        model.set_weights([w + rng.normal(0, 0.1, w.shape).astype(np.float32) for w in model.get_weights()])
+        return model
+
+    return make
+
+
+class FakeModel:
+    """Modelo falso que prevê o mesmo valor normalizado para toda janela e registra o tamanho de cada lote."""
+
+    def __init__(self, value=0.5):
+        self.value = value
+        self.batch_sizes = []
+
+    def predict(self, X, verbose=0):
+        self.batch_sizes.append(len(X))
+        return np.full((len(X), 1), self.value)
+
+
+@pytest.fixture
+def fake_api(tmp_path, monkeypatch):
+    """
+    Prepara a API para testes sem modelos treinados nem acesso à fonte de
+    dados: cria arquivos de modelo vazios em `tmp_path`, não inicia os
+    processos de treinamento e instala um registro de modelos com o carregador
+    informado, além de cache e tabela de previsões vazios.
+    Uso: `api = fake_api(tickers=("AAA",), series=latest_series)`.
+
+    Parâmetros da fábrica:
+        tickers (tuple): Tickers com arquivos de modelo.
+        model: Modelo devolvido pelo carregador (padrão: `FakeModel`).
+        scaler (MinMaxScaler): Scaler devolvido pelo carregador (padrão: ajustado a dados aleatórios).
+        loader (callable): Carregador do registro (padrão: devolve `model` e `scaler`).
+        series (FeatureSeries): Features devolvidas por `get_feature_series` (None = as do armazenamento).
+        refresh (bool): Mantém a atualização real das cotações; sem ela, os tickers
+            atualizados são apenas registrados em `fetches`.
+
+    Retorna (da fábrica):
+        SimpleNamespace: `registry`, `model`, `scaler` e `fetches`.
+    """
+    from sklearn.preprocessing import MinMaxScaler
+
+    import api.main as main
+    from utils import data_preprocessing
+    from utils.model_registry import ModelRegistry
+    from utils.prediction_cache import PredictionCache
+    from utils.prediction_table import PredictionTable
+
+    def install(tickers=("AAPL",), model=None, scaler=None, loader=None, series=None, refresh=False):
+        model = FakeModel() if model is None else model
+        scaler = MinMaxScaler().fit(np.random.default_rng(0).random((10, 5))) if scaler is None else scaler
+        for ticker in tickers:
+            for name in (f"{ticker}_model.h5", f"{ticker}_scaler.pkl"):
+                (tmp_path / name).write_bytes(b"0")
+        registry = ModelRegistry(str(tmp_path), loader=loader or (lambda *paths: (model, scaler)))
+        fetches = []
+
+        monkeypatch.setattr(main, "TRAINING_WORKERS", 0)
+        monkeypatch.setattr(main, "MODEL_DIR", str(tmp_path))
+        monkeypatch.setattr(main, "INFERENCE_ENGINE", "keras")
+        monkeypatch.setattr(main, "model_registry", registry)
+        monkeypatch.setattr(main, "prediction_cache", PredictionCache())
+        monkeypatch.setattr(main, "prediction_table", PredictionTable(str(tmp_path / "predictions.json")))
+        if not refresh:
+            monkeypatch.setattr(data_preprocessing, "refresh_stock_data", fetches.append)
+            monkeypatch.setattr(data_preprocessing, "refresh_many_stock_data", lambda tickers: fetches.append(list(tickers)))
+            monkeypatch.setattr(main, "refresh_stock_data", fetches.append)
+        if series is not None:
+            monkeypatch.setattr(main, "get_feature_series", lambda ticker, scaler: series)
+        return SimpleNamespace(registry=registry, model=model, scaler=scaler, fetches=fetches)
+
+    return install
@@ -0,0 +1,89 @@
+# tests/test_backtesting.py
+
+import json
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from sklearn.preprocessing import MinMaxScaler
+
+import api.main as main
+from utils import backtesting
+from utils.backtesting import backtest_series
+from utils.feature_store import FeatureSeries
+from utils.forecasting import forecast_prices
+from utils.numpy_engine import NumpyLSTMModel, extract_weights
+from utils.security import API_KEY_NAME, API_KEY
+
+headers = {API_KEY_NAME: API_KEY}
+
+
+def _series(days=90):
+    dates = pd.bdate_range("2023-06-01", periods=days)
+    close = 100 + 10 * np.sin(np.arange(days) / 5) + np.arange(days) * 0.1
+    values = np.column_stack([close, close + 2, close - 2, close - 1, np.linspace(1e6, 2e6, days)])
+    scaler = MinMaxScaler().fit(values)
+    return FeatureSeries(scaler.transform(values).astype(np.float32), dates.values.astype("datetime64[D]")), scaler
+
+
+def test_backtest_matches_forecast_at_each_origin(random_model):
+    series, scaler = _series()
+    model = NumpyLSTMModel(*extract_weights(random_model()))
+
+    result = backtest_series(model, scaler, series, horizon=3, start="2023-08-24", batch_size=7)
+
+    # Previsão de /forecast feita em cada pregão do período, um de cada vez
+    closes = scaler.inverse_transform(series.values)[:, 0]
+    first = int(np.searchsorted(series.dates, np.datetime64("2023-08-24")))
+    origins = range(first, len(series) - 1)
+    forecasts = {i: forecast_prices(model, scaler, series.window(end=i + 1), 3) for i in origins}
+
+    assert result["start"] == "2023-08-24" and result["end"] == str(series.dates[-2])
+    assert [item["horizon"] for item in result["horizons"]] == [1, 2, 3]
+    for item in result["horizons"]:
+        day = item["horizon"]
+        valid = [i for i in origins if i + day < len(series)]
+        predicted = np.array([forecasts[i][day - 1] for i in valid])
+        real, base = closes[[i + day for i in valid]], closes[valid]
+        assert item["samples"] == len(valid)
+        np.testing.assert_allclose(item["MAE"], np.mean(np.abs(predicted - real)), rtol=1e-4)
+        np.testing.assert_allclose(item["RMSE"], np.sqrt(np.mean((predicted - real) ** 2)), rtol=1e-4)
+        assert item["directional_accuracy"] == np.mean(np.sign(predicted - base) == np.sign(real - base))
+
+    assert backtest_series(model, scaler, series, end="2023-06-30") == {}
+
+
+class FakeModel:
+    def predict(self, X, verbose=0):
+        # Prevê o último fechamento da janela: erro igual à variação diária
+        return np.asarray(X)[:, -1, :1]
+
+
+def test_backtest_endpoint_reports_metrics_per_ticker(monkeypatch, fake_api):
+    series, scaler = _series()
+    api = fake_api(tickers=("AAA",), model=FakeModel(), scaler=scaler)
+    monkeypatch.setattr(main, "BACKTEST_WORKERS", 0)
+    monkeypatch.setattr(main, "get_registry", lambda engine=None: api.registry)
+    monkeypatch.setattr(backtesting, "get_feature_series", lambda ticker, scaler: series)
+
+    with TestClient(main.app) as client:
+        response = client.post("/backtest", json={"tickers": ["aaa", "ZZZ"], "horizon": 2}, headers=headers)
+        streamed = client.post("/backtest", params={"stream": "true"}, json={"tickers": ["AAA", "ZZZ"]},
+                               headers=headers)
+        invalid = client.post("/backtest", json={"tickers": ["AAA"], "horizon": 0}, headers=headers)
+
+    results = response.json()["results"]
+    assert response.status_code == 200 and api.fetches[0] == ["AAA"]
+    assert [(item["ticker"], item["status_code"]) for item in results] == [("AAA", 200), ("ZZZ", 404)]
+    day_one = results[0]["horizons"][0]
+    closes = scaler.inverse_transform(series.values)[:, 0]
+    np.testing.assert_allclose(day_one["MAE"], np.mean(np.abs(np.diff(closes[59:]))), rtol=1e-4)
+    assert day_one["samples"] == len(series) - 60 and len(results[0]["horizons"]) == 2
+
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert [line["completed"] for line in lines] == [1, 2] and {line["total"] for line in lines} == {2}
+    assert sorted(line["ticker"] for line in lines) == ["AAA", "ZZZ"]
+    assert invalid.status_code == 400
@@ -0,0 +1,119 @@
+# tests/test_batch_scoring.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from sklearn.preprocessing import MinMaxScaler
+
+import api.main as main
+from utils import data_preprocessing, market_data
+from utils.batch_scoring import score_all
+from utils.data_preprocessing import prepare_prediction_input
+from utils.market_data import FileSource, MarketDataStore
+from utils.model_bundle import latest_bundle, load_bundle, write_bundle
+from utils.model_utils import build_model, inverse_transform_close
+from utils.prediction_table import PredictionTable
+
+
+def _history(days=120):
+    dates = pd.bdate_range("2023-06-01", periods=days)
+    close = 100 + 10 * np.sin(np.arange(days) / 7)
+    return pd.DataFrame({
+        "Date": dates,
+        "Close": close,
+        "High": close + 2,
+        "Low": close - 2,
+        "Open": close - 1,
+        "Volume": np.linspace(1e6, 2e6, days),
+    })
+
+
+def test_score_all_writes_fresh_predictions_for_trained_models(tmp_path, monkeypatch):
+    df = _history()
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    df.to_csv(source_dir / "AAA.csv", index=False)
+    df.head(30).to_csv(source_dir / "BBB.csv", index=False)
+    monkeypatch.setattr(market_data, "_default_store", MarketDataStore(str(tmp_path / "data"), FileSource(str(source_dir))))
+    monkeypatch.setattr(data_preprocessing, "MARKET_DATA_END", "2023-11-16")
+
+    model_dir = str(tmp_path / "models")
+    scaler = MinMaxScaler().fit(df[["Close", "High", "Low", "Open", "Volume"]].values)
+    for ticker in ("AAA", "BBB"):
+        write_bundle(model_dir, ticker, build_model(input_shape=(60, 5)), scaler)
+    table_path = str(tmp_path / "predictions.json")
+    table = PredictionTable(table_path)
+    table.update({"OLD": {"predicted_price": 1.0}})
+
+    report = score_all(model_dir, table_path, engine="numpy", max_workers=0, chunk_size=1)
+
+    model, _, _ = load_bundle(latest_bundle(model_dir, "AAA")[1], engine="numpy")
+    expected = inverse_transform_close(scaler, model.predict(prepare_prediction_input(df, scaler)))[0]
+    entry = table.get("AAA")
+    assert report["scored"] == 1 and report["failed"] == ["BBB"] and report["table_entries"] == 1
+    np.testing.assert_allclose(entry["predicted_price"], expected, rtol=1e-5)
+    assert entry["model_version"] == [1] and entry["last_date"] == str(df["Date"].iloc[-1].date())
+    assert table.get("OLD") is None
+    assert table.is_fresh(entry, (1,)) and not table.is_fresh(entry, (2,))
+
+
+def _table_api(tmp_path, monkeypatch, fake_api, series, last_date):
+    """
+    Aponta a API para uma tabela com a previsão de AAA calculada a partir de
+    `last_date`, com cotações armazenadas até essa data.
+
+    Retorna:
+        tuple: Tabela, entrada de AAA, tickers buscados na fonte e armazenamento de cotações.
+    """
+    api = fake_api(tickers=("AAA",), series=series)
+    table = PredictionTable(str(tmp_path / "predictions.json"), max_age=3600)
+    entry = {"predicted_price": 123.0, "engine": "keras", "model_version": list(api.registry.version("AAA")),
+             "last_date": last_date, "scored_at": pd.Timestamp.now(tz="UTC").isoformat()}
+    table.update({"AAA": entry})
+
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    history = _history()
+    history[history["Date"] <= last_date].to_csv(source_dir / "AAA.csv", index=False)
+    store = MarketDataStore(str(tmp_path / "data"), FileSource(str(source_dir)))
+    store.refresh("AAA", "2010-01-01", str((pd.Timestamp(last_date) + pd.Timedelta(days=1)).date()))
+
+    monkeypatch.setattr(market_data, "_default_store", store)
+    monkeypatch.setattr(main, "prediction_table", table)
+    return table, entry, api.fetches, store
+
+
+def test_predict_serves_fresh_table_entry_and_falls_back_to_live(tmp_path, monkeypatch, fake_api, latest_series):
+    table, entry, fetches, _ = _table_api(tmp_path, monkeypatch, fake_api, latest_series, "2023-11-15")
+
+    with TestClient(main.app) as client:
+        served = client.get("/predict", params={"ticker": "aaa"})
+        not_modified = client.get("/predict", params={"ticker": "AAA"}, headers={"If-None-Match": served.headers["ETag"]})
+        table.update({"AAA": dict(entry, scored_at="2020-01-01T00:00:00+00:00")})
+        live = client.get("/predict", params={"ticker": "AAA"})
+
+    assert served.json() == {"ticker": "AAA", "predicted_price": 123.0, "source": "table",
+                             "data_date": "2023-11-15", "scored_at": entry["scored_at"]}
+    assert not_modified.status_code == 304
+    # Apenas a previsão antiga demais é calculada na hora, com a busca de dados
+    assert live.json()["source"] == "live" and live.json()["data_date"] == "2023-12-29"
+    assert fetches == ["AAA"]
+
+
+def test_predict_ignores_table_entry_once_a_newer_bar_is_stored(tmp_path, monkeypatch, fake_api, latest_series):
+    table, entry, fetches, store = _table_api(tmp_path, monkeypatch, fake_api, latest_series, "2023-11-14")
+
+    with TestClient(main.app) as client:
+        served = client.get("/predict", params={"ticker": "AAA"})
+        # Um novo pregão chega ao armazenamento local (ex.: por outra requisição)
+        _history().to_csv(tmp_path / "source" / "AAA.csv", index=False)
+        store.refresh("AAA", "2010-01-01", "2024-01-01")
+        live = client.get("/predict", params={"ticker": "AAA"}, headers={"If-None-Match": served.headers["ETag"]})
+
+    assert served.json()["source"] == "table" and store.last_date("AAA") == "2023-11-15"
+    assert live.status_code == 200 and live.json()["source"] == "live"
+    assert fetches == ["AAA"]
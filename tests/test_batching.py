@@ -0,0 +1,65 @@
+# tests/test_batching.py
+
+import asyncio
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from utils.batching import MicroBatcher
+
+
+class FakeModel:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, X):
+        self.batch_sizes.append(len(X))
+        # Cada previsão é a soma da janela, para identificar a amostra de origem
+        return X.reshape(len(X), -1).sum(axis=1, keepdims=True)
+
+
+def _inputs(count):
+    return [np.full((1, 60, 5), i, dtype=float) for i in range(count)]
+
+
+def test_concurrent_requests_share_one_batch():
+    model = FakeModel()
+    batcher = MicroBatcher(model.predict, max_batch_size=64, window_ms=20)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(x) for x in _inputs(10)))
+
+    results = asyncio.run(scenario())
+
+    assert model.batch_sizes == [10]
+    for i, result in enumerate(results):
+        assert result.shape == (1, 1)
+        assert result[0, 0] == i * 300
+
+
+def test_batch_is_flushed_at_max_size():
+    model = FakeModel()
+    batcher = MicroBatcher(model.predict, max_batch_size=4, window_ms=1000)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(x) for x in _inputs(8)))
+
+    asyncio.run(scenario())
+
+    assert model.batch_sizes == [4, 4]
+
+
+def test_errors_reach_every_caller():
+    def failing_predict(X):
+        raise RuntimeError("falha na inferência")
+
+    batcher = MicroBatcher(failing_predict, max_batch_size=8, window_ms=5)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(x) for x in _inputs(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,85 @@
+# tests/test_feature_store.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from utils.data_preprocessing import FEATURE_COLUMNS, prepare_prediction_input, prepare_test_data, split_test_windows
+from utils.feature_store import FeatureStore
+from utils.market_data import FileSource, MarketDataStore
+
+
+def _write_csv(directory, days, gaps=()):
+    dates = pd.bdate_range("2020-01-01", periods=days)
+    close = 100 + 10 * np.sin(np.arange(days) / 10)
+    df = pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Open": close - 1,
+        "High": close + 2,
+        "Low": close - 2,
+        "Close": close,
+        "Volume": np.linspace(1e6, 2e6, days),
+    })
+    df.loc[list(gaps), "Volume"] = np.nan
+    df.to_csv(os.path.join(directory, "AAA.csv"), index=False)
+    return dates
+
+
+def _end(dates):
+    """Data final (exclusiva) que inclui o último pregão."""
+    return str((dates[-1] + pd.Timedelta(days=1)).date())
+
+
+def test_feature_store_appends_new_bars_and_matches_dataframe_path(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    market = MarketDataStore(str(tmp_path / "data"), FileSource(str(source_dir)))
+    store = FeatureStore(market)
+    scaler = MinMaxScaler().fit(np.random.default_rng(0).random((10, 5)) * 200)
+
+    end = _end(_write_csv(source_dir, 200, gaps=(50,)))
+    market.refresh("AAA", "2010-01-01", end)
+    first = store.get("AAA", scaler, "2010-01-01", end)
+    manifest_path = os.path.join(store.directory, "AAA.json")
+    data_file = store._open("AAA")[0]["file"]
+
+    # A linha com valor ausente é descartada, como em `_numeric_features`
+    df = market.get("AAA", "2010-01-01", end)
+    assert len(first) == 199 and first.last_date == str(df["Date"].iloc[-1].date())
+    np.testing.assert_array_equal(first.window(), prepare_prediction_input(df, scaler).astype(np.float32))
+    X_test, y_test = split_test_windows(first.values)
+    expected_X, expected_y = prepare_test_data(df, scaler)
+    np.testing.assert_allclose(X_test, expected_X, atol=1e-6)
+    np.testing.assert_allclose(y_test, expected_y, atol=1e-6)
+
+    # Novos pregões são acrescentados à mesma geração, sem alterar as linhas anteriores
+    dates = _write_csv(source_dir, 230, gaps=(50,))
+    end = _end(dates)
+    market.refresh("AAA", "2010-01-01", end)
+    updated = store.get("AAA", scaler, "2010-01-01", end)
+    assert len(updated) == 229 and updated.last_date == str(dates[-1].date())
+    assert store._open("AAA")[0]["file"] == data_file
+    np.testing.assert_array_equal(updated.values[:199], first.values)
+    assert first.values.shape == (199, len(FEATURE_COLUMNS))
+    df = market.get("AAA", "2010-01-01", end)
+    np.testing.assert_array_equal(updated.window(), prepare_prediction_input(df, scaler).astype(np.float32))
+
+    # Sem novos pregões, o manifesto não é regravado
+    mtime = os.stat(manifest_path).st_mtime_ns
+    assert store.get("AAA", scaler, "2010-01-01", end).last_date == updated.last_date
+    assert os.stat(manifest_path).st_mtime_ns == mtime
+
+    # Um novo scaler (retreinamento) reconstrói as features em uma nova geração
+    retrained = MinMaxScaler().fit(np.random.default_rng(1).random((10, 5)) * 300)
+    rebuilt = store.get("AAA", retrained, "2010-01-01", end)
+    assert store._open("AAA")[0]["file"] != data_file
+    np.testing.assert_array_equal(rebuilt.window(), prepare_prediction_input(df, retrained).astype(np.float32))
+
+    # Um novo processo lê os arquivos já gravados
+    reopened = FeatureStore(market).get("AAA", retrained, "2010-01-01", end)
+    np.testing.assert_array_equal(reopened.values, rebuilt.values)
+    assert isinstance(reopened.values.base, np.memmap)
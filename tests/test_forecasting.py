@@ -0,0 +1,83 @@
+# tests/test_forecasting.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from sklearn.preprocessing import MinMaxScaler
+
+import api.main as main
+from utils import data_preprocessing, market_data
+from utils.data_preprocessing import prepare_prediction_input
+from utils.forecasting import forecast_prices, next_input_factory, windowed_forecast
+from utils.market_data import FileSource, MarketDataStore
+from utils.numpy_engine import export_weights, load_numpy_model
+
+
+def _history(days=120):
+    dates = pd.bdate_range("2023-06-01", periods=days)
+    close = 100 + 10 * np.sin(np.arange(days) / 7)
+    return pd.DataFrame({
+        "Date": dates,
+        "Close": close,
+        "High": close + 2,
+        "Low": close - 2,
+        "Open": close - 1,
+        "Volume": np.linspace(1e6, 2e6, days),
+    })
+
+
+def test_numpy_forecast_matches_keras(tmp_path, random_model):
+    model = random_model()
+    path = str(tmp_path / "AAA_weights.json")
+    export_weights(model, path)
+    engine = load_numpy_model(path)
+
+    df = _history()
+    scaler = MinMaxScaler().fit(df[["Close", "High", "Low", "Open", "Volume"]].values)
+    window = prepare_prediction_input(df, scaler)[0]
+    next_input = next_input_factory(scaler, window[-1])
+
+    forecast = windowed_forecast(engine, window, 10, next_input)
+
+    # O primeiro dia é a previsão de /predict
+    np.testing.assert_allclose(forecast[0], engine.predict(window[None])[0], atol=1e-6)
+    np.testing.assert_allclose(forecast, windowed_forecast(model, window, 10, next_input), atol=1e-4)
+    # O dia seguinte usa a janela deslizada com o fechamento previsto
+    shifted = np.concatenate([window[1:], next_input(forecast[0])[None]])
+    np.testing.assert_allclose(forecast[1], engine.predict(shifted[None])[0], atol=1e-6)
+
+    prices = forecast_prices(engine, scaler, window[None], 10)
+    assert prices.shape == (10,)
+    np.testing.assert_allclose(prices, forecast_prices(model, scaler, window[None], 10), rtol=1e-4)
+
+
+def test_forecast_endpoint(tmp_path, monkeypatch, random_model, fake_api):
+    model = random_model(seed=1)
+    df = _history()
+    scaler = MinMaxScaler().fit(df[["Close", "High", "Low", "Open", "Volume"]].values)
+    fake_api(tickers=("AAA",), model=model, scaler=scaler, refresh=True)
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    df.to_csv(source_dir / "AAA.csv", index=False)
+
+    monkeypatch.setattr(market_data, "_default_store", MarketDataStore(str(tmp_path / "data"), FileSource(str(source_dir))))
+    monkeypatch.setattr(data_preprocessing, "MARKET_DATA_END", "2023-11-16")
+
+    with TestClient(main.app) as client:
+        response = client.get("/forecast", params={"ticker": "aaa", "days": 3, "engine": "keras"})
+        too_far = client.get("/forecast", params={"ticker": "AAA", "days": main.FORECAST_MAX_DAYS + 1})
+        missing = client.get("/forecast", params={"ticker": "ZZZ", "engine": "keras"})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["ticker"] == "AAA" and body["last_date"] == str(df["Date"].iloc[-1].date())
+    # Próximos dias úteis depois do último pregão
+    assert [item["date"] for item in body["forecast"]] == ["2023-11-16", "2023-11-17", "2023-11-20"]
+    expected = forecast_prices(model, scaler, prepare_prediction_input(df, scaler), 3)
+    np.testing.assert_allclose([item["predicted_price"] for item in body["forecast"]], expected, rtol=1e-5)
+    assert too_far.status_code == 400
+    assert missing.status_code == 404
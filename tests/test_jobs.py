@@ -0,0 +1,149 @@
+# tests/test_jobs.py
+
+import os
+import sys
+import threading
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.jobs import JobStore, TrainingWorkerPool, QUEUED, RUNNING, DONE, FAILED
+
+
+def test_enqueue_deduplicates_by_ticker(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+
+    first, created_first = store.enqueue("AAPL", epochs_total=10)
+    second, created_second = store.enqueue("AAPL")
+    other, created_other = store.enqueue("MSFT")
+
+    assert created_first and not created_second and created_other
+    assert first["id"] == second["id"]
+    assert first["status"] == QUEUED
+    assert first["epochs_total"] == 10
+
+
+def test_concurrent_enqueue_creates_single_job(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    results = []
+
+    def enqueue():
+        results.append(store.enqueue("AAPL"))
+
+    threads = [threading.Thread(target=enqueue) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(created for _, created in results) == 1
+    assert len({job["id"] for job, _ in results}) == 1
+
+
+def test_job_lifecycle(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job, _ = store.enqueue("AAPL")
+
+    claimed = store.claim_next(os.getpid())
+    assert claimed["id"] == job["id"]
+    assert claimed["status"] == RUNNING
+    assert store.claim_next(os.getpid()) is None
+
+    store.update_progress(job["id"], 3)
+    assert store.get(job["id"])["epochs_completed"] == 3
+
+    store.finish(job["id"])
+    finished = store.get(job["id"])
+    assert finished["status"] == DONE
+    assert finished["finished_at"] >= finished["started_at"]
+
+    # Após a conclusão, um novo treinamento do mesmo ticker volta a ser aceito
+    _, created = store.enqueue("AAPL")
+    assert created
+
+
+def test_failed_job_records_error(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job, _ = store.enqueue("NOPE")
+    store.claim_next(os.getpid())
+    store.finish(job["id"], error="Nenhum dado encontrado")
+
+    failed = store.get(job["id"])
+    assert failed["status"] == FAILED
+    assert failed["error"] == "Nenhum dado encontrado"
+
+
+def test_orphaned_running_jobs_are_requeued(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    store = JobStore(db_path)
+    job, _ = store.enqueue("AAPL")
+    store.claim_next(2 ** 22 + 12345)  # PID de um processo inexistente
+
+    # Simula a reinicialização: a fila é reaberta e os órfãos voltam para a fila
+    restarted = JobStore(db_path)
+    assert restarted.requeue_orphans() == 1
+    assert restarted.get(job["id"])["status"] == QUEUED
+
+
+def test_job_interrupted_too_many_times_is_marked_failed(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job, _ = store.enqueue("AAPL")
+
+    # Cada execução termina com o processo de treinamento encerrado
+    requeued = []
+    for _ in range(3):
+        store.claim_next(2 ** 22 + 12345)
+        requeued.append(store.requeue_orphans(max_attempts=3))
+
+    failed = store.get(job["id"])
+    assert requeued == [1, 1, 0]
+    assert failed["status"] == FAILED and failed["attempts"] == 3
+    assert failed["error"] == "Treinamento interrompido 3 vezes"
+    assert store.active_job("AAPL") is None
+
+
+def test_batch_report_follows_job_status(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job, _ = store.enqueue("AAPL")
+    batch_id = store.create_batch([
+        {"ticker": "AAPL", "status": "queued", "job_id": job["id"]},
+        {"ticker": "MSFT", "status": "exists", "job_id": None},
+    ])
+
+    store.claim_next(os.getpid())
+    store.finish(job["id"])
+    batch = store.get_batch(batch_id)
+
+    assert [item["status"] for item in batch["items"]] == [DONE, "exists"]
+    assert store.get_batch("inexistente") is None
+
+
+def test_only_one_api_process_starts_training_workers(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    first = TrainingWorkerPool(db_path, str(tmp_path), workers=0)
+    second = TrainingWorkerPool(db_path, str(tmp_path), workers=0)
+
+    assert first.start() is True
+    assert second.start() is False
+
+    # Quando o responsável encerra, outro processo pode assumir o treinamento
+    first.stop()
+    assert second.start() is True
+    second.stop()
+
+
+def test_job_endpoint_reports_queued_job(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api.main as main
+    from utils.security import API_KEY_NAME, API_KEY
+
+    monkeypatch.setattr(main, "TRAINING_WORKERS", 0)
+    monkeypatch.setattr(main, "job_store", JobStore(str(tmp_path / "jobs.db")))
+    job, _ = main.job_store.enqueue("AAPL", epochs_total=3)
+
+    with TestClient(main.app) as client:
+        response = client.get(f"/jobs/{job['id']}", headers={API_KEY_NAME: API_KEY})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == QUEUED
+    assert data["started_at"] is None and data["error"] is None
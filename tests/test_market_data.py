@@ -0,0 +1,165 @@
+# tests/test_market_data.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from utils import data_preprocessing, market_data
+from utils.data_preprocessing import refresh_stock_data
+from utils.feature_store import FeatureStore
+from utils.market_data import FileSource, MarketDataStore
+
+
+def _write_csv(directory, ticker, days=300):
+    dates = pd.bdate_range("2020-01-01", periods=days)
+    close = np.linspace(100, 200, days)
+    df = pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Open": close - 1,
+        "High": close + 2,
+        "Low": close - 2,
+        "Close": close,
+        "Volume": np.full(days, 1_000_000.0),
+    })
+    df.to_csv(os.path.join(directory, f"{ticker}.csv"), index=False)
+    return df
+
+
+class CountingSource:
+    def __init__(self, source):
+        self.source = source
+        self.calls = []
+
+    def fetch(self, ticker, start, end):
+        self.calls.append((ticker, start, end))
+        return self.source.fetch(ticker, start, end)
+
+
+def test_file_source_serves_offline(tmp_path):
+    _write_csv(tmp_path, "AAPL")
+    store = MarketDataStore(str(tmp_path / "data"), FileSource(str(tmp_path)))
+
+    df = store.get("AAPL", "2020-01-01", "2020-06-01")
+
+    assert list(df.columns) == ["Date", "Close", "High", "Low", "Open", "Volume"]
+    assert df["Date"].min() >= pd.Timestamp("2020-01-01")
+    assert df["Date"].max() < pd.Timestamp("2020-06-01")
+    assert os.path.exists(tmp_path / "data" / "market" / "AAPL.npy")
+
+
+def test_only_missing_ranges_are_fetched(tmp_path):
+    _write_csv(tmp_path, "AAPL")
+    source = CountingSource(FileSource(str(tmp_path)))
+    store = MarketDataStore(str(tmp_path / "data"), source)
+
+    store.get("AAPL", "2020-03-01", "2020-06-01")
+    store.get("AAPL", "2020-03-01", "2020-06-01")  # servido do disco
+    df = store.get("AAPL", "2020-01-01", "2020-09-01")
+
+    assert source.calls == [
+        ("AAPL", "2020-03-01", "2020-06-01"),
+        ("AAPL", "2020-01-01", "2020-03-01"),
+        ("AAPL", "2020-06-01", "2020-09-01"),
+    ]
+    assert df["Date"].is_monotonic_increasing
+    assert not df["Date"].duplicated().any()
+
+
+def test_stored_data_survives_source_failure(tmp_path):
+    _write_csv(tmp_path, "AAPL")
+    store = MarketDataStore(str(tmp_path / "data"), FileSource(str(tmp_path)))
+    expected = store.get("AAPL", "2020-01-01", "2020-06-01")
+
+    class BrokenSource:
+        def fetch(self, ticker, start, end):
+            raise ConnectionError("sem rede")
+
+    offline_store = MarketDataStore(str(tmp_path / "data"), BrokenSource())
+    df = offline_store.get("AAPL", "2020-01-01", "2020-12-01")
+
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_unknown_ticker_returns_none(tmp_path):
+    store = MarketDataStore(str(tmp_path / "data"), FileSource(str(tmp_path)))
+    assert store.get("NOPE", "2020-01-01", "2020-06-01") is None
+
+
+def test_refresh_many_groups_tickers_by_missing_range(tmp_path):
+    for ticker in ("AAPL", "MSFT", "GOOG"):
+        _write_csv(tmp_path, ticker)
+
+    class GroupingSource(FileSource):
+        def __init__(self, directory):
+            super().__init__(directory)
+            self.groups = []
+
+        def fetch_many(self, tickers, start, end):
+            self.groups.append((tuple(tickers), start, end))
+            return {ticker: self.fetch(ticker, start, end) for ticker in tickers}
+
+    source = GroupingSource(str(tmp_path))
+    store = MarketDataStore(str(tmp_path / "data"), source)
+    frames = store.get_many(["AAPL", "MSFT", "GOOG"], "2020-01-01", "2020-06-01")
+
+    assert source.groups == [(("AAPL", "GOOG", "MSFT"), "2020-01-01", "2020-06-01")]
+    assert all(df is not None and len(df) > 0 for df in frames.values())
+
+
+def test_partial_session_bar_is_refetched_until_the_session_is_settled(tmp_path, monkeypatch):
+    _write_csv(tmp_path, "AAPL", days=120)
+    source = CountingSource(FileSource(str(tmp_path)))
+    store = MarketDataStore(str(tmp_path / "data"), source)
+    features = FeatureStore(store)
+    scaler = MinMaxScaler().fit(np.random.default_rng(0).random((10, 5)) * 300)
+    today = {"value": date(2020, 5, 19)}
+
+    class FakeDate(date):
+        @classmethod
+        def today(cls):
+            return today["value"]
+
+    monkeypatch.setattr(market_data, "_default_store", store)
+    monkeypatch.setattr(data_preprocessing, "MARKET_DATA_END", "today")
+    monkeypatch.setattr(data_preprocessing, "date", FakeDate)
+
+    def close_on(day):
+        array = store.read_array("AAPL")
+        return float(array["Close"][array["Date"] == np.datetime64(day)][0])
+
+    def feature_close(day):
+        series = features.get("AAPL", scaler, "2020-01-01", data_preprocessing.data_end_date())
+        row = series.values[list(series.dates).index(np.datetime64(day))]
+        return float(scaler.inverse_transform(row[None].astype(np.float64))[0, 0])
+
+    # Durante o pregão de 19/05 a fonte devolve uma barra parcial
+    df = pd.read_csv(tmp_path / "AAPL.csv")
+    final_close = df.loc[df["Date"] == "2020-05-19", "Close"].iloc[0]
+    partial = df[df["Date"] <= "2020-05-19"].copy()
+    partial.loc[partial["Date"] == "2020-05-19", "Close"] = final_close - 5
+    partial.to_csv(tmp_path / "AAPL.csv", index=False)
+    refresh_stock_data("AAPL")
+    assert close_on("2020-05-19") == final_close - 5
+    assert abs(feature_close("2020-05-19") - (final_close - 5)) < 1e-3
+
+    # Uma nova atualização no mesmo dia busca de novo o pregão em andamento
+    partial.loc[partial["Date"] == "2020-05-19", "Close"] = final_close - 2
+    partial.to_csv(tmp_path / "AAPL.csv", index=False)
+    refresh_stock_data("AAPL")
+    assert source.calls[-1] == ("AAPL", "2020-05-19", "2020-05-20")
+    assert close_on("2020-05-19") == final_close - 2
+
+    # No dia seguinte, o pregão de 19/05 é buscado de novo e a barra definitiva substitui a parcial
+    df[df["Date"] <= "2020-05-20"].to_csv(tmp_path / "AAPL.csv", index=False)
+    today["value"] = date(2020, 5, 20)
+    refresh_stock_data("AAPL")
+    assert source.calls[-1] == ("AAPL", "2020-05-19", "2020-05-21")
+    assert close_on("2020-05-19") == final_close
+    assert abs(feature_close("2020-05-19") - final_close) < 1e-3
+    assert store.last_date("AAPL") == "2020-05-20"
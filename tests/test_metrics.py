@@ -0,0 +1,55 @@
+# tests/test_metrics.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import api.main as main
+from utils import metrics
+
+
+def _stage_count(pipeline, stage, ticker):
+    labels = {"pipeline": pipeline, "stage": stage, "ticker": ticker}
+    return REGISTRY.get_sample_value("pipeline_stage_seconds_count", labels) or 0.0
+
+
+def test_ticker_labels_are_bounded(monkeypatch):
+    monkeypatch.setattr(metrics, "MAX_TICKER_LABELS", 2)
+    monkeypatch.setattr(metrics, "_tickers", set())
+
+    assert metrics.ticker_label("AAA") == "AAA"
+    assert metrics.ticker_label("BBB", register=False) == metrics.OTHER_TICKER
+    assert metrics.ticker_label("BBB") == "BBB"
+    assert metrics.ticker_label("CCC") == metrics.OTHER_TICKER
+    assert metrics.ticker_label("AAA") == "AAA"
+
+
+def test_failed_stage_is_counted_and_propagated():
+    labels = {"pipeline": "test", "stage": "boom", "ticker": metrics.OTHER_TICKER}
+    before = REGISTRY.get_sample_value("pipeline_stage_errors_total", labels) or 0.0
+
+    with pytest.raises(ValueError):
+        with metrics.track_stage("test", "boom", "NEVER_SEEN_TICKER"):
+            raise ValueError("falha")
+
+    assert REGISTRY.get_sample_value("pipeline_stage_errors_total", labels) == before + 1
+    assert "NEVER_SEEN_TICKER" not in metrics._tickers
+
+
+def test_predict_records_each_stage(fake_api, latest_series):
+    fake_api(series=latest_series)
+
+    stages = ("model_load", "data_fetch", "preprocess", "inference", "inverse_scale")
+    before = {stage: _stage_count("predict", stage, "AAPL") for stage in stages}
+
+    with TestClient(main.app) as client:
+        assert client.get("/predict", params={"ticker": "AAPL"}).status_code == 200
+        exposed = client.get("/metrics").text
+
+    for stage in stages:
+        assert _stage_count("predict", stage, "AAPL") == before[stage] + 1
+    assert 'pipeline_stage_seconds_bucket{le="0.001",pipeline="predict",stage="inference",ticker="AAPL"}' in exposed
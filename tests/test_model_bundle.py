@@ -0,0 +1,88 @@
+# tests/test_model_bundle.py
+
+import os
+import sys
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from utils.model_bundle import (latest_bundle, list_versions, load_bundle, rollback_bundle, scaler_from_state,
+                                scaler_state, write_bundle)
+from utils.model_registry import ModelRegistry
+from utils.model_utils import has_trained_model, list_trained_tickers, load_metadata
+
+
+def _scaler(seed=0):
+    return MinMaxScaler().fit(np.random.default_rng(seed).random((100, 5)) * 100)
+
+
+def test_bundle_round_trip_keeps_model_and_scaler(tmp_path, random_model):
+    model, scaler = random_model(), _scaler()
+    version = write_bundle(str(tmp_path), "AAPL", model, scaler, {"metrics": {"MAPE": 1.5}})
+    X = np.random.default_rng(1).random((4, 60, 5)).astype(np.float32)
+    expected = model.predict(X, verbose=0)
+
+    _, path = latest_bundle(str(tmp_path), "AAPL")
+    keras_model, keras_scaler, header = load_bundle(path, engine="keras")
+    numpy_model, numpy_scaler, _ = load_bundle(path, engine="numpy")
+
+    assert version == 1 and header["metadata"]["metrics"]["MAPE"] == 1.5
+    np.testing.assert_allclose(keras_model.predict(X, verbose=0), expected, atol=1e-6)
+    np.testing.assert_allclose(numpy_model.predict(X), expected, atol=1e-5)
+    for restored in (keras_scaler, numpy_scaler):
+        np.testing.assert_array_equal(restored.transform(scaler.data_min_[None]), scaler.transform(scaler.data_min_[None]))
+        np.testing.assert_array_equal(restored.data_range_, scaler.data_range_)
+    assert has_trained_model(str(tmp_path), "AAPL") and list_trained_tickers(str(tmp_path)) == ["AAPL"]
+
+
+def test_scaler_state_keeps_feature_names():
+    df = pd.DataFrame(np.random.default_rng(0).random((50, 5)) * 100, columns=["Close", "High", "Low", "Open", "Volume"])
+    scaler = MinMaxScaler().fit(df)
+
+    restored = scaler_from_state(scaler_state(scaler))
+    # O scaler de um DataFrame transforma DataFrames sem o aviso de nomes ausentes
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        transformed = restored.transform(df)
+    np.testing.assert_array_equal(transformed, scaler.transform(df))
+    assert list(restored.feature_names_in_) == list(df.columns)
+    assert not hasattr(scaler_from_state(scaler_state(_scaler())), "feature_names_in_")
+
+
+def test_versions_increase_are_pruned_and_rolled_back(tmp_path, random_model):
+    model_dir = str(tmp_path)
+    model = random_model()
+    for seed in range(4):
+        write_bundle(model_dir, "AAPL", model, _scaler(seed), {"seed": seed}, retention=3)
+    assert list_versions(model_dir, "AAPL") == [2, 3, 4]
+
+    # O rollback publica o conteúdo da versão anterior como uma versão nova
+    assert rollback_bundle(model_dir, "AAPL") == 5
+    _, _, header = load_bundle(latest_bundle(model_dir, "AAPL")[1], engine="numpy")
+    assert header["metadata"]["seed"] == 2
+    assert load_metadata(model_dir, "AAPL")["restored_from"] == 3
+
+    # Gravações concorrentes recebem versões distintas
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        versions = list(executor.map(lambda seed: write_bundle(model_dir, "AAPL", model, _scaler(seed), retention=10),
+                                     range(4)))
+    assert sorted(versions) == [6, 7, 8, 9]
+    assert not [name for name in os.listdir(tmp_path / "bundles" / "AAPL") if name.endswith(".tmp")]
+
+
+def test_registry_serves_latest_bundle_version(tmp_path, random_model):
+    model_dir = str(tmp_path)
+    write_bundle(model_dir, "AAPL", random_model(seed=1), _scaler(1))
+    registry = ModelRegistry(model_dir, engine="numpy")
+
+    first = registry.get_versioned("AAPL")
+    assert first[2] == (1,) and registry.get_versioned("AAPL")[0] is first[0]
+
+    write_bundle(model_dir, "AAPL", random_model(seed=2), _scaler(2))
+    model, scaler, version = registry.get_versioned("AAPL")
+    assert version == (2,) and model is not first[0]
+    np.testing.assert_array_equal(scaler.data_min_, _scaler(2).data_min_)
@@ -0,0 +1,91 @@
+# tests/test_model_registry.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from utils.model_registry import ModelRegistry
+
+
+def _write_artifacts(model_dir, ticker, size=1024, mtime=None):
+    for name in (f"{ticker}_model.h5", f"{ticker}_scaler.pkl"):
+        path = os.path.join(model_dir, name)
+        with open(path, "wb") as f:
+            f.write(b"0" * size)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+
+def _make_registry(model_dir, **kwargs):
+    loads = []
+
+    def loader(model_path, scaler_path):
+        loads.append(model_path)
+        return object(), object()
+
+    return ModelRegistry(str(model_dir), loader=loader, **kwargs), loads
+
+
+def test_hit_after_first_load(tmp_path):
+    _write_artifacts(tmp_path, "AAPL")
+    registry, loads = _make_registry(tmp_path)
+
+    first = registry.get("AAPL")
+    second = registry.get("AAPL")
+
+    assert first is not None and first[0] is second[0]
+    assert len(loads) == 1
+    stats = registry.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_missing_model_raises(tmp_path):
+    registry, _ = _make_registry(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        registry.get("MSFT")
+
+
+def test_reload_when_artifact_changes(tmp_path):
+    _write_artifacts(tmp_path, "AAPL", mtime=1_000_000_000)
+    registry, loads = _make_registry(tmp_path)
+    registry.get("AAPL")
+
+    # Simula um novo treinamento gravando artefatos mais recentes
+    _write_artifacts(tmp_path, "AAPL", mtime=2_000_000_000)
+    registry.get("AAPL")
+
+    assert len(loads) == 2
+    assert registry.stats()["reloads"] == 1
+
+
+def test_lru_eviction_by_count(tmp_path):
+    for ticker in ("AAPL", "MSFT", "GOOG"):
+        _write_artifacts(tmp_path, ticker)
+    registry, loads = _make_registry(tmp_path, max_models=2)
+
+    registry.get("AAPL")
+    registry.get("MSFT")
+    registry.get("AAPL")  # AAPL passa a ser o mais recente
+    registry.get("GOOG")  # remove MSFT
+
+    assert registry.stats()["evictions"] == 1
+    registry.get("AAPL")
+    assert registry.stats()["hits"] == 2
+    registry.get("MSFT")
+    assert loads.count(os.path.join(str(tmp_path), "MSFT_model.h5")) == 2
+
+
+def test_eviction_by_memory_budget(tmp_path):
+    for ticker in ("AAPL", "MSFT"):
+        _write_artifacts(tmp_path, ticker, size=512 * 1024)  # ~1 MB por ticker
+    registry, _ = _make_registry(tmp_path, max_models=0, max_memory_mb=1.5)
+
+    registry.get("AAPL")
+    registry.get("MSFT")
+
+    stats = registry.stats()
+    assert stats["loaded_models"] == 1
+    assert stats["evictions"] == 1
@@ -0,0 +1,60 @@
+# tests/test_numpy_engine.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import joblib
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from utils.model_registry import ModelRegistry
+from utils.model_utils import model_paths, weights_path
+from utils.numpy_engine import NumpyLSTMModel, export_weights, load_numpy_model
+
+
+def test_numpy_engine_matches_keras(tmp_path, random_model):
+    model = random_model()
+    path = str(tmp_path / "AAPL_weights.json")
+    export_weights(model, path)
+
+    engine = load_numpy_model(path)
+    X = np.random.default_rng(1).random((16, 60, 5)).astype(np.float32)
+
+    expected = model.predict(X, verbose=0)
+    np.testing.assert_allclose(engine.predict(X), expected, atol=1e-5)
+    np.testing.assert_allclose(engine.predict(X[:1]), expected[:1], atol=1e-5)
+
+
+def test_numpy_registry_exports_missing_weights(tmp_path, random_model):
+    model = random_model(seed=2)
+    model_path, scaler_path = model_paths(str(tmp_path), "AAPL")
+    model.save(model_path)
+    joblib.dump(MinMaxScaler().fit(np.random.default_rng(3).random((100, 5))), scaler_path)
+
+    registry = ModelRegistry(str(tmp_path), engine="numpy")
+    engine, _ = registry.get("AAPL")
+
+    assert isinstance(engine, NumpyLSTMModel)
+    assert os.path.exists(weights_path(str(tmp_path), "AAPL"))
+    X = np.random.default_rng(4).random((4, 60, 5)).astype(np.float32)
+    np.testing.assert_allclose(engine.predict(X), model.predict(X, verbose=0), atol=1e-5)
+
+
+def test_reexport_swaps_generation_without_breaking_loaded_models(tmp_path, random_model):
+    path = str(tmp_path / "AAPL_weights.json")
+    X = np.random.default_rng(5).random((2, 60, 5)).astype(np.float32)
+
+    first = random_model(seed=6)
+    export_weights(first, path)
+    loaded = load_numpy_model(path)
+    assert isinstance(loaded.weights.base, np.memmap)
+
+    for seed in (7, 8, 9):
+        latest = random_model(seed=seed)
+        export_weights(latest, path)
+
+    # O modelo já carregado continua usando a sua geração; novas cargas usam a última
+    np.testing.assert_allclose(loaded.predict(X), first.predict(X, verbose=0), atol=1e-5)
+    np.testing.assert_allclose(load_numpy_model(path).predict(X), latest.predict(X, verbose=0), atol=1e-5)
+    assert len(list(tmp_path.glob("AAPL_weights.*.npy"))) == 2
@@ -0,0 +1,57 @@
+# tests/test_predict_batch.py
+
+import json
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+
+import api.main as main
+
+
+def test_batch_groups_data_fetch_and_reports_errors_per_ticker(fake_api, latest_series):
+    api = fake_api(tickers=("AAA", "BBB"), series=latest_series)
+
+    with TestClient(main.app) as client:
+        response = client.post("/predict/batch", json={"tickers": ["aaa", "ZZZ", "BBB", "AAA"]})
+        streamed = client.post("/predict/batch", params={"stream": "true"}, json={"tickers": ["AAA", "ZZZ"]})
+
+    predictions = response.json()["predictions"]
+    assert response.status_code == 200
+    assert [item["ticker"] for item in predictions] == ["AAA", "ZZZ", "BBB"]
+    assert [item["status_code"] for item in predictions] == [200, 404, 200]
+    assert predictions[1]["predicted_price"] is None and "ZZZ" in predictions[1]["error"]
+    assert predictions[0]["predicted_price"] == predictions[2]["predicted_price"] is not None
+    # Uma única atualização agrupada, apenas para os tickers com modelo
+    assert api.fetches[0] == ["AAA", "BBB"]
+
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert streamed.headers["content-type"].startswith("application/x-ndjson")
+    assert sorted((item["ticker"], item["status_code"]) for item in lines) == [("AAA", 200), ("ZZZ", 404)]
+
+
+def test_batch_bounds_concurrent_model_loads(monkeypatch, fake_api, latest_series):
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def slow_loader(*paths):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.1)
+        with lock:
+            active[0] -= 1
+        return api.model, api.scaler
+
+    tickers = [f"T{i}" for i in range(6)]
+    api = fake_api(tickers=tickers, loader=slow_loader, series=latest_series)
+    monkeypatch.setattr(main, "PREDICT_BATCH_CONCURRENCY", 2)
+
+    with TestClient(main.app) as client:
+        response = client.post("/predict/batch", json={"tickers": tickers})
+
+    assert [item["status_code"] for item in response.json()["predictions"]] == [200] * 6
+    assert peak[0] == 2
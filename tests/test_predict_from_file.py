@@ -0,0 +1,89 @@
+# tests/test_predict_from_file.py
+
+import io
+import json
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from sklearn.preprocessing import MinMaxScaler
+
+import api.main as main
+from utils.data_preprocessing import iter_user_window_batches, preprocess_user_data
+from utils.security import API_KEY_NAME, API_KEY
+
+COLUMNS = ['Close', 'High', 'Low', 'Open', 'Volume']
+
+
+def _user_data(rows=500):
+    rng = np.random.default_rng(7)
+    close = 100 + rng.random(rows).cumsum()
+    return pd.DataFrame({
+        "Date": pd.bdate_range("2020-01-01", periods=rows).strftime("%Y-%m-%d"),
+        "Open": close - 1,
+        "High": close + 2,
+        "Low": close - 2,
+        "Close": close,
+        "Volume": rng.integers(1_000, 10_000, rows).astype(float),
+    })
+
+
+class LastCloseModel:
+    """Modelo falso que "prevê" o último fechamento normalizado de cada janela."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, X, verbose=0):
+        self.batch_sizes.append(len(X))
+        return X[:, -1, :1]
+
+
+def test_window_batches_match_full_preprocessing():
+    df = _user_data()
+    scaler = MinMaxScaler().fit(df[COLUMNS])
+    expected = preprocess_user_data(df, scaler)
+    csv = df.to_csv(index=False).encode()
+
+    batches = list(iter_user_window_batches(io.BytesIO(csv), scaler, batch_size=32, chunksize=45))
+    assert [start for start, _ in batches] == list(range(0, len(expected), 32))
+    np.testing.assert_allclose(np.concatenate([X for _, X in batches]), expected)
+
+    batches = list(iter_user_window_batches(io.BytesIO(csv), scaler, batch_size=16, offset=100, limit=40, chunksize=45))
+    np.testing.assert_allclose(np.concatenate([X for _, X in batches]), expected[100:140])
+
+
+def test_predict_from_file_computes_only_requested_windows(monkeypatch, fake_api):
+    df = _user_data()
+    scaler = MinMaxScaler().fit(df[COLUMNS])
+    model = LastCloseModel()
+    fake_api(model=model, scaler=scaler)
+    monkeypatch.setattr(main, "PREDICT_FILE_BATCH_SIZE", 50)
+    monkeypatch.setattr(main, "PREDICT_FILE_CHUNK_ROWS", 64)
+    files = {"file": ("data.csv", df.to_csv(index=False), "text/csv")}
+    headers = {API_KEY_NAME: API_KEY}
+    # O último fechamento de cada janela k é a linha k + 59
+    expected = df["Close"].to_numpy()[59:-1]
+
+    with TestClient(main.app) as client:
+        response = client.post("/predict_from_file", params={"ticker": "AAPL"}, files=files, headers=headers)
+        assert response.status_code == 200
+        np.testing.assert_allclose(response.json()["predictions"], expected[:7])
+        assert model.batch_sizes == [7]
+
+        model.batch_sizes.clear()
+        response = client.post("/predict_from_file", params={"ticker": "AAPL", "stream": "true", "offset": 10, "limit": 120},
+                               files=files, headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["index"] for line in lines] == list(range(10, 130))
+        np.testing.assert_allclose([line["predicted_price"] for line in lines], expected[10:130])
+        assert model.batch_sizes == [50, 50, 20]
+
+        response = client.post("/predict_from_file", params={"ticker": "AAPL"},
+                               files={"file": ("data.csv", "a,b\n1,2\n", "text/csv")}, headers=headers)
+        assert response.status_code == 400
@@ -0,0 +1,66 @@
+# tests/test_prediction_cache.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+
+import api.main as main
+from utils.prediction_cache import PredictionCache
+
+
+def test_entries_expire_and_are_replaced_by_new_keys():
+    now = [0.0]
+    cache = PredictionCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    key = cache.key("AAPL", "keras", (1, 1), "2023-12-29")
+
+    cache.put(key, 150.0)
+    assert cache.get(key) == 150.0
+
+    # Um novo pregão (ou uma nova versão do modelo) substitui a previsão anterior
+    new_day = cache.key("AAPL", "keras", (1, 1), "2024-01-02")
+    assert cache.get(new_day) is None
+    assert cache.get(key) is None
+
+    cache.put(key, 150.0)
+    now[0] = 11.0
+    assert cache.get(key) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2, ttl_seconds=0)
+    keys = [cache.key(ticker, "keras", (1, 1), "2023-12-29") for ticker in ("AAA", "BBB", "CCC")]
+
+    cache.put(keys[0], 1.0)
+    cache.put(keys[1], 2.0)
+    cache.get(keys[0])
+    cache.put(keys[2], 3.0)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == 1.0 and cache.get(keys[2]) == 3.0
+    assert cache.stats()["evictions"] == 1
+
+
+def test_predict_uses_cache_and_etag(tmp_path, fake_api, latest_series):
+    api = fake_api(series=latest_series)
+
+    with TestClient(main.app) as client:
+        first = client.get("/predict", params={"ticker": "AAPL"})
+        second = client.get("/predict", params={"ticker": "AAPL"})
+        not_modified = client.get("/predict", params={"ticker": "AAPL"},
+                                  headers={"If-None-Match": first.headers["ETag"]})
+
+        # Um novo treinamento muda a versão do modelo e invalida a previsão
+        stat = os.stat(tmp_path / "AAPL_model.h5")
+        os.utime(tmp_path / "AAPL_model.h5", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        retrained = client.get("/predict", params={"ticker": "AAPL"},
+                               headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert retrained.status_code == 200 and retrained.headers["ETag"] != first.headers["ETag"]
+    assert api.model.batch_sizes == [1, 1]
@@ -0,0 +1,131 @@
+# tests/test_retraining.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from utils import data_preprocessing, market_data, training
+from utils.evaluation import evaluate_model
+from utils.jobs import JobStore, StaleModelScheduler, RETRAIN, run_job
+from utils.market_data import FileSource, MarketDataStore
+from utils.model_utils import load_metadata
+
+
+def _write_csv(directory, ticker, days, scale=1.0):
+    dates = pd.bdate_range("2020-01-01", periods=days)
+    close = (100 + 10 * np.sin(np.arange(days) / 10)) * np.where(np.arange(days) >= 280, scale, 1.0)
+    pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Open": close - 1,
+        "High": close + 2,
+        "Low": close - 2,
+        "Close": close,
+        "Volume": np.full(days, 1_000_000.0),
+    }).to_csv(os.path.join(directory, f"{ticker}.csv"), index=False)
+    return dates
+
+
+def _setup(tmp_path, monkeypatch, scale=1.0):
+    """Treina um modelo com 280 pregões e disponibiliza mais 20 na fonte."""
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    dates = _write_csv(source_dir, "AAA", 280)
+    monkeypatch.setattr(market_data, "_default_store", MarketDataStore(str(tmp_path / "data"), FileSource(str(source_dir))))
+    monkeypatch.setattr(data_preprocessing, "MARKET_DATA_END", str((dates[-1] + pd.Timedelta(days=1)).date()))
+
+    model_dir = str(tmp_path / "models")
+    training.train_and_save_model("AAA", model_dir, epochs=1)
+
+    dates = _write_csv(source_dir, "AAA", 300, scale=scale)
+    monkeypatch.setattr(data_preprocessing, "MARKET_DATA_END", str((dates[-1] + pd.Timedelta(days=1)).date()))
+    return model_dir, dates
+
+
+def test_incremental_retrain_uses_only_new_bars(tmp_path, monkeypatch):
+    model_dir, dates = _setup(tmp_path, monkeypatch)
+    trained = load_metadata(model_dir, "AAA")
+
+    assert training.find_stale_models(model_dir) == ["AAA"]
+
+    result = training.retrain_incremental("AAA", model_dir, epochs=1)
+    metadata = load_metadata(model_dir, "AAA")
+
+    assert result["mode"] == "incremental"
+    assert result["new_bars"] == 20 and result["samples"] == 20
+    assert metadata["data_end"] == str(dates[-1].date())
+    assert metadata["incremental_updates"] == 1
+    assert metadata["last_update"]["samples"] == 20
+    # As métricas são recalculadas com o modelo ajustado; a quantidade de janelas do treinamento completo é preservada
+    model, scaler = training.load_saved_model(model_dir, "AAA")
+    expected = evaluate_model(model, scaler, data_preprocessing.get_stock_data("AAA"))
+    assert metadata["metrics"] == expected and metadata["metrics"] != trained["metrics"]
+    assert metadata["metrics_computed_at"] > trained["metrics_computed_at"]
+    assert metadata["training_samples"] == trained["training_samples"]
+
+    # Sem novos pregões, não há o que atualizar
+    assert training.find_stale_models(model_dir) == []
+    assert training.retrain_incremental("AAA", model_dir)["mode"] == "up_to_date"
+
+
+def test_drift_falls_back_to_full_training(tmp_path, monkeypatch):
+    model_dir, _ = _setup(tmp_path, monkeypatch, scale=2.0)
+    full_trainings = []
+    monkeypatch.setattr(training, "train_and_save_model",
+                        lambda ticker, model_dir, epochs=None, callbacks=None, time_budget=None:
+                        full_trainings.append((ticker, time_budget)))
+
+    result = training.retrain_incremental("AAA", model_dir, time_budget=30.0)
+
+    assert result["mode"] == "full"
+    assert result["drift"]["drift"] and "Close" in result["drift"]["columns"]
+    assert full_trainings == [("AAA", 30.0)]
+
+
+def test_retrain_job_reports_full_training_epochs_after_drift(tmp_path, monkeypatch):
+    model_dir, _ = _setup(tmp_path, monkeypatch, scale=2.0)
+
+    def fake_full_training(ticker, model_dir, epochs=None, callbacks=None, time_budget=None):
+        for epoch in range(epochs):
+            for callback in callbacks:
+                callback.on_epoch_end(epoch)
+
+    monkeypatch.setattr(training, "train_and_save_model", fake_full_training)
+    store = JobStore(str(tmp_path / "jobs.db"))
+    queued, _ = store.enqueue("AAA", kind=RETRAIN, epochs_total=training.INCREMENTAL_EPOCHS)
+
+    run_job(store, store.claim_next(os.getpid()), model_dir)
+
+    # O total passa a ser o do treinamento completo, e o progresso nunca o ultrapassa
+    job = store.get(queued["id"])
+    assert job["epochs_total"] == training.DEFAULT_EPOCHS
+    assert job["epochs_completed"] == training.DEFAULT_EPOCHS
+
+
+def test_scheduler_enqueues_retrain_jobs_for_stale_models(tmp_path, monkeypatch):
+    monkeypatch.setattr(training, "find_stale_models", lambda model_dir: ["AAA", "BBB"])
+    scheduler = StaleModelScheduler(str(tmp_path / "jobs.db"), str(tmp_path / "models"))
+
+    assert scheduler.run_once() == ["AAA", "BBB"]
+    # Os jobs ainda ativos não são duplicados na verificação seguinte
+    assert scheduler.run_once() == []
+
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job = store.active_job("AAA")
+    assert job["kind"] == RETRAIN and job["epochs_total"] == training.INCREMENTAL_EPOCHS
+
+
+def test_train_many_passes_epochs_and_time_budget_to_incremental_updates(monkeypatch):
+    calls = []
+    monkeypatch.setattr(training, "retrain_incremental", lambda ticker, model_dir, epochs, time_budget:
+                        calls.append((ticker, epochs, time_budget)) or {"mode": "incremental"})
+    monkeypatch.setattr(training, "train_and_save_model", lambda ticker, model_dir, epochs, time_budget:
+                        calls.append((ticker, epochs, time_budget)))
+
+    assert training._train_one("AAA", "models", 5, incremental=True, time_budget=60.0)["status"] == "incremental"
+    assert training._train_one("BBB", "models", None, incremental=True)["status"] == "incremental"
+    assert training._train_one("CCC", "models", None, time_budget=None)["status"] == "done"
+    assert calls == [("AAA", 5, 60.0), ("BBB", training.INCREMENTAL_EPOCHS, training.TRAINING_TIME_BUDGET),
+                     ("CCC", training.DEFAULT_EPOCHS, None)]
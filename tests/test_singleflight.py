@@ -0,0 +1,110 @@
+# tests/test_singleflight.py
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import pytest
+
+import api.main as main
+from utils import data_preprocessing
+from utils.executor import run_blocking
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution_per_key():
+    calls = Counter()
+    lock = threading.Lock()
+
+    def fetch(key):
+        with lock:
+            calls[key] += 1
+        time.sleep(0.1)
+        return f"dados de {key}"
+
+    async def scenario():
+        flight = SingleFlight()
+        keys = ["AAA", "BBB"] * 50
+        results = await asyncio.gather(*(flight.do(key, run_blocking, fetch, key) for key in keys))
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+
+    assert calls == {"AAA": 1, "BBB": 1}
+    assert [result for result, _ in results] == [f"dados de {key}" for key in ["AAA", "BBB"] * 50]
+    assert sum(shared for _, shared in results) == 98
+    assert flight.executions == 2 and flight.in_flight() == 0
+
+
+def test_errors_reach_every_waiter_and_key_is_released():
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.05)
+        raise FileNotFoundError("sem modelo")
+
+    async def scenario():
+        flight = SingleFlight()
+        outcomes = await asyncio.gather(*(flight.run("AAA", failing) for _ in range(10)), return_exceptions=True)
+        # Depois da falha, a chave é liberada e uma nova chamada executa a operação de novo
+        with pytest.raises(FileNotFoundError):
+            await flight.run("AAA", failing)
+        return outcomes
+
+    outcomes = asyncio.run(scenario())
+
+    assert all(isinstance(outcome, FileNotFoundError) for outcome in outcomes)
+    assert len(attempts) == 2
+
+
+def test_timeout_does_not_cancel_the_shared_operation():
+    attempts = []
+
+    async def slow():
+        attempts.append(1)
+        await asyncio.sleep(0.2)
+        return 42
+
+    async def scenario():
+        flight = SingleFlight(timeout=0.05)
+        with pytest.raises(TimeoutError):
+            await flight.run("AAA", slow)
+        # O chamador seguinte aproveita a operação que continuou em andamento
+        flight.timeout = None
+        return await flight.do("AAA", slow)
+
+    assert asyncio.run(scenario()) == (42, True)
+    assert len(attempts) == 1
+
+
+def test_concurrent_predicts_for_cold_ticker_fetch_and_load_once(monkeypatch, fake_api, latest_series):
+    loads, fetches = [], []
+
+    def slow_loader(*paths):
+        loads.append(paths)
+        time.sleep(0.2)
+        return api.model, api.scaler
+
+    def slow_refresh(ticker):
+        fetches.append(ticker)
+        time.sleep(0.2)
+
+    api = fake_api(loader=slow_loader, series=latest_series)
+    monkeypatch.setattr(data_preprocessing, "refresh_stock_data", slow_refresh)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get("/predict", params={"ticker": "AAPL"}) for _ in range(50)))
+
+    responses = asyncio.run(scenario())
+
+    assert [response.status_code for response in responses] == [200] * 50
+    assert len(loads) == 1
+    assert fetches == ["AAPL"]
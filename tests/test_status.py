@@ -0,0 +1,52 @@
+# tests/test_status.py
+
+import os
+import sys
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+import numpy as np
+
+import api.main as main
+from utils.feature_store import FeatureSeries
+from utils.model_utils import save_metadata, load_metadata
+from utils.security import API_KEY_NAME, API_KEY
+
+
+def test_status_reads_metrics_from_metadata(tmp_path, fake_api):
+    loads = []
+    fake_api(loader=lambda *paths: loads.append(paths) or (object(), object()))
+    save_metadata(str(tmp_path), "AAPL", {"ticker": "AAPL", "epochs": 10, "metrics": {"MAE": 1.5, "RMSE": 2.5}})
+
+    with TestClient(main.app) as client:
+        start = time.perf_counter()
+        response = client.get("/status", headers={API_KEY_NAME: API_KEY}, params={"ticker": "aapl"})
+        elapsed = time.perf_counter() - start
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["performance_metrics"] == {"MAE": 1.5, "RMSE": 2.5}
+    assert data["model_metadata"]["epochs"] == 10
+    assert "cpu_usage_percent" in data["system_usage"]
+    assert not loads  # o modelo não é carregado para responder ao /status
+    assert elapsed < 1.0
+
+
+def test_status_recompute_updates_metadata(tmp_path, monkeypatch, fake_api):
+    fake_api(loader=lambda *paths: (object(), object()),
+             series=FeatureSeries(np.zeros((1, 5)), np.array(["2023-12-29"], dtype="datetime64[D]")))
+    monkeypatch.setattr(main, "evaluate_series", lambda model, scaler, values: {"MAE": 0.5, "RMSE": 0.7})
+
+    with TestClient(main.app) as client:
+        response = client.get("/status", headers={API_KEY_NAME: API_KEY},
+                              params={"ticker": "AAPL", "recompute": "true"})
+        assert response.json()["recompute_scheduled"] is True
+        for _ in range(50):
+            metadata = load_metadata(str(tmp_path), "AAPL")
+            if metadata and metadata.get("metrics"):
+                break
+            time.sleep(0.05)
+        response = client.get("/status", headers={API_KEY_NAME: API_KEY}, params={"ticker": "AAPL"})
+
+    assert response.json()["performance_metrics"] == {"MAE": 0.5, "RMSE": 0.7}
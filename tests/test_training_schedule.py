@@ -0,0 +1,56 @@
+# tests/test_training_schedule.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from tensorflow.keras.callbacks import Callback
+
+from utils import training
+from utils.model_utils import checkpoint_dir, load_metadata
+
+
+def _stock_data(days=240):
+    close = 100 + 10 * np.sin(np.arange(days) / 10)
+    return pd.DataFrame({
+        "Date": pd.bdate_range("2020-01-01", periods=days),
+        "Close": close,
+        "High": close + 2,
+        "Low": close - 2,
+        "Open": close - 1,
+        "Volume": np.full(days, 1_000_000.0),
+    })
+
+
+class Interrupt(Callback):
+    def on_epoch_begin(self, epoch, logs=None):
+        if epoch == 2:
+            raise RuntimeError("processo interrompido")
+
+
+def test_interrupted_training_resumes_from_last_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(training, "get_stock_data", lambda ticker: _stock_data())
+    model_dir = str(tmp_path)
+
+    with pytest.raises(RuntimeError):
+        training.train_and_save_model("AAA", model_dir, epochs=4, patience=10, callbacks=[Interrupt()])
+    assert os.path.isdir(checkpoint_dir(model_dir, "AAA"))
+
+    training.train_and_save_model("AAA", model_dir, epochs=4, patience=10)
+    schedule = load_metadata(model_dir, "AAA")["schedule"]
+
+    assert schedule["resumed_from_epoch"] == 2 and schedule["epochs_run"] == 2
+    assert schedule["stopped_by"] == "max_epochs" and schedule["best_val_loss"] is not None
+    assert not os.path.exists(checkpoint_dir(model_dir, "AAA"))
+
+
+def test_time_budget_stops_before_max_epochs(tmp_path, monkeypatch):
+    monkeypatch.setattr(training, "get_stock_data", lambda ticker: _stock_data())
+
+    training.train_and_save_model("AAA", str(tmp_path), epochs=50, time_budget=0.001)
+    schedule = load_metadata(str(tmp_path), "AAA")["schedule"]
+
+    assert schedule["stopped_by"] == "time_budget" and schedule["epochs_run"] == 1
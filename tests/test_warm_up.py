@@ -0,0 +1,20 @@
+# tests/test_warm_up.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+
+import api.main as main
+
+
+def test_warm_up_loads_configured_models_at_startup(monkeypatch, fake_api):
+    api = fake_api()
+    monkeypatch.setattr(main, "WARMUP_TICKERS", ["AAPL", "MISSING"])
+
+    with TestClient(main.app):
+        stats = main.model_registry.stats()
+
+    assert stats["loaded_models"] == 1 and stats["misses"] == 1
+    assert api.model.batch_sizes == [1]
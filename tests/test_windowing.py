@@ -0,0 +1,117 @@
+# tests/test_windowing.py
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from utils.windowing import sliding_windows, supervised_windows, training_dataset, split_validation
+from utils.data_preprocessing import preprocess_data, prepare_test_data, preprocess_user_data
+
+
+def _loop_windows(data, sequence_length=60):
+    X, y = [], []
+    for i in range(sequence_length, len(data)):
+        X.append(data[i - sequence_length:i])
+        y.append(data[i, 0])
+    return np.array(X), np.array(y)
+
+
+def _sample_frame(rows=200):
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(rows).cumsum()
+    return pd.DataFrame({
+        "Close": close,
+        "High": close + 1,
+        "Low": close - 1,
+        "Open": close + rng.standard_normal(rows) * 0.1,
+        "Volume": rng.integers(1_000, 10_000, rows).astype(float),
+    })
+
+
+def test_supervised_windows_match_loop():
+    data = np.random.default_rng(1).random((150, 5))
+    X, y = supervised_windows(data)
+    loop_X, loop_y = _loop_windows(data)
+
+    assert X.shape == (90, 60, 5)
+    np.testing.assert_array_equal(X, loop_X)
+    np.testing.assert_array_equal(y, loop_y)
+
+
+def test_windows_are_read_only_views():
+    data = np.random.default_rng(2).random((100, 5))
+    X = sliding_windows(data)
+
+    assert np.shares_memory(X, data)
+    assert not X.flags.writeable
+
+
+def test_float32_dtype_and_short_series():
+    data = np.random.default_rng(3).random((100, 5))
+    assert sliding_windows(data, dtype=np.float32).dtype == np.float32
+    assert sliding_windows(data[:10]).shape == (0, 60, 5)
+
+
+def test_preprocessing_functions_match_loop():
+    df = _sample_frame()
+    X, y, scaler = preprocess_data(df)
+    scaled = scaler.transform(df[['Close', 'High', 'Low', 'Open', 'Volume']])
+    loop_X, loop_y = _loop_windows(scaled)
+    np.testing.assert_array_equal(X, loop_X)
+    np.testing.assert_array_equal(y, loop_y)
+
+    X_test, y_test = prepare_test_data(df, scaler)
+    test_size = int(len(loop_X) * 0.2)
+    np.testing.assert_array_equal(X_test, loop_X[-test_size:])
+    np.testing.assert_array_equal(y_test, loop_y[-test_size:])
+    assert X_test.flags.c_contiguous
+
+    np.testing.assert_array_equal(preprocess_user_data(df, scaler), loop_X)
+
+
+def _collect(dataset):
+    batches = list(dataset)
+    return np.concatenate([x.numpy() for x, _ in batches]), np.concatenate([t.numpy() for _, t in batches])
+
+
+def test_training_dataset_matches_loop_without_crossing_series():
+    rng = np.random.default_rng(3)
+    first, second, short = rng.random((150, 5)), rng.random((90, 5)), rng.random((40, 5))
+
+    dataset, samples = training_dataset([first, short, second], batch_size=16, shuffle=False)
+    X, y = _collect(dataset)
+
+    X_first, y_first = _loop_windows(first)
+    X_second, y_second = _loop_windows(second)
+    assert samples == len(X) == len(X_first) + len(X_second)
+    assert X.dtype == np.float32 and y.dtype == np.float32
+    np.testing.assert_allclose(X, np.concatenate([X_first, X_second]), rtol=1e-6)
+    np.testing.assert_allclose(y, np.concatenate([y_first, y_second]), rtol=1e-6)
+
+
+def test_training_dataset_reshuffles_each_epoch():
+    data = np.random.default_rng(4).random((300, 5))
+    dataset, _ = training_dataset(data, batch_size=32, shuffle=True)
+
+    _, first_epoch = _collect(dataset)
+    _, second_epoch = _collect(dataset)
+    _, expected = _loop_windows(data)
+
+    np.testing.assert_allclose(np.sort(first_epoch), np.sort(expected.astype(np.float32)))
+    assert not np.array_equal(first_epoch, second_epoch)
+
+
+def test_split_validation_keeps_each_window_in_one_part():
+    data = np.random.default_rng(5).random((200, 5))
+
+    train, validation = split_validation(data, 0.1)
+    _, y_train = _loop_windows(train)
+    _, y_validation = _loop_windows(validation)
+    _, y_all = _loop_windows(data)
+
+    assert len(y_validation) == 14 and len(y_train) + len(y_validation) == len(y_all)
+    np.testing.assert_allclose(np.concatenate([y_train, y_validation]), y_all)
+    assert split_validation(data[:65], 0.1)[1] is None
@@ -0,0 +1,283 @@
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from utils.feature_store import get_feature_series
+from utils.forecasting import batched_forecast
+from utils.model_utils import inverse_transform_close
+from utils.windowing import SEQUENCE_LENGTH
+
+# Backtesting walk-forward
+# BACKTEST_ENGINE: motor de inferência padrão ("numpy" dispensa o TensorFlow nos processos)
+# BACKTEST_BATCH_SIZE: janelas por chamada ao modelo
+BACKTEST_ENGINE = os.getenv("BACKTEST_ENGINE", "numpy")
+BACKTEST_BATCH_SIZE = int(os.getenv("BACKTEST_BATCH_SIZE", "1024"))
+
+# Threads do TensorFlow por processo do pool (None = padrão do TensorFlow)
+_worker_threads = None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Função para calcular as métricas de previsão de um horizonte
+def forecast_metrics(real_prices, predicted_prices, base_prices):
+    """
+    Calcula o erro das previsões e a taxa de acerto da direção do movimento.
+
+    Parâmetros:
+        real_prices (np.ndarray): Fechamentos observados na data prevista.
+        predicted_prices (np.ndarray): Fechamentos previstos.
+        base_prices (np.ndarray): Fechamentos na data em que cada previsão foi feita.
+
+    Retorna:
+        dict: MAE, RMSE, MAPE (%), acerto de direção (fração das previsões em
+        que o sinal da variação prevista é o da variação observada) e
+        quantidade de amostras.
+    """
+    errors = predicted_prices - real_prices
+    return {
+        "MAE": float(np.mean(np.abs(errors))),
+        "RMSE": float(np.sqrt(np.mean(errors ** 2))),
+        "MAPE": float(np.mean(np.abs(errors / real_prices)) * 100),
+        "directional_accuracy": float(np.mean(np.sign(predicted_prices - base_prices) == np.sign(real_prices - base_prices))),
+        "samples": int(len(real_prices)),
+    }
+
+
+# Função para executar o backtest walk-forward sobre uma série normalizada
+def backtest_series(model, scaler, series, horizon=1, start=None, end=None, batch_size=BACKTEST_BATCH_SIZE):
+    """
+    Backtest walk-forward: a cada pregão do período, prevê os próximos
+    `horizon` fechamentos usando apenas os 60 pregões anteriores (como
+    `/forecast` faria naquela data) e compara as previsões com os fechamentos
+    observados.
+
+    As janelas são fatias da série já normalizada (sem cópia) e são previstas
+    em lotes: cada passo do horizonte é uma única chamada ao modelo por lote
+    de janelas (ver `utils.forecasting.batched_forecast`). Os preços são
+    desnormalizados de uma vez com os parâmetros da coluna 'Close' do scaler.
+
+    Parâmetros:
+        model: Modelo com o método `predict` (Keras ou NumpyLSTMModel).
+        scaler (MinMaxScaler): Scaler do modelo.
+        series (FeatureSeries): Features normalizadas pelo scaler do modelo.
+        horizon (int): Quantidade de dias à frente.
+        start (str): Primeira data em que uma previsão é feita (padrão: a primeira possível).
+        end (str): Última data em que uma previsão é feita (padrão: a última possível).
+        batch_size (int): Janelas por chamada ao modelo.
+
+    Retorna:
+        dict: Período avaliado ('start', 'end') e as métricas de cada dia à
+        frente ('horizons', ver `forecast_metrics`); vazio se não houver
+        pregões suficientes no período.
+    """
+    length = len(series)
+    first = SEQUENCE_LENGTH - 1
+    stop = length - 1
+    if start is not None:
+        first = max(first, int(np.searchsorted(series.dates, np.datetime64(start, "D"), side="left")))
+    if end is not None:
+        stop = min(stop, int(np.searchsorted(series.dates, np.datetime64(end, "D"), side="right")))
+    if first >= stop:
+        return {}
+
+    # Janelas que terminam em cada pregão de origem [first, stop)
+    windows = series.windows(first - SEQUENCE_LENGTH + 1, stop)
+    predictions = inverse_transform_close(scaler, batched_forecast(model, scaler, windows, horizon, batch_size))
+    predictions = predictions.reshape(-1, horizon)
+    closes = inverse_transform_close(scaler, series.values[:, 0])
+
+    origins = np.arange(first, stop)
+    horizons = []
+    for day in range(1, horizon + 1):
+        # Apenas as previsões cuja data prevista já foi observada
+        valid = origins + day < length
+        if not valid.any():
+            break
+        targets = origins[valid] + day
+        metrics = forecast_metrics(closes[targets], predictions[valid, day - 1], closes[origins[valid]])
+        horizons.append(dict(horizon=day, **metrics))
+
+    return {
+        "start": str(series.dates[first]),
+        "end": str(series.dates[stop - 1]),
+        "horizons": horizons,
+    }
+
+
+def _init_worker(threads):
+    """Inicializa um processo do pool de backtests."""
+    global _worker_threads
+    _worker_threads = threads
+
+
+def _registry(model_dir, engine):
+    """Registro de modelos do processo atual, limitando as threads do TensorFlow nos processos do pool."""
+    from utils.model_registry import process_registry
+
+    global _worker_threads
+    if engine == "keras" and _worker_threads:
+        # O TensorFlow só aceita a configuração antes da primeira operação
+        from utils.model_utils import configure_tf_threads
+        threads, _worker_threads = _worker_threads, None
+        configure_tf_threads(threads)
+    return process_registry(model_dir, engine)
+
+
+# Função para executar o backtest de um ticker
+def backtest_ticker(ticker, model_dir="models", engine=BACKTEST_ENGINE, horizon=1, start=None, end=None,
+                    batch_size=BACKTEST_BATCH_SIZE, registry=None):
+    """
+    Executa o backtest walk-forward de um ticker com o modelo mais recente.
+    Lê apenas os armazenamentos locais (modelo, cotações e features); os
+    dados devem ter sido atualizados antes (ex.: `refresh_many_stock_data`).
+    Pode ser executada em um processo do pool.
+
+    Parâmetros:
+        ticker (str): Código da ação.
+        model_dir (str): Diretório onde os modelos são salvos.
+        engine (str): Motor de inferência ("keras" ou "numpy").
+        horizon (int): Quantidade de dias à frente.
+        start (str): Primeira data em que uma previsão é feita.
+        end (str): Última data em que uma previsão é feita.
+        batch_size (int): Janelas por chamada ao modelo.
+        registry (ModelRegistry): Registro de modelos já existente (padrão: o do processo).
+
+    Retorna:
+        dict: Resultado do ticker: 'status_code' (200, 400, 404 ou 500), erro,
+        versão do modelo, duração e as métricas de `backtest_series`.
+    """
+    started = time.perf_counter()
+    result = {"ticker": ticker, "status_code": 200, "error": None, "model_version": None}
+    try:
+        registry = registry or _registry(model_dir, engine)
+        try:
+            model, scaler, version = registry.get_versioned(ticker)
+        except FileNotFoundError:
+            model = None
+        series = get_feature_series(ticker, scaler) if model is not None else None
+        if model is None:
+            result.update(status_code=404, error=f"Modelo para {ticker} não encontrado. Treine o modelo primeiro.")
+        elif series is None or not len(series):
+            result.update(status_code=404, error=f"Nenhum dado encontrado para o ticker {ticker}.")
+        else:
+            result["model_version"] = list(version)
+            metrics = backtest_series(model, scaler, series, horizon, start, end, batch_size)
+            if metrics:
+                result.update(metrics)
+            else:
+                result.update(status_code=400, error="Dados insuficientes no período para o backtest.")
+    except Exception as e:
+        print(f"Erro no backtest do ticker {ticker}: {e}")
+        result.update(status_code=500, error=str(e) or type(e).__name__)
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def get_backtest_pool(workers):
+    """
+    Retorna o pool de processos compartilhado dos backtests da API, criado na
+    primeira chamada.
+
+    Parâmetros:
+        workers (int): Quantidade de processos (0 = sem pool).
+
+    Retorna:
+        ProcessPoolExecutor ou None: O pool ou None se `workers` for 0.
+    """
+    global _pool
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            from utils.training import threads_per_worker
+
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker, initargs=(threads_per_worker(workers),))
+        return _pool
+
+
+def shutdown_backtest_pool():
+    """Encerra o pool de processos dos backtests, cancelando os que ainda não começaram."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# Função para executar o backtest de vários tickers em paralelo
+def backtest_many(tickers, model_dir="models", engine=BACKTEST_ENGINE, horizon=1, start=None, end=None,
+                  max_workers=None):
+    """
+    Executa o backtest de vários tickers em processos paralelos.
+
+    Os dados de todos os tickers são atualizados antes, em consultas
+    agrupadas à fonte, de modo que cada processo lê apenas o armazenamento local.
+
+    Parâmetros:
+        tickers (list): Códigos das ações.
+        model_dir (str): Diretório onde os modelos são salvos.
+        engine (str): Motor de inferência ("keras" ou "numpy").
+        horizon (int): Quantidade de dias à frente.
+        start (str): Primeira data em que uma previsão é feita.
+        end (str): Última data em que uma previsão é feita.
+        max_workers (int): Quantidade máxima de processos (padrão: núcleos disponíveis).
+
+    Retorna:
+        generator: Resultado de cada ticker (ver `backtest_ticker`), na ordem em que fica pronto.
+    """
+    from utils.data_preprocessing import refresh_many_stock_data
+    from utils.model_utils import has_trained_model
+    from utils.training import threads_per_worker
+
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    refresh_many_stock_data([ticker for ticker in tickers if has_trained_model(model_dir, ticker)])
+
+    workers = min(max_workers or os.cpu_count() or 1, len(tickers))
+    if workers <= 1:
+        for ticker in tickers:
+            yield backtest_ticker(ticker, model_dir, engine, horizon, start, end)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(threads_per_worker(workers),)) as pool:
+        futures = [pool.submit(backtest_ticker, ticker, model_dir, engine, horizon, start, end) for ticker in tickers]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.backtesting AAPL MSFT --horizon 5 --start 2023-01-01 --end 2023-12-31 --workers 4
+    parser = argparse.ArgumentParser(description="Backtest walk-forward dos modelos treinados.")
+    parser.add_argument("tickers", nargs="*", help="Códigos das ações (padrão: todos com modelo)")
+    parser.add_argument("--horizon", type=int, default=1, help="Dias à frente")
+    parser.add_argument("--start", help="Primeira data em que uma previsão é feita (AAAA-MM-DD)")
+    parser.add_argument("--end", help="Última data em que uma previsão é feita (AAAA-MM-DD)")
+    parser.add_argument("--engine", default=BACKTEST_ENGINE, choices=("keras", "numpy"))
+    parser.add_argument("--workers", type=int, default=None, help="Processos em paralelo (padrão: núcleos)")
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--output", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    from utils.model_utils import list_trained_tickers
+
+    tickers = args.tickers or list_trained_tickers(args.model_dir)
+    results = []
+    for result in backtest_many(tickers, args.model_dir, args.engine, args.horizon, args.start, args.end, args.workers):
+        results.append(result)
+        first = (result.get("horizons") or [{}])[0]
+        print(f"[{len(results)}/{len(tickers)}] {result['ticker']}: {result['status_code']} "
+              f"MAE={first.get('MAE')} RMSE={first.get('RMSE')} acerto={first.get('directional_accuracy')} "
+              f"({result['seconds']:.2f}s){' ' + result['error'] if result['error'] else ''}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,197 @@
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from utils.feature_store import get_feature_series
+from utils.model_utils import inverse_transform_close, list_trained_tickers
+from utils.prediction_table import PredictionTable, PREDICTION_TABLE_PATH
+
+# Previsão em lote do próximo fechamento de todos os modelos treinados
+# PREDICTION_SCORING_ENGINE: motor de inferência do lote ("numpy" dispensa o TensorFlow nos processos)
+# PREDICTION_SCORING_CHUNK: tickers previstos por tarefa de cada processo
+PREDICTION_SCORING_ENGINE = os.getenv("PREDICTION_SCORING_ENGINE", "numpy")
+PREDICTION_SCORING_CHUNK = int(os.getenv("PREDICTION_SCORING_CHUNK", "64"))
+
+
+# Função para prever o próximo fechamento de um grupo de tickers
+def score_tickers(tickers, model_dir="models", engine=PREDICTION_SCORING_ENGINE):
+    """
+    Prevê o próximo fechamento de cada ticker com o modelo mais recente, a
+    partir dos armazenamentos locais (os dados devem ter sido atualizados
+    antes). Executada em um processo do pool, com um grupo de tickers por
+    tarefa, para diluir o custo de envio entre os processos.
+
+    Parâmetros:
+        tickers (list): Códigos das ações.
+        model_dir (str): Diretório onde os modelos são salvos.
+        engine (str): Motor de inferência ("keras" ou "numpy").
+
+    Retorna:
+        list: Um resultado por ticker, com o preço previsto e a versão do
+        modelo e o último pregão usados, ou o erro.
+    """
+    from utils.model_registry import process_registry
+
+    registry = process_registry(model_dir, engine)
+    results = []
+    for ticker in tickers:
+        try:
+            model, scaler, version = registry.get_versioned(ticker)
+            series = get_feature_series(ticker, scaler)
+            X_input = series.window() if series is not None else None
+            if X_input is None:
+                raise ValueError("Dados insuficientes para previsão.")
+            prediction = model.predict(X_input, verbose=0)
+            results.append({
+                "ticker": ticker,
+                "predicted_price": float(inverse_transform_close(scaler, prediction)[0]),
+                "engine": engine,
+                "model_version": list(version),
+                "last_date": series.last_date,
+                "scored_at": datetime.now(timezone.utc).isoformat(),
+                "error": None,
+            })
+        except Exception as e:
+            results.append({"ticker": ticker, "predicted_price": None, "error": str(e) or type(e).__name__})
+    return results
+
+
+# Função para prever o próximo fechamento de todos os modelos e gravar a tabela de previsões
+def score_all(model_dir="models", table_path=PREDICTION_TABLE_PATH, engine=PREDICTION_SCORING_ENGINE, tickers=None,
+              max_workers=None, chunk_size=PREDICTION_SCORING_CHUNK):
+    """
+    Prevê o próximo fechamento de todos os tickers com modelo treinado e
+    grava os resultados na tabela de previsões servida por `/predict`.
+
+    Os dados de todos os tickers são atualizados antes, em consultas
+    agrupadas à fonte; em seguida, os tickers são divididos em grupos de
+    `chunk_size` e previstos em processos paralelos, que leem apenas o
+    armazenamento local. As entradas de tickers que não têm mais modelo são
+    removidas da tabela; as dos tickers que falharam são mantidas (e deixam
+    de ser servidas quando ficam antigas).
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        table_path (str): Caminho da tabela de previsões.
+        engine (str): Motor de inferência ("keras" ou "numpy").
+        tickers (list): Tickers a prever (padrão: todos com modelo).
+        max_workers (int): Quantidade de processos (padrão: núcleos
+            disponíveis; 0 = no processo atual).
+        chunk_size (int): Tickers por tarefa.
+
+    Retorna:
+        dict: Quantidade de tickers previstos, falhas, duração e tamanho da tabela.
+    """
+    from utils.data_preprocessing import refresh_many_stock_data
+    from utils.training import threads_per_worker
+
+    start = time.perf_counter()
+    trained = list_trained_tickers(model_dir)
+    tickers = trained if tickers is None else list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    if tickers:
+        refresh_many_stock_data(tickers)
+
+    chunk_size = max(1, chunk_size)
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    workers = min((os.cpu_count() or 1) if max_workers is None else max_workers, len(chunks))
+    if workers <= 0:
+        results = [result for chunk in chunks for result in score_tickers(chunk, model_dir, engine)]
+    else:
+        initializer, initargs = None, ()
+        if engine == "keras":
+            from utils.model_utils import configure_tf_threads
+            initializer, initargs = configure_tf_threads, (threads_per_worker(workers),)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=initializer, initargs=initargs) as pool:
+            results = [result for chunk in pool.map(score_tickers, chunks, [model_dir] * len(chunks),
+                                                    [engine] * len(chunks))
+                       for result in chunk]
+
+    entries = {}
+    failed = []
+    for result in results:
+        ticker, error = result.pop("ticker"), result.pop("error")
+        if error:
+            print(f"Erro ao prever o ticker {ticker}: {error}")
+            failed.append(ticker)
+        else:
+            entries[ticker] = result
+    size = PredictionTable(table_path).update(entries, keep=set(trained))
+    return {"scored": len(entries), "failed": failed, "seconds": time.perf_counter() - start, "table_entries": size}
+
+
+# Agendamento periódico da previsão em lote
+class PredictionScoringScheduler:
+    """
+    Executa periodicamente, em uma thread de segundo plano, a previsão em
+    lote de todos os modelos (`score_all`), mantendo a tabela de previsões
+    de `/predict` atualizada.
+    """
+
+    def __init__(self, model_dir, table_path=PREDICTION_TABLE_PATH, interval=86400.0,
+                 engine=PREDICTION_SCORING_ENGINE, workers=1):
+        """
+        Parâmetros:
+            model_dir (str): Diretório onde os modelos são salvos.
+            table_path (str): Caminho da tabela de previsões.
+            interval (float): Intervalo (s) entre as execuções.
+            engine (str): Motor de inferência.
+            workers (int): Processos da previsão em lote (0 = na thread do agendador).
+        """
+        self.model_dir = model_dir
+        self.table_path = table_path
+        self.interval = interval
+        self.engine = engine
+        self.workers = workers
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """Executa a previsão em lote e retorna o relatório de `score_all`."""
+        report = score_all(self.model_dir, self.table_path, self.engine, max_workers=self.workers)
+        print(f"Previsão em lote: {report['scored']} tickers em {report['seconds']:.1f}s "
+              f"({len(report['failed'])} falhas).")
+        return report
+
+    def _run(self):
+        """Laço da thread de agendamento; a primeira execução ocorre ao iniciar."""
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Erro na previsão em lote: {e}")
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """Inicia a thread de agendamento (se ainda não estiver em execução)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="prediction-scoring-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Encerra a thread de agendamento, após a execução em andamento."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.batch_scoring [AAPL MSFT] --workers 4 --table data/predictions.json
+    parser = argparse.ArgumentParser(description="Prevê o próximo fechamento de todos os modelos treinados.")
+    parser.add_argument("tickers", nargs="*", help="Códigos das ações (padrão: todos com modelo)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos em paralelo (padrão: núcleos)")
+    parser.add_argument("--engine", default=PREDICTION_SCORING_ENGINE, choices=("keras", "numpy"))
+    parser.add_argument("--chunk-size", type=int, default=PREDICTION_SCORING_CHUNK, help="Tickers por tarefa")
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--table", default=PREDICTION_TABLE_PATH, help="Caminho da tabela de previsões")
+    args = parser.parse_args()
+
+    report = score_all(args.model_dir, args.table, args.engine, args.tickers or None, args.workers, args.chunk_size)
+    print(json.dumps(report, indent=2))
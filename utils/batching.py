@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+import weakref
+
+import numpy as np
+
+from utils.executor import run_blocking
+from utils.metrics import INFERENCE_BATCH_SECONDS, INFERENCE_BATCH_SIZE
+
+
+# Agrupador de requisições de inferência concorrentes para um mesmo modelo
+class MicroBatcher:
+    """
+    Agrupa as entradas pendentes de um mesmo modelo durante uma janela curta
+    de tempo (ou até atingir o tamanho máximo do lote) e executa uma única
+    inferência em lote, devolvendo a cada chamador apenas o seu resultado.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, window_ms=5.0):
+        """
+        Parâmetros:
+            predict_fn (callable): Função bloqueante que recebe um lote (np.ndarray)
+                e retorna as previsões, uma linha por amostra.
+            max_batch_size (int): Quantidade máxima de amostras por lote.
+            window_ms (float): Tempo máximo (ms) de espera para completar o lote.
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.window_ms = window_ms
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.samples = 0
+
+    async def submit(self, X_input):
+        """
+        Adiciona uma entrada ao próximo lote e aguarda o seu resultado.
+
+        Parâmetros:
+            X_input (np.ndarray): Entrada com formato (n, timesteps, features).
+
+        Retorna:
+            np.ndarray: Previsões correspondentes às `n` amostras enviadas.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((X_input, future))
+
+        if sum(len(x) for x, _ in self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Envia as entradas pendentes para inferência em um único lote."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending):
+        """Executa a inferência do lote e distribui os resultados."""
+        inputs = [x for x, _ in pending]
+        start = time.perf_counter()
+        try:
+            predictions = await run_blocking(self.predict_fn, np.concatenate(inputs, axis=0))
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        INFERENCE_BATCH_SECONDS.observe(time.perf_counter() - start)
+        INFERENCE_BATCH_SIZE.observe(len(predictions))
+        self.batches += 1
+        self.samples += len(predictions)
+        offset = 0
+        for x, future in pending:
+            if not future.done():
+                future.set_result(predictions[offset:offset + len(x)])
+            offset += len(x)
+
+
+# Conjunto de agrupadores, um por modelo carregado
+class BatcherPool:
+    """
+    Mantém um `MicroBatcher` por ticker, recriando-o quando o modelo em
+    memória é substituído (por exemplo, após um novo treinamento). O modelo é
+    referenciado de forma fraca para não impedir sua remoção do registro.
+    """
+
+    def __init__(self, max_batch_size=32, window_ms=5.0):
+        self.max_batch_size = max_batch_size
+        self.window_ms = window_ms
+        self._batchers = {}
+        self._lock = threading.Lock()
+
+    def get(self, ticker, model):
+        """
+        Retorna o agrupador do ticker associado ao modelo informado.
+
+        Parâmetros:
+            ticker (str): Código da ação.
+            model: Modelo carregado (com o método `predict`).
+
+        Retorna:
+            MicroBatcher: Agrupador do modelo.
+        """
+        with self._lock:
+            entry = self._batchers.get(ticker)
+            if entry is None or entry[0]() is not model:
+                model_ref = weakref.ref(model)
+
+                def predict_fn(X):
+                    return model_ref().predict(X, verbose=0)
+
+                batcher = MicroBatcher(predict_fn, max_batch_size=self.max_batch_size, window_ms=self.window_ms)
+                entry = (model_ref, batcher)
+                self._batchers[ticker] = entry
+            return entry[1]
+
+    def stats(self):
+        """Retorna a quantidade de lotes e amostras processadas por ticker."""
+        with self._lock:
+            return {
+                ticker: {"batches": batcher.batches, "samples": batcher.samples}
+                for ticker, (_, batcher) in self._batchers.items()
+            }
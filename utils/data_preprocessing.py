@@ -1,14 +1,95 @@
-import pandas as pd
+import asyncio
+import os
+from datetime import date, timedelta
+
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-import yfinance as yf
+
+from utils.executor import run_blocking
+from utils.market_data import get_market_data_store
+from utils.singleflight import SingleFlight
+from utils.windowing import SEQUENCE_LENGTH, sliding_windows, supervised_windows, materialize
+
+# Período histórico usado no treinamento e nas previsões
+START_DATE = '2010-01-01'
+END_DATE = '2024-01-01'
+
+# Data final (exclusiva) dos dados históricos
+# MARKET_DATA_END: data no formato AAAA-MM-DD ou "today" (inclui o pregão do dia);
+# padrão: END_DATE
+MARKET_DATA_END = os.getenv("MARKET_DATA_END", END_DATE)
+
+
+# Buscas concorrentes do mesmo ticker compartilham uma única leitura/download
+# DATA_FETCH_TIMEOUT: tempo máximo (s) de espera de cada requisição (0 = sem limite)
+DATA_FETCH_TIMEOUT = float(os.getenv("DATA_FETCH_TIMEOUT", "60"))
+_data_fetches = SingleFlight(timeout=DATA_FETCH_TIMEOUT or None)
+
+
+# Colunas usadas como entrada do modelo
+FEATURE_COLUMNS = ['Close', 'High', 'Low', 'Open', 'Volume']
+
+
+# Função para converter as colunas de entrada para valores numéricos
+def _numeric_features(df):
+    """
+    Seleciona as colunas de entrada, converte-as para números e remove as
+    linhas com valores ausentes ou inválidos.
+
+    Parâmetros:
+        df (pd.DataFrame): DataFrame contendo as colunas de FEATURE_COLUMNS.
+
+    Retorna:
+        pd.DataFrame: Colunas de entrada numéricas e sem valores ausentes.
+    """
+    import pandas as pd
+
+    features = df[FEATURE_COLUMNS]
+    # Os dados do armazenamento local já são numéricos; apenas os demais são convertidos
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in features.dtypes):
+        features = features.apply(pd.to_numeric, errors='coerce')
+    return features.dropna()
+
+
+# Função para obter a data final (exclusiva) dos dados históricos
+def data_end_date():
+    """
+    Retorna a data final (exclusiva) dos dados históricos configurada em
+    MARKET_DATA_END. Com "today", a data acompanha o calendário, de modo que
+    os novos pregões passam a ser buscados sem reiniciar a aplicação.
+
+    Retorna:
+        str: Data no formato AAAA-MM-DD.
+    """
+    if MARKET_DATA_END.lower() == "today":
+        return (date.today() + timedelta(days=1)).isoformat()
+    return MARKET_DATA_END
+
+
+# Função para obter a data final (exclusiva) dos pregões já encerrados
+def settled_end_date():
+    """
+    Retorna a data final (exclusiva) dos pregões definitivos. Com "today", o
+    pregão do dia pode estar em andamento: ele é armazenado, mas buscado de
+    novo a cada atualização até o dia seguinte (ver
+    `MarketDataStore.refresh_many`), para que a barra parcial seja substituída.
+
+    Retorna:
+        str: Data no formato AAAA-MM-DD.
+    """
+    if MARKET_DATA_END.lower() == "today":
+        return date.today().isoformat()
+    return MARKET_DATA_END
 
 
-# Função para obter os dados históricos de ações usando o Yahoo Finance
+# Função para obter os dados históricos de ações a partir do armazenamento local
 def get_stock_data(ticker):
     """
     Obtém os dados históricos de ações para um ticker específico.
 
+    Os dados são servidos pelo armazenamento local (`utils.market_data`),
+    que consulta a fonte configurada (Yahoo Finance por padrão) apenas para
+    os intervalos de datas que ainda não estão em disco.
+
     Parâmetros:
         ticker (str): Código do ativo (ex.: 'AAPL', 'GOOG').
 
@@ -17,47 +98,180 @@ def get_stock_data(ticker):
         ou None se ocorrer um erro ou os dados estiverem indisponíveis.
     """
     try:
-        # Baixa os dados usando o yfinance
-        df = yf.download(ticker, start='2010-01-01', end='2024-01-01')
-        if df.empty:
-            return None  # Retorna None se o DataFrame estiver vazio
-        df.reset_index(inplace=True)  # Reseta o índice para incluir a coluna 'Date'
-        return df
+        return get_market_data_store().get(ticker, START_DATE, data_end_date(), settled_end_date())
     except Exception as e:
-        # Log de erro se algo der errado durante o download
+        # Log de erro se algo der errado durante a leitura
         print(f"Erro ao buscar os dados para o ticker {ticker}: {e}")
         return None
 
 
-# Função para pré-processar os dados históricos para treinamento
-def preprocess_data(df):
+async def get_stock_data_async(ticker):
     """
-    Pré-processa os dados históricos para uso no treinamento do modelo.
+    Versão assíncrona de `get_stock_data`, executada no pool de threads.
+
+    Requisições concorrentes para o mesmo ticker aguardam a mesma busca.
+
+    Lança:
+        TimeoutError: Se a busca não terminar dentro de DATA_FETCH_TIMEOUT.
+    """
+    return await _data_fetches.run(ticker, run_blocking, get_stock_data, ticker)
+
+
+# Função para atualizar o armazenamento local sem ler os dados
+def refresh_stock_data(ticker):
+    """
+    Busca na fonte apenas os pregões que ainda não estão no armazenamento
+    local, sem montar o DataFrame da série (as previsões leem as features do
+    armazenamento de features, ver `utils.feature_store`). Sem acesso à
+    fonte, os dados já armazenados continuam disponíveis.
+
+    Parâmetros:
+        ticker (str): Código do ativo.
+    """
+    try:
+        get_market_data_store().refresh(ticker, START_DATE, data_end_date(), settled_end_date())
+    except Exception as e:
+        print(f"Erro ao atualizar os dados para o ticker {ticker}: {e}")
+
+
+async def refresh_stock_data_async(ticker):
+    """
+    Versão assíncrona de `refresh_stock_data`, executada no pool de threads.
+
+    Requisições concorrentes para o mesmo ticker aguardam a mesma atualização.
+
+    Lança:
+        TimeoutError: Se a atualização não terminar dentro de DATA_FETCH_TIMEOUT.
+    """
+    return await _data_fetches.run(f"refresh:{ticker}", run_blocking, refresh_stock_data, ticker)
+
+
+# Função para atualizar vários tickers de uma vez
+def refresh_many_stock_data(tickers):
+    """
+    Atualiza o armazenamento local de vários tickers, buscando na fonte os
+    intervalos que faltam em consultas agrupadas (ver `MarketDataStore.refresh_many`).
+
+    Parâmetros:
+        tickers (list): Códigos das ações.
+    """
+    try:
+        get_market_data_store().refresh_many(tickers, START_DATE, data_end_date(), settled_end=settled_end_date())
+    except Exception as e:
+        print(f"Erro ao atualizar os dados para os tickers {tickers}: {e}")
+
+
+async def refresh_many_stock_data_async(tickers):
+    """
+    Versão assíncrona de `refresh_many_stock_data`, executada no pool de threads.
+
+    Lança:
+        TimeoutError: Se a atualização não terminar dentro de DATA_FETCH_TIMEOUT.
+    """
+    return await asyncio.wait_for(run_blocking(refresh_many_stock_data, tickers), DATA_FETCH_TIMEOUT or None)
+
+
+# Função para normalizar a série histórica usada no treinamento
+def scale_training_series(df, dtype=None):
+    """
+    Ajusta o scaler aos dados históricos e retorna a série normalizada, sem
+    criar as janelas (ver `utils.windowing.training_dataset`).
 
     Parâmetros:
         df (pd.DataFrame): DataFrame contendo os dados históricos de ações.
+        dtype (np.dtype): Tipo opcional da série (ex.: np.float32).
 
     Retorna:
-        tuple: X (entradas), y (saídas) e o scaler usado para normalização.
+        tuple: Série normalizada (n_amostras, n_features) e o scaler ajustado.
     """
-    # Seleciona as colunas de interesse
-    features = df[['Close', 'High', 'Low', 'Open', 'Volume']]
-    # Garante que os dados sejam numéricos, removendo valores ausentes
-    features = features.apply(pd.to_numeric, errors='coerce').dropna()
+    from sklearn.preprocessing import MinMaxScaler
+
+    # Seleciona as colunas de interesse, garantindo que sejam numéricas e sem valores ausentes
+    features = _numeric_features(df)
     # Normaliza os dados para o intervalo [0, 1]
     scaler = MinMaxScaler(feature_range=(0, 1))
     scaled_data = scaler.fit_transform(features)
+    if dtype is not None:
+        scaled_data = scaled_data.astype(dtype, copy=False)
+    return scaled_data, scaler
+
+
+# Função para normalizar apenas os pregões posteriores ao último treinamento
+def scale_incremental_series(df, scaler, since, dtype=None):
+    """
+    Normaliza, com o scaler já ajustado, os pregões posteriores a `since` e as
+    SEQUENCE_LENGTH linhas anteriores, que servem de contexto para as
+    primeiras janelas. Cada novo pregão é o alvo de exatamente uma janela.
+
+    Parâmetros:
+        df (pd.DataFrame): DataFrame contendo os dados históricos de ações.
+        scaler (MinMaxScaler): Scaler ajustado no treinamento completo.
+        since (str): Data do último pregão usado no treinamento (AAAA-MM-DD).
+        dtype (np.dtype): Tipo opcional da série (ex.: np.float32).
+
+    Retorna:
+        tuple: Série normalizada (contexto + novos pregões) e quantidade de
+        novos pregões.
+    """
+    import pandas as pd
 
-    # Define o tamanho das sequências (janelas) temporais
-    sequence_length = 60
-    X, y = [], []
-    # Cria as sequências para treinamento
-    for i in range(sequence_length, len(scaled_data)):
-        X.append(scaled_data[i - sequence_length:i])  # 60 dias anteriores como entrada
-        y.append(scaled_data[i, 0])  # Preço de fechamento como saída
-    # Converte para arrays numpy
-    X = np.array(X)
-    y = np.array(y)
+    features = _numeric_features(df)
+    is_new = (pd.to_datetime(df.loc[features.index, 'Date']) > pd.Timestamp(since)).to_numpy()
+    new_rows = int(is_new.sum())
+    if new_rows == 0:
+        return np.empty((0, len(FEATURE_COLUMNS)), dtype=dtype or np.float64), 0
+
+    first_new = len(is_new) - new_rows
+    scaled_data = scaler.transform(features.iloc[max(0, first_new - SEQUENCE_LENGTH):])
+    if dtype is not None:
+        scaled_data = scaled_data.astype(dtype, copy=False)
+    return scaled_data, new_rows
+
+
+# Função para verificar se os novos dados saem da faixa aprendida pelo scaler
+def check_scaler_drift(scaler, df, tolerance=0.1):
+    """
+    Verifica se os dados informados ficam dentro da faixa usada no ajuste do
+    scaler. Valores normalizados fora de [0, 1] indicam preços ou volumes
+    que o modelo nunca viu; acima da tolerância, o scaler precisa ser
+    reajustado (treinamento completo).
+
+    Parâmetros:
+        df (pd.DataFrame): Dados a verificar (colunas de FEATURE_COLUMNS).
+        scaler (MinMaxScaler): Scaler ajustado no treinamento.
+        tolerance (float): Excesso máximo aceito, em fração da faixa do
+            scaler (0.1 = até 10% além do mínimo ou do máximo).
+
+    Retorna:
+        dict: 'drift' (bool), 'max_excess' (maior excesso encontrado) e
+        'columns' (colunas acima da tolerância).
+    """
+    features = _numeric_features(df)
+    if features.empty:
+        return {"drift": False, "max_excess": 0.0, "columns": []}
+    scaled = scaler.transform(features)
+    excess = np.maximum(-scaled.min(axis=0), scaled.max(axis=0) - 1)
+    columns = [column for column, value in zip(FEATURE_COLUMNS, excess) if value > tolerance]
+    return {"drift": bool(columns), "max_excess": float(max(excess.max(), 0.0)), "columns": columns}
+
+
+# Função para pré-processar os dados históricos para treinamento
+def preprocess_data(df, dtype=None):
+    """
+    Pré-processa os dados históricos para uso no treinamento do modelo.
+
+    Parâmetros:
+        df (pd.DataFrame): DataFrame contendo os dados históricos de ações.
+        dtype (np.dtype): Tipo opcional das janelas (ex.: np.float32).
+
+    Retorna:
+        tuple: X (entradas), y (saídas) e o scaler usado para normalização.
+        X e y são visões somente leitura sobre os dados normalizados.
+    """
+    scaled_data, scaler = scale_training_series(df)
+
+    # Cria as sequências (60 dias anteriores como entrada, fechamento seguinte como saída)
+    X, y = supervised_windows(scaled_data, SEQUENCE_LENGTH, dtype=dtype)
     return X, y, scaler
 
 
@@ -74,89 +288,230 @@ def prepare_prediction_input(df, scaler):
         np.ndarray ou None: Dados processados prontos para previsão ou None
         se os dados forem insuficientes.
     """
-    sequence_length = 60
-    features = df[['Close', 'High', 'Low', 'Open', 'Volume']]
-    features = features.apply(pd.to_numeric, errors='coerce').dropna()
+    sequence_length = SEQUENCE_LENGTH
+    features = _latest_features(df, sequence_length)
 
     # Verifica se há dados suficientes para criar uma sequência
     if len(features) < sequence_length:
         return None
 
-    # Normaliza os dados e seleciona os últimos 60 dias
-    scaled_features = scaler.transform(features)
-    X_input = scaled_features[-sequence_length:]
+    # Normaliza apenas os últimos 60 dias
+    X_input = scale_features(scaler, features)
     X_input = np.expand_dims(X_input, axis=0)  # Expande a dimensão para (1, 60, 5)
     return X_input
 
 
+# Função para obter as últimas linhas válidas das colunas de entrada
+def _latest_features(df, count):
+    """
+    Retorna as últimas `count` linhas sem valores ausentes das colunas de
+    entrada, como array. Colunas já numéricas (como as do armazenamento
+    local) são lidas diretamente, sem a conversão de `_numeric_features`.
+
+    Parâmetros:
+        df (pd.DataFrame): DataFrame contendo as colunas de FEATURE_COLUMNS.
+        count (int): Quantidade de linhas.
+
+    Retorna:
+        np.ndarray: Array float64 com até `count` linhas.
+    """
+    import pandas as pd
+
+    columns = [df[column] for column in FEATURE_COLUMNS]
+    if not all(pd.api.types.is_numeric_dtype(column.dtype) for column in columns):
+        return _numeric_features(df).to_numpy(dtype=np.float64)[-count:]
+    values = np.column_stack([column.to_numpy(dtype=np.float64) for column in columns])
+    return values[~np.isnan(values).any(axis=1)][-count:]
+
+
+# Função para normalizar linhas das colunas de entrada com o scaler ajustado
+def scale_features(scaler, values):
+    """
+    Aplica a normalização do scaler a um array com as colunas de
+    FEATURE_COLUMNS. Para o MinMaxScaler, faz a mesma conta de
+    `scaler.transform` (valor * scale_ + min_) sem a validação da entrada,
+    cujo custo fixo domina quando há poucas linhas.
+
+    Parâmetros:
+        scaler (MinMaxScaler): Scaler ajustado no treinamento.
+        values (np.ndarray): Array com formato (n, n_features).
+
+    Retorna:
+        np.ndarray: Valores normalizados.
+    """
+    from sklearn.preprocessing import MinMaxScaler
+
+    if isinstance(scaler, MinMaxScaler) and not scaler.clip:
+        return values * scaler.scale_ + scaler.min_
+    return scaler.transform(values)
+
+
 # Função para preparar os dados para teste
-def prepare_test_data(df, scaler):
+def prepare_test_data(df, scaler, dtype=None):
     """
     Pré-processa os dados históricos para criar conjuntos de teste.
 
     Parâmetros:
         df (pd.DataFrame): DataFrame contendo os dados históricos de ações.
         scaler (MinMaxScaler): Scaler usado para normalizar os dados.
+        dtype (np.dtype): Tipo opcional das janelas (ex.: np.float32).
 
     Retorna:
         tuple: X_test (dados de entrada para teste) e y_test (valores reais).
     """
     # Pré-processa as colunas de interesse
-    features = df[['Close', 'High', 'Low', 'Open', 'Volume']]
-    features = features.apply(pd.to_numeric, errors='coerce').dropna()
+    features = _numeric_features(df)
     scaled_data = scaler.transform(features)
+    return split_test_windows(scaled_data, dtype=dtype)
+
+
+# Função para separar as janelas de teste de uma série já normalizada
+def split_test_windows(scaled_data, dtype=None):
+    """
+    Cria as janelas de teste (últimos 20% das janelas) de uma série já
+    normalizada, como a do armazenamento de features.
 
-    sequence_length = 60
-    X, y = [], []
-    # Cria sequências temporais para o conjunto de teste
-    for i in range(sequence_length, len(scaled_data)):
-        X.append(scaled_data[i - sequence_length:i])  # 60 dias anteriores como entrada
-        y.append(scaled_data[i, 0])  # Preço de fechamento como saída
+    Parâmetros:
+        scaled_data (np.ndarray): Série normalizada com formato (n_amostras, n_features).
+        dtype (np.dtype): Tipo opcional das janelas (ex.: np.float32).
+
+    Retorna:
+        tuple: X_test (dados de entrada para teste) e y_test (valores reais),
+        ou (None, None) se os dados forem insuficientes.
+    """
+    # Cria as sequências temporais como visão, sem copiar os dados
+    X, y = supervised_windows(scaled_data, SEQUENCE_LENGTH, dtype=dtype)
 
     if len(X) == 0 or len(y) == 0:
         return None, None
 
-    # Seleciona os últimos 20% dos dados como conjunto de teste
-    X = np.array(X)
-    y = np.array(y)
+    # Seleciona os últimos 20% dos dados como conjunto de teste,
+    # materializando apenas esse trecho
     test_size = int(len(X) * 0.2)
-    X_test = X[-test_size:]
-    y_test = y[-test_size:]
+    X_test = materialize(X, -test_size)
+    y_test = np.array(y[-test_size:])
     return X_test, y_test
 
 
 # Função para pré-processar os dados enviados pelo usuário
-def preprocess_user_data(df, scaler):
+def preprocess_user_data(df, scaler, dtype=None):
     """
     Pré-processa os dados enviados pelo usuário para previsões personalizadas.
 
     Parâmetros:
         df (pd.DataFrame): DataFrame contendo os dados históricos enviados pelo usuário.
         scaler (MinMaxScaler): Scaler usado para normalizar os dados.
+        dtype (np.dtype): Tipo opcional das janelas (ex.: np.float32).
 
     Retorna:
-        np.ndarray ou None: Dados processados prontos para previsão ou None
-        se os dados forem insuficientes.
+        np.ndarray ou None: Janelas (visão somente leitura) prontas para previsão
+        ou None se os dados forem insuficientes.
     """
     # Verifica se as colunas necessárias estão presentes
-    required_columns = ['Close', 'High', 'Low', 'Open', 'Volume']
-    if not all(column in df.columns for column in required_columns):
-        raise ValueError(f"Os dados devem conter as seguintes colunas: {required_columns}")
+    if not all(column in df.columns for column in FEATURE_COLUMNS):
+        raise ValueError(f"Os dados devem conter as seguintes colunas: {FEATURE_COLUMNS}")
 
     # Seleciona e organiza as colunas necessárias
-    features = df[required_columns]
-    features = features.apply(pd.to_numeric, errors='coerce').dropna()
+    features = _numeric_features(df)
     # Normaliza os dados usando o scaler existente
     scaled_data = scaler.transform(features)
 
-    # Cria sequências temporais
-    sequence_length = 60
-    X_input = []
-    for i in range(sequence_length, len(scaled_data)):
-        X_input.append(scaled_data[i - sequence_length:i])
+    # Cria sequências temporais (a última linha não inicia uma janela completa)
+    X_input = sliding_windows(scaled_data[:-1], SEQUENCE_LENGTH, dtype=dtype)
 
     if len(X_input) == 0:
         return None
 
-    X_input = np.array(X_input)
     return X_input
+
+
+# Função para gerar, em lotes, as janelas de um CSV enviado pelo usuário sem carregá-lo inteiro
+def iter_user_window_batches(file_obj, scaler, batch_size=256, offset=0, limit=None, chunksize=10_000, dtype=None):
+    """
+    Lê um CSV em partes e gera as janelas de previsão em lotes de tamanho fixo,
+    mantendo em memória apenas as últimas `SEQUENCE_LENGTH` linhas entre as partes.
+
+    As janelas são as mesmas de `preprocess_user_data`: a janela `k` contém as
+    linhas `k` a `k + 59` (após a limpeza) e só existe se houver uma linha seguinte.
+
+    Parâmetros:
+        file_obj: Arquivo (binário ou texto) com o CSV.
+        scaler (MinMaxScaler): Scaler usado para normalizar os dados.
+        batch_size (int): Quantidade de janelas por lote.
+        offset (int): Índice da primeira janela desejada.
+        limit (int): Quantidade máxima de janelas (None = todas).
+        chunksize (int): Quantidade de linhas lidas do CSV por vez.
+        dtype (np.dtype): Tipo opcional das janelas (ex.: np.float32).
+
+    Retorna:
+        Gerador de tuplas (índice da primeira janela do lote, np.ndarray com as janelas).
+
+    Lança:
+        ValueError: Se as colunas necessárias não estiverem presentes.
+    """
+    import pandas as pd
+
+    stop = None if limit is None else offset + limit
+    tail = None  # últimas linhas normalizadas da parte anterior
+    next_index = 0  # índice global da próxima janela
+    pending, pending_start = [], offset
+
+    for chunk in pd.read_csv(file_obj, chunksize=chunksize):
+        if not all(column in chunk.columns for column in FEATURE_COLUMNS):
+            raise ValueError(f"Os dados devem conter as seguintes colunas: {FEATURE_COLUMNS}")
+
+        features = _numeric_features(chunk)
+        if features.empty:
+            continue
+        scaled = scaler.transform(features)
+        if dtype is not None:
+            scaled = scaled.astype(dtype, copy=False)
+        combined = scaled if tail is None else np.concatenate([tail, scaled])
+        tail = combined[-SEQUENCE_LENGTH:]
+
+        # Janelas cuja linha seguinte chegou nesta parte
+        windows = sliding_windows(combined[:-1], SEQUENCE_LENGTH)
+        first, last = next_index, next_index + len(windows)
+        next_index = last
+
+        lower = max(first, offset)
+        upper = last if stop is None else min(last, stop)
+        if upper > lower:
+            pending.append(windows[lower - first:upper - first])
+
+        # Entrega os lotes completos acumulados, materializando um lote por vez
+        while sum(len(block) for block in pending) >= batch_size:
+            yield pending_start, _take_windows(pending, batch_size)
+            pending_start += batch_size
+
+        if stop is not None and next_index >= stop:
+            break
+
+    remaining = sum(len(block) for block in pending)
+    if remaining:
+        yield pending_start, _take_windows(pending, remaining)
+
+
+def _take_windows(blocks, count):
+    """
+    Remove as primeiras `count` janelas de uma lista de visões e as copia
+    para um único array contíguo.
+
+    Parâmetros:
+        blocks (list): Lista de visões de janelas (alterada no lugar).
+        count (int): Quantidade de janelas a remover.
+
+    Retorna:
+        np.ndarray: Array contíguo com as janelas removidas.
+    """
+    batch = np.empty((count,) + blocks[0].shape[1:], dtype=blocks[0].dtype)
+    filled = 0
+    while filled < count:
+        part = blocks[0][:count - filled]
+        batch[filled:filled + len(part)] = part
+        filled += len(part)
+        if len(part) == len(blocks[0]):
+            blocks.pop(0)
+        else:
+            blocks[0] = blocks[0][len(part):]
+    return batch
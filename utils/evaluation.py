@@ -0,0 +1,75 @@
+import numpy as np
+
+from utils.data_preprocessing import prepare_test_data, split_test_windows
+from utils.model_utils import inverse_transform_close
+
+
+# Função para calcular as métricas de desempenho do modelo
+def evaluate_model(model, scaler, df):
+    """
+    Calcula as métricas de desempenho do modelo nos últimos 20% dos dados.
+
+    Parâmetros:
+        model (Sequential): O modelo LSTM treinado.
+        scaler (MinMaxScaler): Scaler usado para normalizar os dados.
+        df (pd.DataFrame): DataFrame contendo os dados históricos de ações.
+
+    Retorna:
+        dict: MAE, RMSE, MAPE (%) e quantidade de amostras avaliadas
+        (vazio se os dados forem insuficientes).
+    """
+    X_test, y_test = prepare_test_data(df, scaler)
+    return evaluate_windows(model, scaler, X_test, y_test)
+
+
+# Função para calcular as métricas a partir de uma série já normalizada
+def evaluate_series(model, scaler, scaled_data):
+    """
+    Calcula as métricas de desempenho do modelo nos últimos 20% de uma série
+    já normalizada pelo scaler do modelo (ex.: `FeatureSeries.values`).
+
+    Parâmetros:
+        model (Sequential): O modelo LSTM treinado.
+        scaler (MinMaxScaler): Scaler usado para normalizar os dados.
+        scaled_data (np.ndarray): Série normalizada com formato (n_amostras, n_features).
+
+    Retorna:
+        dict: As mesmas métricas de `evaluate_model`.
+    """
+    X_test, y_test = split_test_windows(scaled_data)
+    return evaluate_windows(model, scaler, X_test, y_test)
+
+
+# Função para calcular as métricas a partir das janelas de teste
+def evaluate_windows(model, scaler, X_test, y_test):
+    """
+    Calcula as métricas de desempenho do modelo nas janelas de teste.
+
+    Parâmetros:
+        model (Sequential): O modelo LSTM treinado.
+        scaler (MinMaxScaler): Scaler usado para normalizar os dados.
+        X_test (np.ndarray): Janelas de entrada.
+        y_test (np.ndarray): Valores reais (normalizados).
+
+    Retorna:
+        dict: MAE, RMSE, MAPE (%) e quantidade de amostras avaliadas
+        (vazio se não houver janelas).
+    """
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+    if X_test is None or y_test is None:
+        return {}
+
+    predictions = model.predict(X_test, verbose=0)
+    predicted_prices = inverse_transform_close(scaler, predictions)
+    real_prices = inverse_transform_close(scaler, y_test)
+
+    mae = mean_absolute_error(real_prices, predicted_prices)
+    rmse = np.sqrt(mean_squared_error(real_prices, predicted_prices))
+    mape = np.mean(np.abs((real_prices - predicted_prices) / real_prices)) * 100
+    return {
+        "MAE": float(mae),
+        "RMSE": float(rmse),
+        "MAPE": float(mape),
+        "test_samples": int(len(y_test)),
+    }
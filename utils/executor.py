@@ -0,0 +1,71 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Quantidade padrão de threads do pool de execução
+# (EXECUTOR_MAX_WORKERS=0 executa as tarefas diretamente no event loop)
+DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+_executor = None
+_max_workers = int(os.getenv("EXECUTOR_MAX_WORKERS", str(DEFAULT_MAX_WORKERS)))
+_lock = threading.Lock()
+
+
+def configure(max_workers):
+    """
+    Redefine o tamanho do pool de execução, encerrando o pool anterior.
+
+    Parâmetros:
+        max_workers (int): Quantidade máxima de threads (0 = executar no event loop).
+    """
+    global _max_workers
+    shutdown()
+    with _lock:
+        _max_workers = max_workers
+
+
+def get_executor():
+    """
+    Retorna o pool de threads compartilhado usado para inferência e I/O.
+
+    Retorna:
+        ThreadPoolExecutor ou None: O pool ou None se a execução for direta.
+    """
+    global _executor
+    with _lock:
+        if _max_workers <= 0:
+            return None
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix="blocking")
+        return _executor
+
+
+def shutdown():
+    """Encerra o pool de threads, aguardando as tarefas em andamento."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Executa uma função bloqueante (TensorFlow, pandas, yfinance, psutil) fora
+    do event loop, no pool de threads limitado.
+
+    Parâmetros:
+        func (callable): Função bloqueante.
+        *args, **kwargs: Argumentos repassados à função.
+
+    Retorna:
+        O valor retornado pela função.
+    """
+    executor = get_executor()
+    if executor is None:
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
@@ -0,0 +1,363 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+from utils.data_preprocessing import FEATURE_COLUMNS, START_DATE, data_end_date, scale_features
+from utils.market_data import get_market_data_store
+from utils.windowing import SEQUENCE_LENGTH, sliding_windows
+
+# Tipo das features normalizadas em disco (o mesmo da entrada dos modelos)
+FEATURE_DTYPE = np.float32
+
+# Gerações anteriores dos arquivos de features mantidas em disco após uma reconstrução
+RETAINED_GENERATIONS = 2
+
+
+# Função para identificar a normalização aplicada pelo scaler
+def scaler_fingerprint(scaler):
+    """
+    Calcula uma identificação do scaler: scalers com os mesmos parâmetros
+    produzem a mesma identificação, e um retreinamento (que reajusta o
+    scaler) produz outra.
+
+    Parâmetros:
+        scaler (MinMaxScaler): Scaler ajustado no treinamento.
+
+    Retorna:
+        str: Hash hexadecimal dos parâmetros do scaler.
+    """
+    digest = hashlib.sha1(type(scaler).__name__.encode())
+    if hasattr(scaler, "scale_") and hasattr(scaler, "min_"):
+        for value in (scaler.scale_, scaler.min_):
+            digest.update(np.ascontiguousarray(value, dtype=np.float64).tobytes())
+        digest.update(repr(getattr(scaler, "clip", None)).encode())
+    else:
+        digest.update(pickle.dumps(scaler))
+    return digest.hexdigest()[:20]
+
+
+# Função para extrair as colunas de entrada de um pregão do armazenamento de cotações
+def _row_values(row):
+    """Valores (float64) das colunas de FEATURE_COLUMNS de uma linha do array de cotações."""
+    return np.array([row[column] for column in FEATURE_COLUMNS], dtype=np.float64)
+
+
+# Série de features normalizadas de um ticker
+class FeatureSeries:
+    """
+    Visão somente leitura das features normalizadas de um ticker (uma linha
+    por pregão válido, nas colunas de FEATURE_COLUMNS) e das datas
+    correspondentes. As janelas são obtidas por fatiamento, sem pandas.
+    """
+
+    def __init__(self, values, dates):
+        """
+        Parâmetros:
+            values (np.ndarray): Features normalizadas com formato (n, n_features).
+            dates (np.ndarray): Datas (datetime64[D]) de cada linha.
+        """
+        self.values = values
+        self.dates = dates
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def last_date(self):
+        """Data do último pregão (AAAA-MM-DD) ou None se a série estiver vazia."""
+        return str(self.dates[-1]) if len(self.dates) else None
+
+    def window(self, length=SEQUENCE_LENGTH, end=None):
+        """
+        Retorna a janela de `length` linhas que termina antes da linha `end`
+        (padrão: as últimas linhas), pronta para a previsão.
+
+        Parâmetros:
+            length (int): Quantidade de linhas da janela.
+            end (int): Índice final (exclusivo); aceita valores negativos.
+
+        Retorna:
+            np.ndarray ou None: Cópia com formato (1, length, n_features) ou
+            None se não houver linhas suficientes.
+        """
+        values = self.values[:end]
+        if len(values) < length:
+            return None
+        return np.array(values[len(values) - length:])[None]
+
+    def windows(self, start=None, stop=None, length=SEQUENCE_LENGTH):
+        """
+        Retorna as janelas de `length` linhas das linhas [start, stop), como
+        visão somente leitura (ver `utils.windowing.sliding_windows`).
+        """
+        return sliding_windows(self.values[start:stop], length)
+
+
+# Armazenamento das features normalizadas de cada ticker
+class FeatureStore:
+    """
+    Mantém em disco, para cada ticker, as colunas de entrada já limpas e
+    normalizadas pelo scaler do modelo, em float32, lidas via memory-map:
+
+    - `{data_dir}/features/{TICKER}.{geração}.f32`: matriz (n, n_features);
+    - `{data_dir}/features/{TICKER}.{geração}.dates`: datas das linhas;
+    - `{data_dir}/features/{TICKER}.json`: manifesto com a geração atual, a
+      quantidade de linhas, o scaler usado e o trecho do armazenamento de
+      cotações já processado.
+
+    Os novos pregões do armazenamento de cotações são normalizados e
+    acrescentados ao final dos arquivos da geração atual; o manifesto, gravado
+    por último, define quantas linhas são válidas, de modo que os leitores
+    nunca veem uma linha incompleta. Se o scaler mudar (retreinamento) ou o
+    histórico já processado for alterado, os arquivos são reconstruídos em
+    uma nova geração.
+    """
+
+    def __init__(self, market_store):
+        """
+        Parâmetros:
+            market_store (MarketDataStore): Armazenamento das cotações.
+        """
+        self.market_store = market_store
+        self.directory = os.path.join(os.path.dirname(market_store.directory), "features")
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._opened = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _lock_for(self, ticker):
+        """Retorna o lock exclusivo de um ticker."""
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _manifest_path(self, ticker):
+        return os.path.join(self.directory, f"{ticker}.json")
+
+    def get(self, ticker, scaler, start=START_DATE, end=None):
+        """
+        Retorna as features normalizadas do ticker no intervalo [start, end),
+        processando apenas os pregões do armazenamento de cotações que ainda
+        não estão nos arquivos de features. A série não é buscada na fonte
+        (ver `MarketDataStore.refresh`).
+
+        Parâmetros:
+            ticker (str): Código da ação.
+            scaler (MinMaxScaler): Scaler do modelo.
+            start (str): Data inicial (inclusiva).
+            end (str): Data final (exclusiva; padrão: `data_end_date()`).
+
+        Retorna:
+            FeatureSeries ou None: Features do período ou None se não houver cotações.
+        """
+        market = self.market_store.read_array(ticker)
+        if market is None or len(market) == 0:
+            return None
+        dates = market['Date']
+        lower = int(np.searchsorted(dates, np.datetime64(start, 'D'), side='left'))
+        upper = int(np.searchsorted(dates, np.datetime64(end or data_end_date(), 'D'), side='left'))
+        if upper <= lower:
+            return None
+
+        fingerprint = scaler_fingerprint(scaler)
+        with self._lock_for(ticker):
+            manifest, series = self._open(ticker)
+            consumed = self._consumed_until(manifest, market, lower, upper, fingerprint, start)
+            if consumed is None:
+                manifest, series = self._rebuild(ticker, market[lower:upper], scaler, fingerprint, start)
+            elif consumed < upper:
+                manifest, series = self._append(ticker, manifest, market[consumed:upper], scaler)
+            return series
+
+    @staticmethod
+    def _consumed_until(manifest, market, lower, upper, fingerprint, start):
+        """
+        Verifica se os arquivos de features correspondem ao histórico atual e
+        retorna o índice (no array de cotações) do primeiro pregão ainda não
+        processado, ou None se for preciso reconstruí-los.
+
+        O último pregão processado é comparado também pelos valores: uma barra
+        parcial (pregão em andamento) substituída pela definitiva no
+        armazenamento de cotações reconstrói os arquivos.
+        """
+        if manifest is None or manifest["scaler"] != fingerprint or manifest["start"] != start:
+            return None
+        dates = market['Date']
+        consumed = lower + manifest["consumed"]
+        if str(dates[lower]) != manifest["first_date"] or consumed > upper:
+            return None
+        if str(dates[consumed - 1]) != manifest["consumed_last"]:
+            return None
+        last_values = manifest.get("consumed_last_values")
+        if last_values is None or not np.array_equal(_row_values(market[consumed - 1]),
+                                                     np.asarray(last_values, dtype=np.float64), equal_nan=True):
+            return None
+        return consumed
+
+    def _open(self, ticker):
+        """
+        Lê o manifesto do ticker e mapeia os arquivos da geração atual,
+        reaproveitando o mapeamento anterior se o manifesto não mudou.
+
+        Retorna:
+            tuple: Manifesto (ou None) e FeatureSeries (ou None).
+        """
+        path = self._manifest_path(ticker)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None, None
+        # O manifesto é sempre substituído (novo inode), inclusive por outros processos
+        version = (stat.st_ino, stat.st_mtime_ns)
+        opened = self._opened.get(ticker)
+        if opened is not None and opened[0] == version:
+            return opened[1], opened[2]
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+            series = self._map(manifest)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Erro ao ler as features do ticker {ticker}: {e}")
+            return None, None
+        self._opened[ticker] = (version, manifest, series)
+        return manifest, series
+
+    def _map(self, manifest):
+        """Mapeia em memória (somente leitura) as linhas válidas da geração do manifesto."""
+        rows, columns = manifest["rows"], len(FEATURE_COLUMNS)
+        if rows == 0:
+            return FeatureSeries(np.empty((0, columns), dtype=FEATURE_DTYPE), np.empty(0, dtype='datetime64[D]'))
+        values = np.memmap(os.path.join(self.directory, manifest["file"]), dtype=FEATURE_DTYPE, mode='r',
+                           shape=(rows, columns))
+        dates = np.memmap(os.path.join(self.directory, manifest["dates_file"]), dtype='datetime64[D]', mode='r',
+                          shape=(rows,))
+        # A visão como ndarray mantém o mapeamento, mas os resultados das operações são arrays comuns
+        return FeatureSeries(values.view(np.ndarray), dates.view(np.ndarray))
+
+    @staticmethod
+    def _scale(market, scaler):
+        """
+        Normaliza, em float32, os pregões válidos (sem valores ausentes) de um
+        trecho do array de cotações.
+
+        Retorna:
+            tuple: Features normalizadas e as datas correspondentes.
+        """
+        values = np.column_stack([np.asarray(market[column], dtype=np.float64) for column in FEATURE_COLUMNS])
+        valid = ~np.isnan(values).any(axis=1)
+        scaled = scale_features(scaler, values[valid]).astype(FEATURE_DTYPE)
+        return scaled, np.asarray(market['Date'][valid], dtype='datetime64[D]')
+
+    def _rebuild(self, ticker, market, scaler, fingerprint, start):
+        """Normaliza todo o trecho do array de cotações em uma nova geração dos arquivos."""
+        generation = time.time_ns()
+        manifest = {
+            "format": 1,
+            "file": f"{ticker}.{generation}.f32",
+            "dates_file": f"{ticker}.{generation}.dates",
+            "rows": 0,
+            "scaler": fingerprint,
+            "start": start,
+            "first_date": str(market['Date'][0]),
+            "consumed": 0,
+            "consumed_last": None,
+            "consumed_last_values": None,
+        }
+        manifest, series = self._append(ticker, manifest, market, scaler)
+        self._remove_old_generations(ticker)
+        return manifest, series
+
+    def _append(self, ticker, manifest, market, scaler):
+        """
+        Acrescenta os pregões de um trecho do array de cotações ao final dos
+        arquivos da geração atual e grava o novo manifesto.
+
+        Os dados são gravados a partir da última linha válida (descartando o
+        que uma gravação interrompida tenha deixado além dela) e o manifesto,
+        substituído de forma atômica, só passa a contar as novas linhas depois
+        que elas estão em disco.
+        """
+        values, dates = self._scale(market, scaler)
+        rows = manifest["rows"]
+        for name, data in ((manifest["file"], values), (manifest["dates_file"], dates)):
+            path = os.path.join(self.directory, name)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                offset = rows * data.dtype.itemsize * (data.shape[1] if data.ndim > 1 else 1)
+                f.seek(offset)
+                f.write(np.ascontiguousarray(data).tobytes())
+                f.truncate()
+
+        manifest = dict(manifest, rows=rows + len(values), consumed=manifest["consumed"] + len(market),
+                        consumed_last=str(market['Date'][-1]),
+                        consumed_last_values=_row_values(market[-1]).tolist())
+        path = self._manifest_path(ticker)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+        series = self._map(manifest)
+        stat = os.stat(path)
+        self._opened[ticker] = ((stat.st_ino, stat.st_mtime_ns), manifest, series)
+        return manifest, series
+
+    def _remove_old_generations(self, ticker):
+        """
+        Remove as gerações antigas dos arquivos de features, mantendo as
+        RETAINED_GENERATIONS mais recentes. Leitores que ainda mapeiam um
+        arquivo removido continuam a usá-lo até liberá-lo.
+        """
+        generations = {}
+        for name in os.listdir(self.directory):
+            parts = name.split(".")
+            if len(parts) == 3 and parts[0] == ticker and parts[1].isdigit() and parts[2] in ("f32", "dates"):
+                generations.setdefault(int(parts[1]), []).append(name)
+        for generation in sorted(generations)[:-RETAINED_GENERATIONS]:
+            for name in generations[generation]:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_feature_store():
+    """
+    Retorna o armazenamento de features padrão, ao lado do armazenamento de
+    cotações padrão (`utils.market_data.get_market_data_store`), que é
+    acompanhado caso seja substituído.
+    """
+    global _default_store
+    market_store = get_market_data_store()
+    with _default_store_lock:
+        if _default_store is None or _default_store.market_store is not market_store:
+            _default_store = FeatureStore(market_store)
+        return _default_store
+
+
+# Função para obter as features normalizadas de um ticker para previsão e avaliação
+def get_feature_series(ticker, scaler):
+    """
+    Obtém as features normalizadas do período histórico (START_DATE até
+    `data_end_date()`) a partir do armazenamento local, sem consultar a fonte
+    de dados (ver `utils.data_preprocessing.refresh_stock_data`).
+
+    Parâmetros:
+        ticker (str): Código da ação.
+        scaler (MinMaxScaler): Scaler do modelo.
+
+    Retorna:
+        FeatureSeries ou None: Features do ticker ou None se não houver dados.
+    """
+    try:
+        return get_feature_store().get(ticker, scaler, START_DATE, data_end_date())
+    except Exception as e:
+        print(f"Erro ao obter as features do ticker {ticker}: {e}")
+        return None
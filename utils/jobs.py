@@ -0,0 +1,518 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+from utils.metrics import TRAINING_JOB_SECONDS, TRAINING_QUEUE_WAIT_SECONDS
+
+# Estados possíveis de um job de treinamento
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# Tipos de job: treinamento completo e atualização incremental de um modelo existente
+TRAIN = "train"
+RETRAIN = "retrain"
+
+# Quantas vezes um job interrompido (processo de treinamento encerrado) volta
+# para a fila antes de ser marcado como falho
+TRAINING_MAX_ATTEMPTS = int(os.getenv("TRAINING_MAX_ATTEMPTS", "3"))
+
+
+def _pid_alive(pid):
+    """Indica se um processo com o PID informado ainda está em execução."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Fila persistente de jobs de treinamento
+class JobStore:
+    """
+    Fila durável de jobs de treinamento armazenada em SQLite.
+
+    O banco é compartilhado entre o processo da API e os processos de
+    treinamento; cada operação abre a sua própria conexão e as transações que
+    alteram a fila usam `BEGIN IMMEDIATE`, o que torna atômicas a verificação
+    de duplicidade e a reserva do próximo job.
+    """
+
+    def __init__(self, db_path):
+        """
+        Parâmetros:
+            db_path (str): Caminho do arquivo SQLite.
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    ticker TEXT NOT NULL,
+                    kind TEXT NOT NULL DEFAULT 'train',
+                    params TEXT NOT NULL DEFAULT '{}',
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    epochs_completed INTEGER NOT NULL DEFAULT 0,
+                    epochs_total INTEGER,
+                    error TEXT,
+                    worker_pid INTEGER,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            # Bancos criados antes da contagem de tentativas
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "attempts" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS batches (
+                    id TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    items TEXT NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        """Abre uma conexão com o banco (em modo autocommit)."""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _to_dict(row):
+        """Converte uma linha do banco em dicionário."""
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def enqueue(self, ticker, kind="train", params=None, epochs_total=None):
+        """
+        Adiciona um job à fila, a menos que já exista um job ativo para o ticker.
+
+        Parâmetros:
+            ticker (str): Código da ação.
+            kind (str): Tipo do job.
+            params (dict): Parâmetros adicionais do job.
+            epochs_total (int): Número de épocas previsto.
+
+        Retorna:
+            tuple: (job, criado), onde `criado` é False se um job ativo
+            para o mesmo ticker já existia (deduplicação).
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = conn.execute(
+                "SELECT * FROM jobs WHERE ticker = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                (ticker, *ACTIVE_STATUSES),
+            ).fetchone()
+            if existing is not None:
+                conn.execute("COMMIT")
+                return self._to_dict(existing), False
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, ticker, kind, params, status, created_at, epochs_total) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, ticker, kind, json.dumps(params or {}), QUEUED, time.time(), epochs_total),
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            conn.execute("COMMIT")
+            return self._to_dict(job), True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def get(self, job_id):
+        """Retorna um job pelo ID (ou None se não existir)."""
+        with closing(self._connect()) as conn:
+            return self._to_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def active_job(self, ticker):
+        """Retorna o job ativo (na fila ou em execução) de um ticker, se houver."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE ticker = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                (ticker, *ACTIVE_STATUSES),
+            ).fetchone()
+            return self._to_dict(row)
+
+    def claim_next(self, worker_pid):
+        """
+        Reserva o job mais antigo da fila para o processo informado.
+
+        Parâmetros:
+            worker_pid (int): PID do processo de treinamento.
+
+        Retorna:
+            dict ou None: O job reservado ou None se a fila estiver vazia.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, worker_pid = ?, epochs_completed = 0 WHERE id = ?",
+                (RUNNING, time.time(), worker_pid, row["id"]),
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            conn.execute("COMMIT")
+            return self._to_dict(job)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def update_progress(self, job_id, epochs_completed, epochs_total=None):
+        """
+        Registra a quantidade de épocas concluídas de um job.
+
+        Parâmetros:
+            job_id (str): ID do job.
+            epochs_completed (int): Épocas concluídas.
+            epochs_total (int): Novo número de épocas previsto (None = mantém o atual).
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE jobs SET epochs_completed = ?, epochs_total = COALESCE(?, epochs_total) WHERE id = ?",
+                         (epochs_completed, epochs_total, job_id))
+
+    def finish(self, job_id, error=None):
+        """
+        Marca um job como concluído (ou com falha, se `error` for informado).
+
+        Parâmetros:
+            job_id (str): ID do job.
+            error (str): Mensagem de erro, se o treinamento falhou.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                (FAILED if error else DONE, time.time(), error, job_id),
+            )
+
+    def create_batch(self, items):
+        """
+        Registra um lote de treinamento com o resultado da submissão de cada ticker.
+
+        Parâmetros:
+            items (list): Lista de dicionários com 'ticker', 'status' e 'job_id'.
+
+        Retorna:
+            str: ID do lote.
+        """
+        batch_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO batches (id, created_at, items) VALUES (?, ?, ?)",
+                (batch_id, time.time(), json.dumps(items)),
+            )
+        return batch_id
+
+    def get_batch(self, batch_id):
+        """
+        Retorna um lote com o estado atual dos jobs de cada ticker.
+
+        Parâmetros:
+            batch_id (str): ID do lote.
+
+        Retorna:
+            dict ou None: Lote com 'created_at' e 'items' (cada item com o job
+            atualizado, se houver) ou None se o lote não existir.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+        if row is None:
+            return None
+        items = json.loads(row["items"])
+        for item in items:
+            if item.get("job_id"):
+                job = self.get(item["job_id"])
+                if job is not None:
+                    item["status"] = job["status"]
+                    item["epochs_completed"] = job["epochs_completed"]
+                    item["error"] = job["error"]
+        return {"batch_id": row["id"], "created_at": row["created_at"], "items": items}
+
+    def requeue_orphans(self, max_attempts=TRAINING_MAX_ATTEMPTS):
+        """
+        Devolve à fila os jobs em execução cujo processo não existe mais
+        (por exemplo, após uma reinicialização). Um job interrompido
+        `max_attempts` vezes (ex.: um treinamento que sempre derruba o
+        processo) é marcado como falho em vez de voltar para a fila.
+
+        Parâmetros:
+            max_attempts (int): Execuções interrompidas permitidas por job.
+
+        Retorna:
+            int: Quantidade de jobs devolvidos à fila.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("SELECT id, worker_pid, attempts FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            orphans = [row for row in rows if not _pid_alive(row["worker_pid"])]
+            requeued = 0
+            for row in orphans:
+                attempts = row["attempts"] + 1
+                if attempts >= max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, finished_at = ?, error = ?, worker_pid = NULL, attempts = ? "
+                        "WHERE id = ?",
+                        (FAILED, time.time(), f"Treinamento interrompido {attempts} vezes", attempts, row["id"]),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, started_at = NULL, worker_pid = NULL, attempts = ? WHERE id = ?",
+                        (QUEUED, attempts, row["id"]),
+                    )
+                    requeued += 1
+            conn.execute("COMMIT")
+            return requeued
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+def run_job(store, job, model_dir):
+    """
+    Executa um job de treinamento (completo ou incremental, conforme o tipo
+    do job), registrando o progresso por época, o
+    tempo de espera na fila e a duração do job nas métricas Prometheus.
+
+    Parâmetros:
+        store (JobStore): Fila de jobs.
+        job (dict): Job reservado.
+        model_dir (str): Diretório onde os modelos são salvos.
+    """
+    from tensorflow.keras.callbacks import Callback
+
+    from utils.training import train_and_save_model, retrain_incremental, DEFAULT_EPOCHS, INCREMENTAL_EPOCHS
+
+    class ProgressCallback(Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            store.update_progress(job["id"], epoch + 1)
+
+    if job["started_at"]:
+        TRAINING_QUEUE_WAIT_SECONDS.observe(max(0.0, job["started_at"] - job["created_at"]))
+    start = time.perf_counter()
+    try:
+        if job["kind"] == RETRAIN:
+            epochs = job["epochs_total"] or INCREMENTAL_EPOCHS
+            # Com drift, a atualização vira um treinamento completo: o progresso recomeça com o novo total
+            retrain_incremental(job["ticker"], model_dir, epochs=epochs, callbacks=[ProgressCallback()],
+                                on_full_training=lambda total: store.update_progress(job["id"], 0, total))
+        else:
+            epochs = job["epochs_total"] or DEFAULT_EPOCHS
+            train_and_save_model(job["ticker"], model_dir, epochs=epochs, callbacks=[ProgressCallback()])
+    except Exception as e:
+        print(f"Erro no treinamento do ticker {job['ticker']}: {e}")
+        store.finish(job["id"], error=str(e) or type(e).__name__)
+        TRAINING_JOB_SECONDS.labels(FAILED).observe(time.perf_counter() - start)
+    else:
+        store.finish(job["id"])
+        TRAINING_JOB_SECONDS.labels(DONE).observe(time.perf_counter() - start)
+
+
+def worker_loop(db_path, model_dir, stop_event, poll_interval=1.0, threads=0):
+    """
+    Laço principal de um processo de treinamento: reserva e executa jobs até
+    que `stop_event` seja sinalizado.
+
+    Parâmetros:
+        db_path (str): Caminho do banco da fila.
+        model_dir (str): Diretório onde os modelos são salvos.
+        stop_event (multiprocessing.Event): Sinal de encerramento.
+        poll_interval (float): Intervalo (s) entre consultas à fila vazia.
+        threads (int): Threads do TensorFlow neste processo (0 = padrão).
+    """
+    from utils.model_utils import configure_tf_threads
+
+    configure_tf_threads(threads)
+    store = JobStore(db_path)
+    pid = os.getpid()
+    while not stop_event.is_set():
+        job = store.claim_next(pid)
+        if job is None:
+            store.requeue_orphans()
+            stop_event.wait(poll_interval)
+            continue
+        run_job(store, job, model_dir)
+
+
+# Conjunto de processos de treinamento
+class TrainingWorkerPool:
+    """
+    Inicia e encerra os processos que consomem a fila de treinamento, fora do
+    processo que atende as requisições da API.
+
+    Quando a API roda com vários processos (WEB_CONCURRENCY), cada um cria o
+    seu próprio conjunto, mas apenas o que obtiver o lock exclusivo do
+    arquivo `{db_path}.lock` inicia os processos de treinamento. O lock é
+    liberado pelo sistema operacional se esse processo terminar.
+    """
+
+    def __init__(self, db_path, model_dir, workers=1, poll_interval=1.0):
+        """
+        Parâmetros:
+            db_path (str): Caminho do banco da fila.
+            model_dir (str): Diretório onde os modelos são salvos.
+            workers (int): Quantidade de processos de treinamento.
+            poll_interval (float): Intervalo (s) entre consultas à fila vazia.
+        """
+        self.db_path = db_path
+        self.model_dir = model_dir
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lock_path = f"{db_path}.lock"
+        # "spawn" evita herdar o estado do TensorFlow do processo da API
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._processes = []
+        self._lock_file = None
+
+    def _acquire_lock(self):
+        """Tenta obter, sem bloquear, o lock que elege o processo responsável pelo treinamento."""
+        try:
+            import fcntl
+        except ImportError:  # Sem fcntl (Windows): apenas um processo da API é suportado
+            return True
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def start(self):
+        """
+        Devolve à fila os jobs órfãos e inicia os processos de treinamento.
+
+        Retorna:
+            bool: False se outro processo da API já é responsável pelo treinamento.
+        """
+        if not self._acquire_lock():
+            print("Os processos de treinamento já foram iniciados por outro processo da API.")
+            return False
+        JobStore(self.db_path).requeue_orphans()
+        threads = max(1, (os.cpu_count() or 1) // max(1, self.workers))
+        for _ in range(self.workers):
+            process = self._context.Process(
+                target=worker_loop,
+                args=(self.db_path, self.model_dir, self._stop_event, self.poll_interval, threads),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        return True
+
+    def stop(self, timeout=10):
+        """Sinaliza o encerramento e aguarda os processos terminarem."""
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+# Agendador da atualização incremental dos modelos desatualizados
+class StaleModelScheduler:
+    """
+    Verifica periodicamente, em uma thread de segundo plano, quais modelos
+    foram treinados antes do último pregão disponível e coloca na fila um
+    job de atualização incremental (RETRAIN) para cada um. A deduplicação da
+    fila evita jobs repetidos para um ticker que já tem job ativo.
+    """
+
+    def __init__(self, db_path, model_dir, interval=3600.0):
+        """
+        Parâmetros:
+            db_path (str): Caminho do banco da fila.
+            model_dir (str): Diretório onde os modelos são salvos.
+            interval (float): Intervalo (s) entre as verificações.
+        """
+        self.store = JobStore(db_path)
+        self.model_dir = model_dir
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """
+        Enfileira a atualização dos modelos desatualizados.
+
+        Retorna:
+            list: Tickers cujo job foi criado nesta verificação.
+        """
+        from utils.training import find_stale_models, INCREMENTAL_EPOCHS
+
+        queued = []
+        for ticker in find_stale_models(self.model_dir):
+            _, created = self.store.enqueue(ticker, kind=RETRAIN, epochs_total=INCREMENTAL_EPOCHS)
+            if created:
+                queued.append(ticker)
+        if queued:
+            print(f"Atualização incremental agendada para: {', '.join(queued)}")
+        return queued
+
+    def _run(self):
+        """Laço da thread de verificação."""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Erro ao verificar os modelos desatualizados: {e}")
+
+    def start(self):
+        """Inicia a thread de verificação (se ainda não estiver em execução)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="stale-model-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Encerra a thread de verificação."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,481 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from utils.metrics import MARKET_DATA_FETCH_SECONDS
+
+# O pandas é importado apenas nas funções que o usam, para não atrasar a
+# inicialização da API
+
+
+# Colunas armazenadas para cada ticker (além da data)
+PRICE_COLUMNS = ['Close', 'High', 'Low', 'Open', 'Volume']
+
+# Tipo estruturado usado no arquivo local de cada ticker
+STORE_DTYPE = np.dtype([('Date', 'datetime64[D]')] + [(column, 'float64') for column in PRICE_COLUMNS])
+
+
+def _empty_frame():
+    """Retorna um DataFrame vazio com as colunas do armazenamento local."""
+    import pandas as pd
+
+    return pd.DataFrame(columns=['Date'] + PRICE_COLUMNS)
+
+
+def _normalize_frame(df):
+    """
+    Normaliza um DataFrame de cotações para o formato do armazenamento local.
+
+    Parâmetros:
+        df (pd.DataFrame): DataFrame com a coluna 'Date' (ou índice de datas)
+            e as colunas de preço.
+
+    Retorna:
+        pd.DataFrame: DataFrame com as colunas 'Date' + PRICE_COLUMNS,
+        ordenado por data e sem datas duplicadas.
+    """
+    import pandas as pd
+
+    # O yfinance pode retornar colunas em MultiIndex (atributo, ticker)
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    if 'Date' not in df.columns:
+        df = df.reset_index()
+        df = df.rename(columns={df.columns[0]: 'Date'})
+
+    df = df[['Date'] + PRICE_COLUMNS].copy()
+    dates = pd.to_datetime(df['Date'])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    df['Date'] = dates.dt.normalize()
+    df[PRICE_COLUMNS] = df[PRICE_COLUMNS].apply(pd.to_numeric, errors='coerce')
+    df = df.drop_duplicates(subset='Date', keep='last').sort_values('Date')
+    return df.reset_index(drop=True)
+
+
+# Fonte de dados que consulta o Yahoo Finance
+class YFinanceSource:
+    """Obtém cotações históricas diretamente do Yahoo Finance."""
+
+    def fetch(self, ticker, start, end):
+        """
+        Baixa as cotações de um ticker no intervalo [start, end).
+
+        Parâmetros:
+            ticker (str): Código da ação.
+            start (str): Data inicial (inclusiva), no formato 'YYYY-MM-DD'.
+            end (str): Data final (exclusiva), no formato 'YYYY-MM-DD'.
+
+        Retorna:
+            pd.DataFrame: Cotações normalizadas (pode estar vazio).
+        """
+        import yfinance as yf
+
+        df = yf.download(ticker, start=start, end=end, progress=False)
+        if df is None or df.empty:
+            return _empty_frame()
+        return _normalize_frame(df)
+
+    def fetch_many(self, tickers, start, end):
+        """
+        Baixa as cotações de vários tickers em uma única requisição agrupada.
+
+        Parâmetros:
+            tickers (list): Códigos das ações.
+            start (str): Data inicial (inclusiva).
+            end (str): Data final (exclusiva).
+
+        Retorna:
+            dict: Ticker -> pd.DataFrame normalizado (pode estar vazio).
+        """
+        import pandas as pd
+        import yfinance as yf
+
+        df = yf.download(tickers, start=start, end=end, group_by='ticker', progress=False, threads=True)
+        frames = {}
+        for ticker in tickers:
+            if df is None or df.empty:
+                frames[ticker] = _empty_frame()
+                continue
+            if isinstance(df.columns, pd.MultiIndex) and ticker in df.columns.get_level_values(0):
+                ticker_df = df[ticker]
+            else:
+                ticker_df = df
+            # Tickers com calendários diferentes geram linhas vazias no download agrupado
+            ticker_df = ticker_df.dropna(how='all', subset=[c for c in PRICE_COLUMNS if c in ticker_df.columns])
+            frames[ticker] = _normalize_frame(ticker_df)
+        return frames
+
+
+# Fonte de dados baseada em arquivos CSV locais (sem acesso à rede)
+class FileSource:
+    """
+    Lê cotações de arquivos CSV locais no formato `{diretório}/{TICKER}.csv`,
+    com as colunas Date, Open, High, Low, Close e Volume. Útil para testes e
+    para ambientes sem acesso à internet.
+    """
+
+    def __init__(self, directory):
+        """
+        Parâmetros:
+            directory (str): Diretório que contém os arquivos CSV.
+        """
+        self.directory = directory
+
+    def fetch(self, ticker, start, end):
+        """
+        Lê as cotações de um ticker no intervalo [start, end).
+
+        Parâmetros:
+            ticker (str): Código da ação.
+            start (str): Data inicial (inclusiva).
+            end (str): Data final (exclusiva).
+
+        Retorna:
+            pd.DataFrame: Cotações normalizadas (vazio se o arquivo não existir).
+        """
+        import pandas as pd
+
+        path = os.path.join(self.directory, f"{ticker}.csv")
+        if not os.path.exists(path):
+            return _empty_frame()
+        df = _normalize_frame(pd.read_csv(path))
+        mask = (df['Date'] >= pd.Timestamp(start)) & (df['Date'] < pd.Timestamp(end))
+        return df[mask].reset_index(drop=True)
+
+
+# Armazenamento local e persistente das cotações de cada ticker
+class MarketDataStore:
+    """
+    Mantém as cotações de cada ticker em disco, em um array NumPy estruturado
+    (`{data_dir}/market/{TICKER}.npy`) lido via memory-map, acompanhado de um
+    arquivo JSON com o intervalo de datas já consultado na fonte.
+
+    Em cada leitura apenas os intervalos ainda não cobertos são buscados na
+    fonte; o restante é servido a partir do disco local. Se a fonte falhar
+    (por exemplo, sem rede), os dados já armazenados continuam disponíveis.
+    """
+
+    def __init__(self, data_dir, source):
+        """
+        Parâmetros:
+            data_dir (str): Diretório base do armazenamento.
+            source: Objeto com o método `fetch(ticker, start, end)`.
+        """
+        self.directory = os.path.join(data_dir, "market")
+        self.source = source
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _lock_for(self, ticker):
+        """Retorna o lock exclusivo de um ticker."""
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _paths(self, ticker):
+        """Retorna os caminhos do array de cotações e do arquivo de cobertura."""
+        base = os.path.join(self.directory, ticker)
+        return f"{base}.npy", f"{base}.json"
+
+    def _read_coverage(self, ticker):
+        """Lê o intervalo [start, end) já consultado para o ticker, se houver."""
+        _, coverage_path = self._paths(ticker)
+        if not os.path.exists(coverage_path):
+            return None
+        with open(coverage_path) as f:
+            coverage = json.load(f)
+        return coverage["start"], coverage["end"]
+
+    def read_array(self, ticker):
+        """
+        Lê o array estruturado de cotações do ticker via memory-map.
+
+        Retorna:
+            np.ndarray ou None: Array somente leitura ou None se não existir.
+        """
+        array_path, _ = self._paths(ticker)
+        if not os.path.exists(array_path):
+            return None
+        return np.load(array_path, mmap_mode='r')
+
+    def _write(self, ticker, df, coverage):
+        """Grava as cotações e a cobertura de forma atômica (arquivo temporário + rename)."""
+        array_path, coverage_path = self._paths(ticker)
+        array = np.empty(len(df), dtype=STORE_DTYPE)
+        array['Date'] = df['Date'].values.astype('datetime64[D]')
+        for column in PRICE_COLUMNS:
+            array[column] = df[column].values
+
+        tmp_path = f"{array_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, array_path)
+
+        tmp_path = f"{coverage_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"start": coverage[0], "end": coverage[1]}, f)
+        os.replace(tmp_path, coverage_path)
+
+    def _to_frame(self, array):
+        """Converte o array estruturado em DataFrame no formato de `get_stock_data`."""
+        import pandas as pd
+
+        data = {'Date': pd.to_datetime(array['Date'])}
+        for column in PRICE_COLUMNS:
+            data[column] = np.asarray(array[column])
+        return pd.DataFrame(data)
+
+    @staticmethod
+    def missing_ranges(coverage, start, end):
+        """
+        Calcula os intervalos de datas ainda não consultados na fonte.
+
+        Parâmetros:
+            coverage (tuple ou None): Intervalo já coberto (start, end).
+            start (str): Data inicial desejada.
+            end (str): Data final desejada (exclusiva).
+
+        Retorna:
+            list: Lista de tuplas (start, end) a serem buscadas.
+        """
+        if coverage is None:
+            return [(start, end)]
+        covered_start, covered_end = coverage
+        ranges = []
+        if start < covered_start:
+            ranges.append((start, covered_start))
+        if end > covered_end:
+            ranges.append((covered_end, end))
+        return ranges
+
+    def refresh(self, ticker, start, end, settled_end=None):
+        """
+        Busca na fonte apenas os intervalos ainda não armazenados do ticker.
+
+        Parâmetros:
+            ticker (str): Código da ação.
+            start (str): Data inicial desejada (inclusiva).
+            end (str): Data final desejada (exclusiva).
+            settled_end (str): Data (exclusiva) até a qual os pregões são definitivos
+                (ver `refresh_many`).
+        """
+        self.refresh_many([ticker], start, end, raise_errors=True, settled_end=settled_end)
+
+    def refresh_many(self, tickers, start, end, raise_errors=False, settled_end=None):
+        """
+        Atualiza vários tickers, agrupando na mesma consulta à fonte os tickers
+        que precisam do mesmo intervalo de datas.
+
+        Os pregões a partir de `settled_end` (ex.: o pregão do dia, ainda em
+        andamento) são armazenados, mas não entram na cobertura: são buscados
+        novamente na próxima atualização, que substitui a barra parcial.
+
+        Parâmetros:
+            tickers (list): Códigos das ações.
+            start (str): Data inicial desejada (inclusiva).
+            end (str): Data final desejada (exclusiva).
+            raise_errors (bool): Se True, propaga erros da fonte; caso contrário
+                apenas registra o erro e mantém os dados já armazenados.
+            settled_end (str): Data (exclusiva) até a qual os pregões são
+                definitivos (padrão: `end`).
+        """
+        tickers = sorted(set(tickers))
+        settled_end = min(end, settled_end) if settled_end else end
+        locks = [self._lock_for(ticker) for ticker in tickers]
+        for lock in locks:
+            lock.acquire()
+        try:
+            # Agrupa os tickers pelos intervalos de datas que ainda faltam
+            coverages, groups = {}, {}
+            for ticker in tickers:
+                coverage = self._read_coverage(ticker)
+                # Coberturas gravadas além dos pregões definitivos são buscadas novamente
+                if coverage is not None and coverage[1] > settled_end:
+                    coverage = (coverage[0], max(coverage[0], settled_end))
+                coverages[ticker] = coverage
+                for missing in self.missing_ranges(coverages[ticker], start, end):
+                    groups.setdefault(missing, []).append(ticker)
+
+            fetched = {ticker: [] for ticker in tickers}
+            failed = set()
+            for (range_start, range_end), group in groups.items():
+                try:
+                    frames = self._fetch_group(group, range_start, range_end)
+                except Exception as e:
+                    if raise_errors:
+                        raise
+                    print(f"Erro ao atualizar os dados para os tickers {group}: {e}")
+                    failed.update(group)
+                    continue
+                for ticker in group:
+                    fetched[ticker].append(frames.get(ticker))
+
+            for ticker in tickers:
+                if fetched[ticker] and ticker not in failed:
+                    self._merge(ticker, coverages[ticker], fetched[ticker], start, settled_end)
+        finally:
+            for lock in locks:
+                lock.release()
+
+    def _fetch_group(self, tickers, start, end):
+        """Consulta a fonte para um grupo de tickers (de uma vez, se a fonte permitir)."""
+        source = type(self.source).__name__
+        start_time = time.perf_counter()
+        try:
+            if len(tickers) > 1 and hasattr(self.source, "fetch_many"):
+                frames = self.source.fetch_many(tickers, start, end)
+            else:
+                frames = {ticker: self.source.fetch(ticker, start, end) for ticker in tickers}
+        except Exception:
+            MARKET_DATA_FETCH_SECONDS.labels(source, "error").observe(time.perf_counter() - start_time)
+            raise
+        MARKET_DATA_FETCH_SECONDS.labels(source, "ok").observe(time.perf_counter() - start_time)
+        return frames
+
+    def _merge(self, ticker, coverage, new_frames, start, end):
+        """Combina os dados armazenados com os novos intervalos e grava o resultado."""
+        import pandas as pd
+
+        frames = []
+        stored = self.read_array(ticker)
+        if stored is not None and len(stored):
+            frames.append(self._to_frame(stored))
+        frames.extend(new_frames)
+
+        frames = [frame for frame in frames if frame is not None and not frame.empty]
+        if not frames:
+            return
+        merged = _normalize_frame(pd.concat(frames, ignore_index=True))
+
+        if coverage is None:
+            coverage = (start, end)
+        else:
+            coverage = (min(start, coverage[0]), max(end, coverage[1]))
+        self._write(ticker, merged, coverage)
+
+    def get_many(self, tickers, start, end, settled_end=None):
+        """
+        Retorna as cotações de vários tickers, buscando os intervalos que
+        faltam em consultas agrupadas à fonte.
+
+        Parâmetros:
+            tickers (list): Códigos das ações.
+            start (str): Data inicial (inclusiva).
+            end (str): Data final (exclusiva).
+            settled_end (str): Data (exclusiva) até a qual os pregões são definitivos.
+
+        Retorna:
+            dict: Ticker -> pd.DataFrame ou None (se não houver dados).
+        """
+        self.refresh_many(tickers, start, end, settled_end=settled_end)
+        return {ticker: self._read_range(ticker, start, end) for ticker in tickers}
+
+    def get(self, ticker, start, end, settled_end=None):
+        """
+        Retorna as cotações do ticker no intervalo [start, end), atualizando o
+        armazenamento local de forma incremental quando necessário.
+
+        Parâmetros:
+            ticker (str): Código da ação.
+            start (str): Data inicial (inclusiva).
+            end (str): Data final (exclusiva).
+            settled_end (str): Data (exclusiva) até a qual os pregões são definitivos.
+
+        Retorna:
+            pd.DataFrame ou None: Cotações do período ou None se não houver dados.
+        """
+        try:
+            self.refresh(ticker, start, end, settled_end)
+        except Exception as e:
+            # Sem acesso à fonte, os dados já armazenados continuam sendo servidos
+            print(f"Erro ao atualizar os dados para o ticker {ticker}: {e}")
+
+        return self._read_range(ticker, start, end)
+
+    def last_date(self, ticker, end=None):
+        """
+        Retorna a data do último pregão armazenado do ticker, sem consultar a fonte.
+
+        Parâmetros:
+            ticker (str): Código da ação.
+            end (str): Data final (exclusiva) opcional.
+
+        Retorna:
+            str ou None: Data no formato 'YYYY-MM-DD' ou None se não houver dados.
+        """
+        array = self.read_array(ticker)
+        if array is None or len(array) == 0:
+            return None
+        dates = array['Date']
+        upper = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, 'D'), side='left')
+        if upper == 0:
+            return None
+        return str(dates[upper - 1])
+
+    def _read_range(self, ticker, start, end):
+        """Lê do disco as cotações armazenadas do ticker no intervalo [start, end)."""
+        array = self.read_array(ticker)
+        if array is None or len(array) == 0:
+            return None
+
+        dates = array['Date']
+        lower = np.searchsorted(dates, np.datetime64(start, 'D'), side='left')
+        upper = np.searchsorted(dates, np.datetime64(end, 'D'), side='left')
+        if upper <= lower:
+            return None
+        return self._to_frame(array[lower:upper])
+
+
+def create_source(kind, file_dir=None):
+    """
+    Cria a fonte de dados a partir do tipo configurado.
+
+    Parâmetros:
+        kind (str): 'yfinance' (padrão) ou 'file'.
+        file_dir (str): Diretório dos CSVs quando kind='file'.
+
+    Retorna:
+        Objeto com o método `fetch(ticker, start, end)`.
+    """
+    if kind == "file":
+        return FileSource(file_dir)
+    if kind == "yfinance":
+        return YFinanceSource()
+    raise ValueError(f"Fonte de dados desconhecida: {kind}")
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_market_data_store():
+    """
+    Retorna o armazenamento padrão, configurado pelas variáveis de ambiente:
+
+        MARKET_DATA_DIR: diretório base (padrão: 'data').
+        MARKET_DATA_SOURCE: 'yfinance' (padrão) ou 'file'.
+        MARKET_DATA_FILE_DIR: diretório dos CSVs da fonte 'file'
+            (padrão: '{MARKET_DATA_DIR}/offline').
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            data_dir = os.getenv("MARKET_DATA_DIR", "data")
+            source = create_source(
+                os.getenv("MARKET_DATA_SOURCE", "yfinance"),
+                os.getenv("MARKET_DATA_FILE_DIR", os.path.join(data_dir, "offline")),
+            )
+            _default_store = MarketDataStore(data_dir, source)
+        return _default_store
+
+
+def set_market_data_store(store):
+    """Substitui o armazenamento padrão (por exemplo, em testes)."""
+    global _default_store
+    with _default_store_lock:
+        _default_store = store
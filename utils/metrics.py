@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Métricas Prometheus das etapas de previsão e de treinamento.
+#
+# Com vários processos (WEB_CONCURRENCY > 1 ou processos de treinamento), a
+# variável PROMETHEUS_MULTIPROC_DIR deve apontar para um diretório vazio antes
+# de a aplicação iniciar (o entrypoint.sh faz isso). Cada processo grava as
+# suas amostras nesse diretório e o endpoint /metrics agrega todas elas.
+
+# Quantidade máxima de tickers distintos usados como rótulo nas métricas
+# METRICS_MAX_TICKERS: os demais tickers são agrupados no rótulo "other"
+MAX_TICKER_LABELS = int(os.getenv("METRICS_MAX_TICKERS", "50"))
+OTHER_TICKER = "other"
+
+# Intervalos dos histogramas de latência (s), de submilissegundos a um minuto
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+EPOCH_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+JOB_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0, 7200.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_seconds",
+    "Duração de cada etapa dos fluxos de previsão e de treinamento",
+    ["pipeline", "stage", "ticker"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "pipeline_stage_errors",
+    "Etapas interrompidas por uma exceção",
+    ["pipeline", "stage", "ticker"],
+)
+MODEL_CACHE_REQUESTS = Counter(
+    "model_cache_requests",
+    "Consultas ao registro de modelos em memória, por resultado (hit ou miss)",
+    ["engine", "result"],
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "model_load_seconds",
+    "Tempo de carregamento de um modelo e do seu scaler a partir do disco",
+    ["engine"],
+    buckets=LATENCY_BUCKETS,
+)
+PREDICTION_CACHE_REQUESTS = Counter(
+    "prediction_cache_requests",
+    "Consultas ao cache de previsões de /predict, por resultado (hit, miss, not_modified ou table)",
+    ["result"],
+)
+INFERENCE_BATCH_SIZE = Histogram(
+    "inference_batch_size",
+    "Quantidade de amostras por lote de inferência do agrupador de /predict",
+    buckets=BATCH_SIZE_BUCKETS,
+)
+INFERENCE_BATCH_SECONDS = Histogram(
+    "inference_batch_seconds",
+    "Duração da inferência de um lote do agrupador de /predict",
+    buckets=LATENCY_BUCKETS,
+)
+MARKET_DATA_FETCH_SECONDS = Histogram(
+    "market_data_fetch_seconds",
+    "Duração das consultas à fonte de dados de mercado",
+    ["source", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+TRAINING_EPOCHS = Counter(
+    "training_epochs",
+    "Épocas de treinamento concluídas",
+    ["ticker"],
+)
+TRAINING_EPOCH_SECONDS = Histogram(
+    "training_epoch_seconds",
+    "Duração de cada época de treinamento",
+    ["ticker"],
+    buckets=EPOCH_BUCKETS,
+)
+TRAINING_SAMPLES_PER_SECOND = Gauge(
+    "training_samples_per_second",
+    "Janelas de treinamento processadas por segundo na última época",
+    ["ticker"],
+    multiprocess_mode="mostrecent",
+)
+TRAINING_QUEUE_WAIT_SECONDS = Histogram(
+    "training_queue_wait_seconds",
+    "Tempo de espera de um job na fila até o início do treinamento",
+    buckets=JOB_BUCKETS,
+)
+TRAINING_JOB_SECONDS = Histogram(
+    "training_job_seconds",
+    "Duração total de um job de treinamento, por resultado",
+    ["status"],
+    buckets=JOB_BUCKETS,
+)
+
+_tickers = set()
+_tickers_lock = threading.Lock()
+
+
+# Função para limitar a quantidade de tickers usados como rótulo
+def ticker_label(ticker, register=True):
+    """
+    Retorna o rótulo do ticker nas métricas, mantendo a cardinalidade limitada.
+
+    Os primeiros `MAX_TICKER_LABELS` tickers registrados neste processo usam o
+    próprio código como rótulo; os demais são agrupados em "other".
+
+    Parâmetros:
+        ticker (str): Código da ação.
+        register (bool): Se False, não ocupa uma nova vaga com um ticker
+            desconhecido (usado quando a etapa falhou, por exemplo, para
+            tickers sem modelo).
+
+    Retorna:
+        str: Rótulo a ser usado.
+    """
+    with _tickers_lock:
+        if ticker in _tickers:
+            return ticker
+        if register and len(_tickers) < MAX_TICKER_LABELS:
+            _tickers.add(ticker)
+            return ticker
+    return OTHER_TICKER
+
+
+# Função para medir a duração de uma etapa
+@contextmanager
+def track_stage(pipeline, stage, ticker):
+    """
+    Mede a duração de uma etapa e a registra em `pipeline_stage_seconds`.
+    Se a etapa lançar uma exceção, ela também é contada em
+    `pipeline_stage_errors` e propagada normalmente.
+
+    Pode envolver trechos com `await`, desde que dentro da mesma corrotina.
+
+    Parâmetros:
+        pipeline (str): Fluxo medido (ex.: "predict", "training").
+        stage (str): Nome da etapa (ex.: "data_fetch", "inference").
+        ticker (str): Código da ação.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        label = ticker_label(ticker, register=False)
+        STAGE_SECONDS.labels(pipeline, stage, label).observe(time.perf_counter() - start)
+        STAGE_ERRORS.labels(pipeline, stage, label).inc()
+        raise
+    STAGE_SECONDS.labels(pipeline, stage, ticker_label(ticker)).observe(time.perf_counter() - start)
+
+
+# Função para criar o callback do Keras que registra as métricas por época
+def training_metrics_callback(ticker, samples):
+    """
+    Cria um callback do Keras que registra, a cada época, a duração, a
+    quantidade de épocas concluídas e a vazão (janelas por segundo).
+
+    Parâmetros:
+        ticker (str): Código da ação treinada.
+        samples (int): Quantidade de janelas de treinamento por época.
+
+    Retorna:
+        Callback: Callback do Keras.
+    """
+    from tensorflow.keras.callbacks import Callback
+
+    label = ticker_label(ticker)
+
+    class TrainingMetricsCallback(Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self._epoch_start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            seconds = time.perf_counter() - self._epoch_start
+            TRAINING_EPOCHS.labels(label).inc()
+            TRAINING_EPOCH_SECONDS.labels(label).observe(seconds)
+            if seconds > 0:
+                TRAINING_SAMPLES_PER_SECOND.labels(label).set(samples / seconds)
+
+    return TrainingMetricsCallback()
@@ -0,0 +1,390 @@
+import argparse
+import json
+import os
+import struct
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Identificação do formato dos pacotes de modelo
+BUNDLE_MAGIC = b"LSTMBNDL"
+BUNDLE_FORMAT = 1
+
+# Alinhamento (em bytes) do início dos pesos no arquivo, para o memory-map
+BUNDLE_ALIGNMENT = 64
+
+# Versões mantidas em disco para cada ticker (as mais recentes)
+# MODEL_BUNDLE_RETENTION: quantidade de versões (mínimo: 1)
+BUNDLE_RETENTION = int(os.getenv("MODEL_BUNDLE_RETENTION", "3"))
+
+# Cabeçalho fixo: identificação do formato e tamanho do cabeçalho JSON
+_PREAMBLE = struct.Struct("<8sQ")
+
+
+# Função para obter o diretório dos pacotes de um ticker
+def bundle_dir(model_dir, ticker):
+    """
+    Retorna o diretório dos pacotes (`bundles/{ticker}`) de um ticker.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+
+    Retorna:
+        str: Caminho do diretório.
+    """
+    return os.path.join(model_dir, "bundles", ticker)
+
+
+# Função para obter o caminho de uma versão do pacote
+def bundle_path(model_dir, ticker, version):
+    """Retorna o caminho do pacote de uma versão (`bundles/{ticker}/v{versão}.bundle`)."""
+    return os.path.join(bundle_dir(model_dir, ticker), f"v{version:06d}.bundle")
+
+
+# Função para listar as versões do pacote de um ticker
+def list_versions(model_dir, ticker):
+    """
+    Lista as versões publicadas do pacote de um ticker.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+
+    Retorna:
+        list: Versões em ordem crescente (vazia se não houver pacotes).
+    """
+    try:
+        names = os.listdir(bundle_dir(model_dir, ticker))
+    except FileNotFoundError:
+        return []
+    versions = []
+    for name in names:
+        if name.startswith("v") and name.endswith(".bundle") and name[1:-len(".bundle")].isdigit():
+            versions.append(int(name[1:-len(".bundle")]))
+    return sorted(versions)
+
+
+# Função para localizar a versão mais recente do pacote
+def latest_bundle(model_dir, ticker):
+    """
+    Localiza a versão mais recente do pacote de um ticker.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+
+    Retorna:
+        tuple ou None: (versão, caminho) ou None se não houver pacotes.
+    """
+    versions = list_versions(model_dir, ticker)
+    if not versions:
+        return None
+    return versions[-1], bundle_path(model_dir, ticker, versions[-1])
+
+
+# Função para serializar os parâmetros do scaler
+def scaler_state(scaler):
+    """
+    Extrai os parâmetros de um MinMaxScaler ajustado em um dicionário
+    serializável em JSON (os floats do Python preservam os valores exatos).
+
+    Parâmetros:
+        scaler (MinMaxScaler): Scaler ajustado no treinamento.
+
+    Retorna:
+        dict: Parâmetros do scaler.
+
+    Lança:
+        ValueError: Se o scaler não for um MinMaxScaler.
+    """
+    from sklearn.preprocessing import MinMaxScaler
+
+    if not isinstance(scaler, MinMaxScaler):
+        raise ValueError(f"Scaler '{type(scaler).__name__}' não suportado pelo pacote de modelo.")
+    names = getattr(scaler, "feature_names_in_", None)
+    return {
+        "type": "MinMaxScaler",
+        "feature_range": list(scaler.feature_range),
+        "clip": bool(scaler.clip),
+        "n_samples_seen": int(scaler.n_samples_seen_),
+        # Nomes das colunas do ajuste (None se ajustado com um array sem nomes)
+        "feature_names": [str(name) for name in names] if names is not None else None,
+        **{name: np.asarray(getattr(scaler, f"{name}_"), dtype=np.float64).tolist()
+           for name in ("min", "scale", "data_min", "data_max", "data_range")},
+    }
+
+
+# Função para reconstruir o scaler a partir dos parâmetros
+def scaler_from_state(state):
+    """
+    Reconstrói o MinMaxScaler gravado por `scaler_state`, sem reajustá-lo.
+
+    Parâmetros:
+        state (dict): Parâmetros do scaler.
+
+    Retorna:
+        MinMaxScaler: Scaler com os mesmos parâmetros do original.
+    """
+    from sklearn.preprocessing import MinMaxScaler
+
+    scaler = MinMaxScaler(feature_range=tuple(state["feature_range"]), clip=state["clip"])
+    for name in ("min", "scale", "data_min", "data_max", "data_range"):
+        setattr(scaler, f"{name}_", np.asarray(state[name], dtype=np.float64))
+    scaler.n_samples_seen_ = state["n_samples_seen"]
+    scaler.n_features_in_ = len(state["scale"])
+    # Sem os nomes, o scikit-learn avisa a cada `transform` de um DataFrame
+    if state.get("feature_names") is not None:
+        scaler.feature_names_in_ = np.asarray(state["feature_names"], dtype=object)
+    return scaler
+
+
+# Função para gravar uma nova versão do pacote de modelo
+def write_bundle(model_dir, ticker, model, scaler, metadata=None, retention=BUNDLE_RETENTION):
+    """
+    Grava o modelo, o scaler e os metadados do treinamento (inclusive as
+    métricas) em um único arquivo e o publica como a próxima versão do ticker.
+
+    O arquivo contém um cabeçalho JSON (camadas, formato da entrada,
+    parâmetros do scaler e metadados) seguido dos pesos em float32, alinhados
+    para o memory-map. Ele é gravado em um arquivo temporário e publicado com
+    um hard link para o nome da versão, que falha se a versão já existir:
+    um leitor nunca vê um pacote incompleto, o modelo e o scaler de uma versão
+    são sempre os mesmos e as versões só aumentam, mesmo com gravações
+    concorrentes. As versões além de `retention` são removidas.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+        model (Sequential): Modelo Keras treinado.
+        scaler (MinMaxScaler): Scaler ajustado no treinamento.
+        metadata (dict): Metadados serializáveis em JSON (ex.: métricas).
+        retention (int): Quantidade de versões mantidas em disco.
+
+    Retorna:
+        int: Versão publicada.
+    """
+    from utils.numpy_engine import extract_weights
+
+    layers, weights = extract_weights(model)
+    header = json.dumps({
+        "format": BUNDLE_FORMAT,
+        "ticker": ticker,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "input_shape": [int(dim) for dim in model.input_shape[1:]],
+        "layers": layers,
+        "weights": {"dtype": "float32", "count": int(weights.size)},
+        "scaler": scaler_state(scaler),
+        "metadata": metadata or {},
+    }, default=str).encode()
+    padding = -(_PREAMBLE.size + len(header)) % BUNDLE_ALIGNMENT
+
+    directory = bundle_dir(model_dir, ticker)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(BUNDLE_MAGIC, len(header)))
+        f.write(header)
+        f.write(b"\0" * padding)
+        f.write(np.ascontiguousarray(weights, dtype=np.float32).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+    try:
+        versions = list_versions(model_dir, ticker)
+        version = versions[-1] + 1 if versions else 1
+        while True:
+            try:
+                os.link(tmp_path, bundle_path(model_dir, ticker, version))
+                break
+            except FileExistsError:
+                version += 1
+    finally:
+        os.remove(tmp_path)
+
+    prune_bundles(model_dir, ticker, retention)
+    return version
+
+
+# Função para ler um pacote de modelo
+def read_bundle(path, mmap=True):
+    """
+    Lê o cabeçalho de um pacote e mapeia os pesos em memória.
+
+    Parâmetros:
+        path (str): Caminho do pacote.
+        mmap (bool): Mapeia os pesos em memória (somente leitura), em vez de
+            copiá-los, para que vários processos compartilhem a mesma cópia.
+
+    Retorna:
+        tuple: Cabeçalho (dict) e array float32 com os pesos.
+
+    Lança:
+        ValueError: Se o arquivo não for um pacote válido.
+    """
+    with open(path, "rb") as f:
+        magic, header_size = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != BUNDLE_MAGIC:
+            raise ValueError(f"Arquivo '{path}' não é um pacote de modelo.")
+        header = json.loads(f.read(header_size))
+        offset = _PREAMBLE.size + header_size
+        offset += -offset % BUNDLE_ALIGNMENT
+        count = header["weights"]["count"]
+        if not mmap:
+            f.seek(offset)
+            return header, np.fromfile(f, dtype=np.float32, count=count)
+    if count == 0:
+        return header, np.zeros(0, dtype=np.float32)
+    weights = np.memmap(path, dtype=np.float32, mode="r", offset=offset, shape=(count,))
+    # A visão como ndarray mantém o mapeamento, mas os resultados das operações são arrays comuns
+    return header, weights.view(np.ndarray)
+
+
+# Função para carregar o modelo e o scaler de um pacote
+def load_bundle(path, engine="keras", mmap=True):
+    """
+    Carrega o modelo e o scaler de um pacote.
+
+    Com `engine="numpy"`, o modelo é um `NumpyLSTMModel` sobre os pesos
+    mapeados em memória, sem carregar o TensorFlow; com `engine="keras"`, a
+    rede de `build_model` é reconstruída e recebe os pesos do pacote.
+
+    Parâmetros:
+        path (str): Caminho do pacote.
+        engine (str): Motor de inferência: "keras" ou "numpy".
+        mmap (bool): Mapeia os pesos em memória em vez de copiá-los.
+
+    Retorna:
+        tuple: (modelo, scaler, cabeçalho).
+    """
+    header, weights = read_bundle(path, mmap=mmap)
+    scaler = scaler_from_state(header["scaler"])
+    if engine == "numpy":
+        from utils.numpy_engine import NumpyLSTMModel
+
+        return NumpyLSTMModel(header["layers"], weights), scaler, header
+    return keras_model_from_bundle(header, weights), scaler, header
+
+
+# Função para reconstruir o modelo Keras a partir dos pesos do pacote
+def keras_model_from_bundle(header, weights):
+    """
+    Reconstrói o modelo Keras (arquitetura de `build_model`) com os pesos de
+    um pacote.
+
+    Parâmetros:
+        header (dict): Cabeçalho do pacote.
+        weights (np.ndarray): Pesos do pacote.
+
+    Retorna:
+        Sequential: Modelo compilado, pronto para inferência ou para continuar o treinamento.
+
+    Lança:
+        ValueError: Se as camadas do pacote não corresponderem às de `build_model`.
+    """
+    from utils.model_utils import build_model
+
+    arrays = [
+        np.array(weights[spec["offset"]:spec["offset"] + int(np.prod(spec["shape"]))]).reshape(spec["shape"])
+        for layer in header["layers"]
+        for spec in layer["params"].values()
+    ]
+    model = build_model(input_shape=tuple(header["input_shape"]))
+    expected = [tuple(weight.shape) for weight in model.get_weights()]
+    if expected != [array.shape for array in arrays]:
+        raise ValueError("As camadas do pacote não correspondem à arquitetura de build_model.")
+    model.set_weights(arrays)
+    return model
+
+
+# Função para remover as versões antigas do pacote de um ticker
+def prune_bundles(model_dir, ticker, retention=BUNDLE_RETENTION):
+    """
+    Remove as versões mais antigas do pacote de um ticker, mantendo as
+    `retention` mais recentes. Processos que ainda mapeiam um pacote removido
+    continuam a usá-lo até liberá-lo.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+        retention (int): Quantidade de versões mantidas (mínimo: 1).
+
+    Retorna:
+        list: Versões removidas.
+    """
+    removed = []
+    for version in list_versions(model_dir, ticker)[:-max(1, retention)]:
+        try:
+            os.remove(bundle_path(model_dir, ticker, version))
+            removed.append(version)
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+# Função para voltar a uma versão anterior do modelo
+def rollback_bundle(model_dir, ticker, version=None):
+    """
+    Republica uma versão anterior do pacote como a nova versão mais recente e
+    restaura os metadados do treinamento dela. As versões nunca diminuem, de
+    modo que os caches indexados pela versão (registro de modelos, previsões)
+    também são invalidados no rollback.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+        version (int): Versão a restaurar (padrão: a anterior à mais recente).
+
+    Retorna:
+        int: Nova versão, com o conteúdo da versão restaurada.
+
+    Lança:
+        FileNotFoundError: Se a versão não existir (ou não houver versão anterior).
+    """
+    versions = list_versions(model_dir, ticker)
+    if version is None:
+        if len(versions) < 2:
+            raise FileNotFoundError(f"Não há versão anterior do modelo de {ticker}.")
+        version = versions[-2]
+    if version not in versions:
+        raise FileNotFoundError(f"Versão {version} do modelo de {ticker} não encontrada.")
+
+    from utils.model_utils import save_metadata
+
+    # Os pacotes não são alterados depois de publicados: a nova versão é outro nome para o mesmo arquivo
+    source = bundle_path(model_dir, ticker, version)
+    new_version = versions[-1] + 1
+    while True:
+        try:
+            os.link(source, bundle_path(model_dir, ticker, new_version))
+            break
+        except FileExistsError:
+            new_version += 1
+
+    # Os metadados consultados por /status voltam a ser os da versão restaurada
+    header, _ = read_bundle(source)
+    save_metadata(model_dir, ticker, dict(header["metadata"], bundle_version=new_version, restored_from=version))
+    prune_bundles(model_dir, ticker)
+    return new_version
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.model_bundle list AAPL --model-dir models
+    #      python -m utils.model_bundle rollback AAPL [--version 3]
+    parser = argparse.ArgumentParser(description="Lista as versões dos modelos ou volta a uma versão anterior.")
+    parser.add_argument("command", choices=("list", "rollback"))
+    parser.add_argument("ticker", help="Código da ação")
+    parser.add_argument("--version", type=int, help="Versão a restaurar (padrão: a anterior)")
+    parser.add_argument("--model-dir", default="models")
+    args = parser.parse_args()
+    ticker = args.ticker.upper()
+
+    if args.command == "list":
+        for version in list_versions(args.model_dir, ticker):
+            header, _ = read_bundle(bundle_path(args.model_dir, ticker, version))
+            metrics = header["metadata"].get("metrics", {})
+            print(f"v{version}: {header['created_at']}  MAPE={metrics.get('MAPE')}")
+    else:
+        new_version = rollback_bundle(args.model_dir, ticker, args.version)
+        print(f"Modelo de {ticker} restaurado como a versão {new_version}.")
@@ -0,0 +1,326 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.executor import run_blocking
+from utils.metrics import MODEL_CACHE_REQUESTS, MODEL_LOAD_SECONDS
+from utils.singleflight import SingleFlight
+from utils.model_bundle import latest_bundle, load_bundle
+from utils.model_utils import load_trained_model, model_paths, weights_path
+
+# Motores de inferência suportados
+ENGINES = ("keras", "numpy")
+
+# Registros de modelos do processo atual, por (diretório, motor), usados pelos processos em lote
+_process_registries = {}
+_process_registries_lock = threading.Lock()
+
+
+# Registro em memória dos modelos (e scalers) já carregados
+class ModelRegistry:
+    """
+    Mantém em memória os pares (modelo, scaler) já carregados, evitando
+    desserializar o arquivo `.h5` e reconstruir o grafo do TensorFlow a cada
+    requisição.
+
+    Os modelos são lidos dos pacotes versionados (`utils.model_bundle`), que
+    contêm o modelo e o scaler em um único arquivo publicado de forma
+    atômica; sem pacote, são lidos o `.h5` e o `.pkl` do formato anterior.
+    As entradas são indexadas pelo ticker e validadas pela versão em disco
+    (número do pacote ou, no formato anterior, mtime do modelo e do scaler).
+    Quando o treinamento publica uma nova versão, o par é recarregado
+    automaticamente na próxima consulta.
+
+    A remoção segue a política LRU (menos usado recentemente) e respeita um
+    limite de quantidade de modelos e/ou um limite aproximado de memória,
+    estimado a partir do tamanho dos arquivos em disco.
+
+    Com `engine="numpy"`, o registro carrega os pesos no motor NumPy em vez
+    do modelo Keras, mapeando-os diretamente do pacote. No formato anterior,
+    são usados os pesos exportados (`{ticker}_weights.json` e `.npy`); se o
+    arquivo de pesos não existir ou for mais antigo que o `.h5`, ele é
+    exportado a partir do modelo Keras antes do carregamento.
+    """
+
+    def __init__(self, model_dir, max_models=8, max_memory_mb=0, loader=None, engine="keras", load_timeout=None):
+        """
+        Parâmetros:
+            model_dir (str): Diretório onde os modelos treinados estão salvos.
+            max_models (int): Quantidade máxima de modelos em memória (0 = sem limite).
+            max_memory_mb (float): Memória máxima estimada em MB (0 = sem limite).
+            loader (callable): Função opcional que recebe (model_path, scaler_path)
+                e retorna o par (modelo, scaler); para um pacote, recebe o caminho
+                do pacote e None. Usada principalmente em testes.
+            engine (str): Motor de inferência: "keras" ou "numpy".
+            load_timeout (float): Tempo máximo (s) de espera de cada chamada
+                assíncrona pelo carregamento (None = sem limite).
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Motor de inferência desconhecido: {engine}")
+        self.model_dir = model_dir
+        self.max_models = max_models
+        self.max_memory_mb = max_memory_mb
+        self.engine = engine
+        self._loader = loader or (self._numpy_loader if engine == "numpy" else self._default_loader)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Consultas assíncronas concorrentes do mesmo ticker compartilham um único carregamento
+        self._loads = SingleFlight(timeout=load_timeout)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+
+    @staticmethod
+    def _default_loader(model_path, scaler_path):
+        """Carrega o modelo Keras e o scaler a partir do pacote ou dos arquivos informados."""
+        import joblib
+
+        if scaler_path is None:
+            return load_bundle(model_path, engine="keras")[:2]
+        return load_trained_model(model_path), joblib.load(scaler_path)
+
+    @staticmethod
+    def _numpy_loader(weights_file, scaler_path):
+        """Carrega os pesos no motor NumPy e o scaler, a partir do pacote ou dos pesos exportados."""
+        import joblib
+
+        from utils.numpy_engine import load_numpy_model
+
+        if scaler_path is None:
+            return load_bundle(weights_file, engine="numpy")[:2]
+        return load_numpy_model(weights_file), joblib.load(scaler_path)
+
+    def paths(self, ticker):
+        """
+        Retorna os caminhos do modelo e do scaler para um ticker.
+
+        Parâmetros:
+            ticker (str): Código da ação.
+
+        Retorna:
+            tuple: (caminho do modelo, caminho do scaler). Com um pacote, o
+            caminho do pacote e None; no formato anterior com o motor NumPy,
+            o caminho do modelo é o do arquivo de pesos exportado.
+        """
+        _, model_path, scaler_path = self._locate(ticker)
+        return model_path, scaler_path
+
+    def _locate(self, ticker):
+        """
+        Localiza os artefatos atuais do ticker.
+
+        Retorna:
+            tuple: (versão, caminho do modelo, caminho do scaler); a versão é
+            None se os artefatos não existirem.
+        """
+        bundle = latest_bundle(self.model_dir, ticker)
+        if bundle is not None:
+            version, path = bundle
+            return (version,), path, None
+
+        model_path, scaler_path = model_paths(self.model_dir, ticker)
+        if self.engine == "numpy":
+            model_path = weights_path(self.model_dir, ticker)
+        try:
+            return (os.stat(model_path).st_mtime_ns, os.stat(scaler_path).st_mtime_ns), model_path, scaler_path
+        except FileNotFoundError:
+            return None, model_path, scaler_path
+
+    def exists(self, ticker):
+        """Indica se o ticker possui pacote ou modelo e scaler do formato anterior em disco."""
+        if latest_bundle(self.model_dir, ticker) is not None:
+            return True
+        model_path, scaler_path = model_paths(self.model_dir, ticker)
+        return os.path.exists(model_path) and os.path.exists(scaler_path)
+
+    def _export_if_stale(self, ticker):
+        """Exporta os pesos do `.h5` quando o manifesto dos pesos falta ou está desatualizado."""
+        from utils.numpy_engine import export_model
+
+        if latest_bundle(self.model_dir, ticker) is not None:
+            return
+        model_path, _ = model_paths(self.model_dir, ticker)
+        target = weights_path(self.model_dir, ticker)
+        try:
+            model_mtime = os.stat(model_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        try:
+            if os.stat(target).st_mtime_ns >= model_mtime:
+                return
+        except FileNotFoundError:
+            pass
+        export_model(model_path, target)
+
+    def version(self, ticker):
+        """
+        Retorna a versão atual dos artefatos do ticker em disco.
+
+        Retorna:
+            tuple ou None: (número do pacote,) ou, no formato anterior, (mtime
+            do modelo, mtime do scaler) em nanossegundos; None se o modelo não existir.
+        """
+        return self._locate(ticker)[0]
+
+    def get(self, ticker):
+        """
+        Obtém o par (modelo, scaler) de um ticker, carregando-o se necessário.
+
+        Parâmetros:
+            ticker (str): Código da ação.
+
+        Retorna:
+            tuple: (modelo, scaler).
+
+        Lança:
+            FileNotFoundError: Se o modelo ou o scaler não existirem em disco.
+        """
+        model, scaler, _ = self.get_versioned(ticker)
+        return model, scaler
+
+    def get_versioned(self, ticker):
+        """
+        Obtém o modelo e o scaler de um ticker junto com a versão dos
+        artefatos em que foram carregados (ver `version`).
+
+        Parâmetros:
+            ticker (str): Código da ação.
+
+        Retorna:
+            tuple: (modelo, scaler, versão).
+
+        Lança:
+            FileNotFoundError: Se o modelo ou o scaler não existirem em disco.
+        """
+        if self.engine == "numpy":
+            self._export_if_stale(ticker)
+        version, model_path, scaler_path = self._locate(ticker)
+        if version is None:
+            self.invalidate(ticker)
+            raise FileNotFoundError(f"Modelo para {ticker} não encontrado.")
+
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None and entry["version"] == version:
+                self._entries.move_to_end(ticker)
+                self.hits += 1
+                MODEL_CACHE_REQUESTS.labels(self.engine, "hit").inc()
+                return entry["model"], entry["scaler"], version
+            self.misses += 1
+            MODEL_CACHE_REQUESTS.labels(self.engine, "miss").inc()
+            if entry is not None:
+                self.reloads += 1
+
+        # O carregamento é feito fora do lock para não bloquear outros tickers; o modelo e o scaler
+        # são lidos dos mesmos artefatos que definiram a versão
+        start = time.perf_counter()
+        try:
+            size_mb = sum(os.path.getsize(path) for path in (model_path, scaler_path) if path) / (1024 * 1024)
+            model, scaler = self._loader(model_path, scaler_path)
+        except FileNotFoundError:
+            # O pacote localizado foi removido pela retenção de versões: a versão mais recente é mais nova
+            latest = latest_bundle(self.model_dir, ticker)
+            if scaler_path is not None or latest is None or (latest[0],) == version:
+                raise
+            return self.get_versioned(ticker)
+        MODEL_LOAD_SECONDS.labels(self.engine).observe(time.perf_counter() - start)
+
+        with self._lock:
+            self._entries[ticker] = {
+                "version": version,
+                "model": model,
+                "scaler": scaler,
+                "size_mb": size_mb,
+            }
+            self._entries.move_to_end(ticker)
+            self._evict()
+
+        return model, scaler, version
+
+    async def get_async(self, ticker):
+        """Versão assíncrona de `get`, executada no pool de threads."""
+        model, scaler, _ = await self.get_versioned_async(ticker)
+        return model, scaler
+
+    async def get_versioned_async(self, ticker):
+        """
+        Versão assíncrona de `get_versioned`, executada no pool de threads.
+
+        Chamadas concorrentes para o mesmo ticker aguardam a mesma consulta,
+        de modo que um modelo ainda não carregado é lido do disco uma única
+        vez; erros (ex.: FileNotFoundError) são repassados a todas elas.
+
+        Lança:
+            TimeoutError: Se o carregamento não terminar dentro de `load_timeout`.
+        """
+        return await self._loads.run(ticker, run_blocking, self.get_versioned, ticker)
+
+    def _evict(self):
+        """Remove as entradas menos usadas até respeitar os limites configurados."""
+        while len(self._entries) > 1:
+            over_count = self.max_models and len(self._entries) > self.max_models
+            over_memory = self.max_memory_mb and self._memory_mb() > self.max_memory_mb
+            if not (over_count or over_memory):
+                break
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _memory_mb(self):
+        """Memória estimada (em MB) ocupada pelas entradas carregadas."""
+        return sum(entry["size_mb"] for entry in self._entries.values())
+
+    def invalidate(self, ticker=None):
+        """
+        Remove um ticker (ou todos, se nenhum for informado) do registro.
+
+        Parâmetros:
+            ticker (str): Código da ação. Se None, limpa todo o registro.
+        """
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(ticker, None)
+
+    def stats(self):
+        """
+        Retorna os contadores de uso do registro.
+
+        Retorna:
+            dict: Acertos, falhas, remoções, recarregamentos e ocupação atual.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+                "loaded_models": len(self._entries),
+                "memory_mb": round(self._memory_mb(), 3),
+                "max_models": self.max_models,
+                "max_memory_mb": self.max_memory_mb,
+                "engine": self.engine,
+            }
+
+
+# Função para obter o registro de modelos compartilhado pelo processo atual
+def process_registry(model_dir, engine="keras"):
+    """
+    Retorna o registro de modelos do processo atual para o diretório e o
+    motor informados, criado na primeira chamada. Usado pelos processos de
+    backtest e de previsão em lote, que não têm o registro da API.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos treinados estão salvos.
+        engine (str): Motor de inferência: "keras" ou "numpy".
+
+    Retorna:
+        ModelRegistry: O registro do processo.
+    """
+    with _process_registries_lock:
+        registry = _process_registries.get((model_dir, engine))
+        if registry is None:
+            registry = _process_registries[(model_dir, engine)] = ModelRegistry(model_dir, engine=engine)
+        return registry
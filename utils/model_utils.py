@@ -1,5 +1,22 @@
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+import json
+import os
+
+
+# Função para limitar as threads do TensorFlow em cada processo
+def configure_tf_threads(threads):
+    """
+    Limita a quantidade de threads usadas pelo TensorFlow no processo atual,
+    evitando disputa de CPU quando vários processos treinam em paralelo.
+    Deve ser chamada antes de qualquer operação do TensorFlow.
+
+    Parâmetros:
+        threads (int): Quantidade de threads por operação (0 = padrão do TensorFlow).
+    """
+    import tensorflow as tf
+
+    if threads > 0:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(max(1, threads // 2))
 
 
 # Função para construir o modelo LSTM
@@ -13,7 +30,10 @@ def build_model(input_shape):
     Retorna:
         Sequential: O modelo LSTM compilado.
     """
-    from tensorflow.keras.layers import Input  # Importa a camada Input
+    # O TensorFlow é importado apenas quando necessário, para que a inferência
+    # pelo motor NumPy não carregue a biblioteca
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
 
     # Inicializa o modelo sequencial
     model = Sequential()
@@ -34,21 +54,212 @@ def build_model(input_shape):
 
 
 # Função para treinar o modelo
-def train_model(model, X_train, y_train, epochs=10, batch_size=32):
+def train_model(model, X_train, y_train=None, epochs=10, batch_size=32, callbacks=None, validation_data=None):
     """
     Treina o modelo LSTM nos dados fornecidos.
 
     Parâmetros:
         model (Sequential): O modelo LSTM a ser treinado.
-        X_train (np.ndarray): Dados de entrada para treinamento.
-        y_train (np.ndarray): Valores reais (saídas) para treinamento.
+        X_train (np.ndarray ou tf.data.Dataset): Dados de entrada para
+            treinamento ou um dataset de lotes (entradas, saídas), como o
+            criado por `utils.windowing.training_dataset`.
+        y_train (np.ndarray): Valores reais (saídas) para treinamento. Não
+            usado quando `X_train` é um dataset.
         epochs (int): Número de épocas para o treinamento.
-        batch_size (int): Tamanho do batch usado no treinamento.
+        batch_size (int): Tamanho do batch usado no treinamento (com um
+            dataset, o tamanho dos lotes é o do próprio dataset).
+        callbacks (list): Callbacks opcionais do Keras (ex.: acompanhamento de progresso).
+        validation_data: Dados de validação opcionais (tupla (X, y) ou dataset),
+            avaliados ao final de cada época (`val_loss`).
 
     Retorna:
-        None
+        History: Histórico do treinamento retornado pelo Keras.
+    """
+    if y_train is None:
+        return model.fit(X_train, epochs=epochs, verbose=1, callbacks=callbacks, validation_data=validation_data)
+    return model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, verbose=1, callbacks=callbacks,
+                     validation_data=validation_data)
+
+
+# Função para criar o callback que limita a duração do treinamento
+def time_budget_callback(seconds):
+    """
+    Cria um callback do Keras que encerra o treinamento antes da época que
+    ultrapassaria o tempo disponível, estimando a duração da próxima época
+    pela média das épocas já concluídas. A época em andamento nunca é
+    interrompida, de modo que o modelo fica sempre em um estado consistente.
+
+    Parâmetros:
+        seconds (float): Tempo máximo (s) de treinamento.
+
+    Retorna:
+        Callback: Callback do Keras; o atributo `stopped_epoch` indica a época
+        em que o treinamento foi encerrado (None se não foi).
+    """
+    import time
+
+    from tensorflow.keras.callbacks import Callback
+
+    class TimeBudget(Callback):
+        def __init__(self):
+            super().__init__()
+            self.seconds = seconds
+            self.stopped_epoch = None
+
+        def on_train_begin(self, logs=None):
+            self._start = time.perf_counter()
+            self._epochs = 0
+
+        def on_epoch_end(self, epoch, logs=None):
+            self._epochs += 1
+            elapsed = time.perf_counter() - self._start
+            if elapsed + elapsed / self._epochs > self.seconds:
+                self.stopped_epoch = epoch
+                self.model.stop_training = True
+
+    return TimeBudget()
+
+
+# Função para obter os caminhos dos artefatos de um ticker
+def model_paths(model_dir, ticker):
+    """
+    Retorna os caminhos do modelo e do scaler de um ticker.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+
+    Retorna:
+        tuple: (caminho do modelo, caminho do scaler).
+    """
+    model_path = os.path.join(model_dir, f"{ticker}_model.h5")
+    scaler_path = os.path.join(model_dir, f"{ticker}_scaler.pkl")
+    return model_path, scaler_path
+
+
+# Função para verificar se um ticker possui modelo treinado
+def has_trained_model(model_dir, ticker):
     """
-    model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, verbose=1)
+    Indica se o ticker possui um pacote de modelo (`utils.model_bundle`) ou o
+    par modelo `.h5` e scaler `.pkl` do formato anterior.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+
+    Retorna:
+        bool: True se houver modelo treinado.
+    """
+    from utils.model_bundle import list_versions
+
+    return bool(list_versions(model_dir, ticker)) or all(os.path.exists(path) for path in model_paths(model_dir, ticker))
+
+
+# Função para listar os tickers que possuem modelo treinado
+def list_trained_tickers(model_dir):
+    """
+    Lista os tickers com modelo treinado no diretório: com pacote de modelo
+    ou com o modelo e o scaler do formato anterior.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+
+    Retorna:
+        list: Códigos das ações, em ordem alfabética.
+    """
+    try:
+        names = os.listdir(model_dir)
+    except FileNotFoundError:
+        return []
+    tickers = {name[:-len("_model.h5")] for name in names if name.endswith("_model.h5")}
+    try:
+        tickers.update(os.listdir(os.path.join(model_dir, "bundles")))
+    except FileNotFoundError:
+        pass
+    return sorted(ticker for ticker in tickers if has_trained_model(model_dir, ticker))
+
+
+# Função para obter o caminho dos pesos exportados para o motor NumPy
+def weights_path(model_dir, ticker):
+    """
+    Retorna o caminho do manifesto dos pesos usados pelo motor de inferência NumPy.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+
+    Retorna:
+        str: Caminho do arquivo `{ticker}_weights.json`.
+    """
+    return os.path.join(model_dir, f"{ticker}_weights.json")
+
+
+# Função para obter o diretório dos checkpoints de um treinamento em andamento
+def checkpoint_dir(model_dir, ticker):
+    """
+    Retorna o diretório dos checkpoints (por época) do treinamento de um
+    ticker, usados para retomar um treinamento interrompido.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+
+    Retorna:
+        str: Caminho do diretório `checkpoints/{ticker}`.
+    """
+    return os.path.join(model_dir, "checkpoints", ticker)
+
+
+# Função para obter o caminho dos metadados de um ticker
+def metadata_path(model_dir, ticker):
+    """
+    Retorna o caminho do arquivo de metadados (JSON) gravado ao lado do modelo.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+
+    Retorna:
+        str: Caminho do arquivo `{ticker}_meta.json`.
+    """
+    return os.path.join(model_dir, f"{ticker}_meta.json")
+
+
+# Função para salvar os metadados do treinamento
+def save_metadata(model_dir, ticker, metadata):
+    """
+    Grava os metadados do modelo (data de treinamento, métricas etc.) de forma
+    atômica, via arquivo temporário e rename.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+        metadata (dict): Metadados serializáveis em JSON.
+    """
+    path = metadata_path(model_dir, ticker)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+# Função para carregar os metadados do treinamento
+def load_metadata(model_dir, ticker):
+    """
+    Lê os metadados do modelo de um ticker.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+
+    Retorna:
+        dict ou None: Metadados ou None se o arquivo não existir.
+    """
+    try:
+        with open(metadata_path(model_dir, ticker)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
 
 
 # Função para salvar o modelo treinado
@@ -77,6 +288,8 @@ def load_trained_model(model_path):
     Retorna:
         Sequential: O modelo LSTM carregado.
     """
+    from tensorflow.keras.models import load_model
+
     model = load_model(model_path)
     return model
 
@@ -94,15 +307,31 @@ def predict_price(model, X_input, scaler):
     Retorna:
         float: O preço previsto no formato original (desnormalizado).
     """
-    import numpy as np
-
     # Faz a previsão
     prediction = model.predict(X_input)
 
-    # Adiciona zeros para preencher os valores restantes nas colunas desnormalizadas
-    prediction_full = np.concatenate([prediction, np.zeros((prediction.shape[0], 4))], axis=1)
-
     # Realiza a transformação inversa para retornar o preço original
-    predicted_price = scaler.inverse_transform(prediction_full)[:, 0]
+    predicted_price = inverse_transform_close(scaler, prediction)
+
+    return float(predicted_price[0])  # Retorna o primeiro valor previsto
+
+
+# Função para desnormalizar os preços de fechamento previstos
+def inverse_transform_close(scaler, predictions):
+    """
+    Converte previsões normalizadas da coluna 'Close' para o preço original.
+
+    Aplica diretamente os parâmetros da primeira coluna do scaler (a mesma
+    conta de `scaler.inverse_transform`), sem montar as demais colunas.
+
+    Parâmetros:
+        scaler (MinMaxScaler): Scaler usado para normalizar os dados.
+        predictions (np.ndarray): Previsões normalizadas com formato (n, 1) ou (n,).
+
+    Retorna:
+        np.ndarray: Preços desnormalizados com formato (n,).
+    """
+    import numpy as np
 
-    return float(predicted_price[0])  # Retorna o primeiro valor previsto
\ No newline at end of file
+    predictions = np.asarray(predictions, dtype=np.float64).reshape(-1)
+    return (predictions - scaler.min_[0]) / scaler.scale_[0]
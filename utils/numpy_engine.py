@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from utils.model_utils import model_paths, weights_path
+
+# Funções de ativação suportadas nas camadas densas
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "tanh": np.tanh,
+    "sigmoid": lambda x: _sigmoid(x),
+}
+
+
+def _sigmoid(x):
+    """Sigmoide numericamente estável (sem overflow em exp)."""
+    return 0.5 * (np.tanh(0.5 * x) + 1)
+
+
+# Gerações anteriores do arquivo de pesos mantidas em disco após uma exportação
+RETAINED_GENERATIONS = 2
+
+
+# Função para extrair os pesos de um modelo Keras no formato do motor NumPy
+def extract_weights(model):
+    """
+    Extrai os pesos de um modelo Keras sequencial (LSTM, Dense e Dropout) em
+    um único array float32, acompanhado da descrição das camadas e da
+    posição de cada peso no array (o manifesto usado por `NumpyLSTMModel`).
+
+    Parâmetros:
+        model (Sequential): Modelo Keras treinado.
+
+    Retorna:
+        tuple: Descrição das camadas (list) e array float32 com todos os pesos.
+
+    Lança:
+        ValueError: Se o modelo contiver camadas ou configurações não suportadas.
+    """
+    layers, arrays = [], []
+    offset = 0
+
+    def add(name, value):
+        nonlocal offset
+        value = np.asarray(value, dtype=np.float32)
+        arrays.append(value.ravel())
+        params[name] = {"offset": offset, "shape": list(value.shape)}
+        offset += value.size
+
+    for layer in model.layers:
+        kind = type(layer).__name__
+        config = layer.get_config()
+        if kind == "Dropout":
+            continue  # Dropout não atua na inferência
+        weights = layer.get_weights()
+        params = {}
+        if kind == "LSTM":
+            unsupported = (
+                config.get("activation") != "tanh"
+                or config.get("recurrent_activation") != "sigmoid"
+                or not config.get("use_bias", True)
+                or config.get("go_backwards")
+                or config.get("stateful")
+                or config.get("return_state")
+            )
+            if unsupported:
+                raise ValueError(f"Configuração da camada LSTM '{layer.name}' não suportada.")
+            for name, value in zip(("kernel", "recurrent_kernel", "bias"), weights):
+                add(name, value)
+            layers.append({"type": "lstm", "return_sequences": bool(config.get("return_sequences")), "params": params})
+        elif kind == "Dense":
+            activation = config.get("activation") or "linear"
+            if activation not in ACTIVATIONS or not config.get("use_bias", True):
+                raise ValueError(f"Configuração da camada Dense '{layer.name}' não suportada.")
+            for name, value in zip(("kernel", "bias"), weights):
+                add(name, value)
+            layers.append({"type": "dense", "activation": activation, "params": params})
+        else:
+            raise ValueError(f"Camada '{kind}' não suportada pelo motor NumPy.")
+
+    return layers, np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.float32)
+
+
+# Função para exportar os pesos de um modelo Keras
+def export_weights(model, path):
+    """
+    Extrai os pesos de um modelo Keras sequencial (ver `extract_weights`) e os
+    grava em um formato que pode ser carregado apenas com NumPy:
+
+    - `{ticker}_weights.{geração}.npy`: todos os pesos em um único array
+      float32, que os processos da API mapeiam em memória (somente leitura),
+      compartilhando uma única cópia física;
+    - `{ticker}_weights.json` (`path`): manifesto com as camadas, a posição de
+      cada peso no array e o nome do arquivo da geração atual.
+
+    Cada exportação grava uma nova geração e só então substitui o manifesto
+    de forma atômica, de modo que os processos que ainda usam a geração
+    anterior não sejam afetados. As gerações mais antigas são removidas.
+
+    Parâmetros:
+        model (Sequential): Modelo Keras treinado.
+        path (str): Caminho do manifesto (`{ticker}_weights.json`).
+
+    Lança:
+        ValueError: Se o modelo contiver camadas ou configurações não suportadas.
+    """
+    layers, weights = extract_weights(model)
+
+    directory = os.path.dirname(path)
+    prefix = _generation_prefix(path)
+    data_file = f"{prefix}.{time.time_ns()}.npy"
+
+    # Grava a nova geração dos pesos e, por último, o manifesto que aponta para ela
+    tmp_path = os.path.join(directory, f"{data_file}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, weights)
+    os.replace(tmp_path, os.path.join(directory, data_file))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"format": 1, "file": data_file, "dtype": "float32", "layers": layers}, f)
+    os.replace(tmp_path, path)
+
+    _remove_old_generations(directory, prefix)
+
+
+def _generation_prefix(path):
+    """Prefixo dos arquivos de pesos de um manifesto (`{ticker}_weights`)."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _remove_old_generations(directory, prefix):
+    """
+    Remove as gerações antigas dos pesos, mantendo as RETAINED_GENERATIONS
+    mais recentes. Processos que ainda mapeiam um arquivo removido continuam
+    a usá-lo até liberá-lo.
+    """
+    generations = []
+    for name in os.listdir(directory or "."):
+        parts = name.split(".")
+        if len(parts) == 3 and parts[0] == prefix and parts[1].isdigit() and parts[2] == "npy":
+            generations.append((int(parts[1]), name))
+    for _, name in sorted(generations)[:-RETAINED_GENERATIONS]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+# Função para exportar os pesos a partir do arquivo .h5
+def export_model(model_path, path):
+    """
+    Carrega um modelo `.h5` com o Keras e exporta os seus pesos para o motor NumPy.
+
+    Parâmetros:
+        model_path (str): Caminho do modelo Keras.
+        path (str): Caminho do manifesto de destino (`{ticker}_weights.json`).
+    """
+    from utils.model_utils import load_trained_model
+
+    export_weights(load_trained_model(model_path), path)
+
+
+# Modelo LSTM executado apenas com NumPy
+class NumpyLSTMModel:
+    """
+    Reproduz a inferência de um modelo sequencial LSTM/Dense exportado por
+    `export_weights`, sem depender do TensorFlow.
+
+    A projeção da entrada é calculada para todos os passos de uma só vez e o
+    laço recorrente processa o lote inteiro em cada passo. A ordem das
+    portas segue a do Keras: entrada, esquecimento, candidata e saída.
+    """
+
+    def __init__(self, layers, weights):
+        """
+        Parâmetros:
+            layers (list): Descrição das camadas (manifesto do arquivo exportado).
+            weights (np.ndarray): Array float32 com todos os pesos, na ordem do manifesto.
+        """
+        self.weights = weights
+        self.layers = []
+        for layer in layers:
+            params = {
+                name: weights[spec["offset"]:spec["offset"] + int(np.prod(spec["shape"]))].reshape(spec["shape"])
+                for name, spec in layer["params"].items()
+            }
+            self.layers.append((layer, params))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Carrega um modelo exportado.
+
+        Parâmetros:
+            path (str): Caminho do manifesto (`{ticker}_weights.json`).
+            mmap (bool): Mapeia os pesos em memória (somente leitura), em vez de
+                copiá-los, para que vários processos compartilhem a mesma cópia.
+
+        Retorna:
+            NumpyLSTMModel: Modelo pronto para inferência.
+        """
+        # O manifesto é relido caso a geração indicada tenha acabado de ser removida
+        for attempt in range(2):
+            with open(path) as f:
+                manifest = json.load(f)
+            data_path = os.path.join(os.path.dirname(path), manifest["file"])
+            try:
+                weights = np.load(data_path, mmap_mode="r" if mmap else None)
+                break
+            except FileNotFoundError:
+                if attempt:
+                    raise
+        # A visão como ndarray mantém o mapeamento, mas os resultados das operações são arrays comuns
+        return cls(manifest["layers"], weights.view(np.ndarray))
+
+    def predict(self, X, verbose=0, batch_size=None):
+        """
+        Faz previsões para um lote de janelas.
+
+        Parâmetros:
+            X (np.ndarray): Entrada com formato (n, timesteps, features).
+            verbose (int): Ignorado; mantido por compatibilidade com o Keras.
+            batch_size (int): Ignorado; o lote é processado de uma só vez.
+
+        Retorna:
+            np.ndarray: Previsões com formato (n, saídas), em float32.
+        """
+        x = np.asarray(X, dtype=np.float32)
+        for layer, params in self.layers:
+            if layer["type"] == "lstm":
+                x = self._lstm(x, params["kernel"], params["recurrent_kernel"], params["bias"],
+                               layer["return_sequences"])
+            else:
+                x = ACTIVATIONS[layer["activation"]](x @ params["kernel"] + params["bias"])
+        return x
+
+    @staticmethod
+    def _lstm(x, kernel, recurrent_kernel, bias, return_sequences):
+        """Executa uma camada LSTM sobre um lote com formato (n, timesteps, features)."""
+        batch, steps = x.shape[0], x.shape[1]
+        units = recurrent_kernel.shape[0]
+        projected = x @ kernel + bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = np.empty((batch, steps, units), dtype=np.float32) if return_sequences else None
+        for t in range(steps):
+            z = projected[:, t] + h @ recurrent_kernel
+            gates = _sigmoid(z)
+            candidate = np.tanh(z[:, 2 * units:3 * units])
+            c = gates[:, units:2 * units] * c + gates[:, :units] * candidate
+            h = gates[:, 3 * units:] * np.tanh(c)
+            if outputs is not None:
+                outputs[:, t] = h
+        return outputs if return_sequences else h
+
+
+# Função para carregar um modelo exportado
+def load_numpy_model(path, mmap=True):
+    """
+    Carrega um modelo exportado para o motor NumPy.
+
+    Parâmetros:
+        path (str): Caminho do manifesto (`{ticker}_weights.json`).
+        mmap (bool): Mapeia os pesos em memória em vez de copiá-los.
+
+    Retorna:
+        NumpyLSTMModel: Modelo pronto para inferência.
+    """
+    return NumpyLSTMModel.load(path, mmap=mmap)
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.numpy_engine AAPL MSFT --model-dir models
+    parser = argparse.ArgumentParser(description="Exporta os pesos dos modelos treinados para o motor NumPy.")
+    parser.add_argument("tickers", nargs="+", help="Códigos das ações")
+    parser.add_argument("--model-dir", default="models")
+    args = parser.parse_args()
+
+    for ticker in args.tickers:
+        ticker = ticker.upper()
+        model_path, _ = model_paths(args.model_dir, ticker)
+        export_model(model_path, weights_path(args.model_dir, ticker))
+        print(f"Pesos de {ticker} exportados para {weights_path(args.model_dir, ticker)}.")
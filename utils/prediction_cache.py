@@ -0,0 +1,142 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from utils.metrics import PREDICTION_CACHE_REQUESTS
+
+
+# Cache das previsões de /predict
+class PredictionCache:
+    """
+    Guarda a última previsão de cada par (ticker, motor de inferência),
+    associada à versão do modelo e à data do último pregão usado como
+    entrada.
+
+    A previsão do próximo fechamento só muda quando o modelo é retreinado
+    (a versão dos arquivos em disco muda) ou quando chega um novo pregão, de
+    modo que uma consulta com a mesma versão e a mesma data pode ser
+    respondida sem pré-processamento nem inferência. Qualquer diferença na
+    chave substitui a entrada anterior, o que invalida automaticamente as
+    previsões de um modelo retreinado.
+
+    As entradas expiram após `ttl_seconds` e a remoção segue a política LRU
+    quando o limite de entradas é atingido.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600.0, clock=time.monotonic):
+        """
+        Parâmetros:
+            max_entries (int): Quantidade máxima de entradas (0 = cache desativado).
+            ttl_seconds (float): Validade de cada entrada, em segundos (0 = sem expiração).
+            clock (callable): Relógio usado para a expiração. Usado principalmente em testes.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(ticker, engine, model_version, last_bar):
+        """
+        Monta a chave de uma previsão.
+
+        Parâmetros:
+            ticker (str): Código da ação.
+            engine (str): Motor de inferência.
+            model_version (tuple): Versão dos artefatos do modelo (`ModelRegistry.version`).
+            last_bar (str): Data do último pregão usado como entrada.
+
+        Retorna:
+            tuple: Chave da previsão.
+        """
+        return ticker, engine, tuple(model_version), str(last_bar)
+
+    @staticmethod
+    def etag(key):
+        """Retorna o ETag (entre aspas) correspondente à chave de uma previsão."""
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+        return f'"{digest}"'
+
+    def get(self, key):
+        """
+        Retorna a previsão armazenada para a chave, se existir e não tiver expirado.
+
+        Parâmetros:
+            key (tuple): Chave montada por `key`.
+
+        Retorna:
+            float ou None: Preço previsto ou None se não houver previsão válida.
+        """
+        if not self.max_entries:
+            return None
+        slot = key[:2]
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry is not None and entry["key"] == key and not self._expired(entry):
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                PREDICTION_CACHE_REQUESTS.labels("hit").inc()
+                return entry["value"]
+            if entry is not None and (entry["key"] != key or self._expired(entry)):
+                del self._entries[slot]
+            self.misses += 1
+        PREDICTION_CACHE_REQUESTS.labels("miss").inc()
+        return None
+
+    def put(self, key, value):
+        """
+        Armazena a previsão de uma chave, substituindo a do mesmo ticker e motor.
+
+        Parâmetros:
+            key (tuple): Chave montada por `key`.
+            value (float): Preço previsto.
+        """
+        if not self.max_entries:
+            return
+        slot = key[:2]
+        with self._lock:
+            self._entries[slot] = {"key": key, "value": value, "stored_at": self._clock()}
+            self._entries.move_to_end(slot)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _expired(self, entry):
+        """Indica se uma entrada passou do prazo de validade."""
+        return bool(self.ttl_seconds) and self._clock() - entry["stored_at"] > self.ttl_seconds
+
+    def invalidate(self, ticker=None):
+        """
+        Remove as previsões de um ticker (ou todas, se nenhum for informado).
+
+        Parâmetros:
+            ticker (str): Código da ação. Se None, limpa todo o cache.
+        """
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+            else:
+                for slot in [slot for slot in self._entries if slot[0] == ticker]:
+                    del self._entries[slot]
+
+    def stats(self):
+        """
+        Retorna os contadores de uso do cache.
+
+        Retorna:
+            dict: Acertos, falhas, remoções e ocupação atual.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+# Tabela local das previsões calculadas em lote (ver utils.batch_scoring)
+# PREDICTION_TABLE_PATH: caminho do arquivo da tabela
+# PREDICTION_TABLE_MAX_AGE: idade máxima (s) de uma previsão servida pela tabela
+PREDICTION_TABLE_PATH = os.getenv("PREDICTION_TABLE_PATH", os.path.join("data", "predictions.json"))
+PREDICTION_TABLE_MAX_AGE = float(os.getenv("PREDICTION_TABLE_MAX_AGE", "86400"))
+
+
+# Tabela das previsões do próximo fechamento calculadas em lote
+class PredictionTable:
+    """
+    Previsões do próximo fechamento de todos os tickers, calculadas em lote
+    e gravadas em um único arquivo JSON compacto:
+
+        {"TICKER": {"predicted_price": ..., "engine": ..., "model_version": [...],
+                    "last_date": "AAAA-MM-DD", "scored_at": "ISO 8601"}, ...}
+
+    O arquivo é substituído de forma atômica a cada execução do lote. Os
+    leitores mantêm a tabela em memória e só a releem quando o arquivo muda
+    (inode, mtime ou tamanho), de modo que cada consulta custa um `os.stat`
+    e uma busca em dicionário, independentemente da quantidade de tickers.
+
+    Uma previsão só é servida enquanto estiver fresca: calculada com a versão
+    atual do modelo e há no máximo `max_age` segundos.
+    """
+
+    def __init__(self, path=PREDICTION_TABLE_PATH, max_age=PREDICTION_TABLE_MAX_AGE):
+        """
+        Parâmetros:
+            path (str): Caminho do arquivo da tabela.
+            max_age (float): Idade máxima (s) de uma previsão fresca (0 = sem limite).
+        """
+        self.path = path
+        self.max_age = max_age
+        self._entries = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _current(self):
+        """Retorna as entradas em memória, relendo o arquivo se ele mudou."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return {}
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                try:
+                    with open(self.path) as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Erro ao ler a tabela de previsões {self.path}: {e}")
+                    self._entries = {}
+                self._stamp = stamp
+            return self._entries
+
+    def get(self, ticker):
+        """Retorna a entrada do ticker (ou None), sem verificar se está fresca."""
+        return self._current().get(ticker)
+
+    def age(self, entry, now=None):
+        """Idade (s) de uma entrada."""
+        now = now or datetime.now(timezone.utc)
+        return (now - datetime.fromisoformat(entry["scored_at"])).total_seconds()
+
+    def is_fresh(self, entry, model_version):
+        """
+        Indica se uma entrada ainda pode ser servida.
+
+        Parâmetros:
+            entry (dict): Entrada da tabela.
+            model_version (tuple): Versão atual do modelo no motor da entrada
+                (ver `ModelRegistry.version`).
+
+        Retorna:
+            bool: True se a entrada foi calculada com a versão atual do modelo
+            e não é mais antiga que `max_age`.
+        """
+        if model_version is None or tuple(entry["model_version"]) != tuple(model_version):
+            return False
+        return not self.max_age or self.age(entry) <= self.max_age
+
+    def update(self, entries, keep=None):
+        """
+        Grava novas entradas na tabela, de forma atômica (arquivo temporário e rename).
+
+        Parâmetros:
+            entries (dict): Novas entradas, por ticker; substituem as existentes.
+            keep (collection): Tickers cujas entradas anteriores são mantidas
+                (padrão: todas); as dos demais tickers são removidas.
+
+        Retorna:
+            int: Quantidade de entradas da tabela gravada.
+        """
+        current = {ticker: entry for ticker, entry in self._current().items() if keep is None or ticker in keep}
+        current.update(entries)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(current, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        return len(current)
@@ -0,0 +1,74 @@
+import asyncio
+
+
+# Agrupador de chamadas concorrentes com a mesma chave
+class SingleFlight:
+    """
+    Garante no máximo uma operação em andamento por chave: enquanto uma
+    chamada para a chave está em execução, as chamadas seguintes aguardam e
+    recebem o mesmo resultado (ou a mesma exceção), em vez de repetirem a
+    operação. Assim que a operação termina, a chave é liberada e a próxima
+    chamada executa a operação novamente.
+
+    O tempo máximo de espera vale para cada chamador: ao expirar, o chamador
+    recebe `TimeoutError`, mas a operação continua e pode ser aproveitada
+    pelos chamadores seguintes. O cancelamento de um chamador (por exemplo,
+    quando o cliente desconecta) também não interrompe a operação.
+    """
+
+    def __init__(self, timeout=None):
+        """
+        Parâmetros:
+            timeout (float): Tempo máximo (s) de espera de cada chamador (None = sem limite).
+        """
+        self.timeout = timeout
+        self._calls = {}
+        self.executions = 0
+        self.shared = 0
+
+    async def do(self, key, func, *args, **kwargs):
+        """
+        Executa `func(*args, **kwargs)` para a chave, ou aguarda a execução já
+        em andamento.
+
+        Parâmetros:
+            key: Chave da operação (ex.: o ticker).
+            func (callable): Função assíncrona que realiza a operação.
+            *args, **kwargs: Argumentos repassados à função.
+
+        Retorna:
+            tuple: (resultado, compartilhado), em que `compartilhado` indica se
+            o chamador aproveitou uma operação iniciada por outro.
+
+        Lança:
+            TimeoutError: Se a operação não terminar dentro de `timeout`.
+            Exception: A exceção lançada pela operação, para todos os chamadores.
+        """
+        task = self._calls.get(key)
+        # Uma operação de outro event loop (já encerrado) não pode ser aguardada
+        shared = task is not None and task.get_loop() is asyncio.get_running_loop()
+        if shared:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+            self.executions += 1
+        return await asyncio.wait_for(asyncio.shield(task), self.timeout), shared
+
+    async def run(self, key, func, *args, **kwargs):
+        """Igual a `do`, mas retorna apenas o resultado da operação."""
+        result, _ = await self.do(key, func, *args, **kwargs)
+        return result
+
+    def _forget(self, key, finished):
+        """Libera a chave ao fim da operação."""
+        if self._calls.get(key) is finished:
+            del self._calls[key]
+        # Marca a exceção como tratada, mesmo que todos os chamadores tenham desistido
+        if not finished.cancelled():
+            finished.exception()
+
+    def in_flight(self):
+        """Quantidade de operações em andamento."""
+        return len(self._calls)
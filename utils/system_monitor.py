@@ -0,0 +1,83 @@
+import shutil
+import threading
+
+import psutil
+
+
+# Amostrador do uso de recursos do sistema em segundo plano
+class SystemMonitor:
+    """
+    Coleta periodicamente o uso de CPU, memória e disco em uma thread de
+    segundo plano, de modo que a leitura (`snapshot`) seja instantânea e não
+    precise aguardar o intervalo de medição da CPU.
+    """
+
+    def __init__(self, interval=5.0, disk_path="/"):
+        """
+        Parâmetros:
+            interval (float): Intervalo (s) entre as amostras.
+            disk_path (str): Caminho usado para medir o uso de disco.
+        """
+        self.interval = interval
+        self.disk_path = disk_path
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        """
+        Coleta uma amostra do uso de recursos sem bloquear.
+
+        Retorna:
+            dict: Uso de CPU (%), memória (MB) e disco (GB).
+        """
+        # Com interval=None, a CPU é medida desde a chamada anterior
+        cpu_usage = psutil.cpu_percent(interval=None)
+        memory = psutil.virtual_memory()
+        disk = shutil.disk_usage(self.disk_path)
+
+        return {
+            "cpu_usage_percent": cpu_usage,
+            "memory_total_mb": memory.total / (1024 * 1024),
+            "memory_available_mb": memory.available / (1024 * 1024),
+            "disk_total_gb": disk.total / (1024 * 1024 * 1024),
+            "disk_used_gb": disk.used / (1024 * 1024 * 1024),
+            "disk_free_gb": disk.free / (1024 * 1024 * 1024),
+        }
+
+    def _run(self):
+        """Laço da thread de amostragem."""
+        while not self._stop_event.is_set():
+            snapshot = self.sample()
+            with self._lock:
+                self._snapshot = snapshot
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """Inicia a thread de amostragem (se ainda não estiver em execução)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="system-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Encerra a thread de amostragem."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def snapshot(self):
+        """
+        Retorna a amostra mais recente. Se a thread ainda não coletou nenhuma,
+        faz uma coleta imediata (sem bloquear).
+
+        Retorna:
+            dict: Uso de CPU (%), memória (MB) e disco (GB).
+        """
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.sample()
+        return dict(snapshot)
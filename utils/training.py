@@ -0,0 +1,505 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.data_preprocessing import (
+    get_stock_data,
+    scale_training_series,
+    scale_incremental_series,
+    check_scaler_drift,
+    data_end_date,
+    settled_end_date,
+    START_DATE,
+)
+from utils.market_data import get_market_data_store
+from utils.evaluation import evaluate_model
+from utils.model_utils import (
+    build_model,
+    train_model,
+    time_budget_callback,
+    model_paths,
+    has_trained_model,
+    checkpoint_dir,
+    configure_tf_threads,
+    save_metadata,
+    load_metadata,
+    load_trained_model,
+    list_trained_tickers,
+)
+from utils.model_bundle import latest_bundle, load_bundle, read_bundle, scaler_from_state, write_bundle
+from utils.metrics import track_stage, training_metrics_callback
+from utils.windowing import SEQUENCE_LENGTH, training_dataset, split_validation
+
+# Treinamento completo: o número de épocas é um limite; o treinamento termina
+# antes quando a perda de validação para de melhorar ou o tempo acaba
+# TRAINING_MAX_EPOCHS: número máximo de épocas
+# TRAINING_TIME_BUDGET: tempo máximo (s) de cada treinamento (0 = sem limite)
+# EARLY_STOPPING_PATIENCE: épocas sem melhora da validação antes de encerrar
+# VALIDATION_FRACTION: fração das janelas mais recentes reservada para validação
+DEFAULT_EPOCHS = int(os.getenv("TRAINING_MAX_EPOCHS", "30"))
+TRAINING_TIME_BUDGET = float(os.getenv("TRAINING_TIME_BUDGET", "0")) or None
+EARLY_STOPPING_PATIENCE = int(os.getenv("EARLY_STOPPING_PATIENCE", "3"))
+VALIDATION_FRACTION = float(os.getenv("VALIDATION_FRACTION", "0.1"))
+
+# Número de épocas e taxa de aprendizado do ajuste incremental (apenas sobre os novos pregões)
+INCREMENTAL_EPOCHS = 3
+INCREMENTAL_LEARNING_RATE = 1e-4
+
+# Excesso máximo dos novos dados em relação à faixa do scaler (fração da faixa)
+# antes de o ajuste incremental ser trocado por um treinamento completo
+RETRAIN_DRIFT_TOLERANCE = float(os.getenv("RETRAIN_DRIFT_TOLERANCE", "0.1"))
+
+
+# Função para treinar e salvar o modelo de um ticker
+def train_and_save_model(ticker, model_dir="models", epochs=DEFAULT_EPOCHS, callbacks=None,
+                         time_budget=TRAINING_TIME_BUDGET, patience=EARLY_STOPPING_PATIENCE,
+                         validation_fraction=VALIDATION_FRACTION):
+    """
+    Realiza o treinamento do modelo e o publica no diretório especificado
+    como uma nova versão do pacote do ticker (`bundles/{ticker}`, com o
+    modelo, o scaler e os metadados em um único arquivo), além do arquivo de
+    metadados (`{ticker}_meta.json`) que contém as métricas de avaliação
+    calculadas ao final do treinamento.
+
+    As janelas mais recentes são reservadas para validação: o treinamento
+    termina quando a perda de validação deixa de melhorar (restaurando os
+    melhores pesos), quando o tempo disponível acaba ou ao atingir `epochs`,
+    e a taxa de aprendizado é reduzida quando a validação estagna. Ao fim de
+    cada época é gravado um checkpoint (`checkpoints/{ticker}`); se o
+    processo for interrompido, o próximo treinamento do ticker continua a
+    partir da última época concluída.
+
+    Parâmetros:
+        ticker (str): Código da ação para treinamento.
+        model_dir (str): Diretório onde o modelo e o scaler serão salvos.
+        epochs (int): Número máximo de épocas de treinamento.
+        callbacks (list): Callbacks opcionais do Keras (ex.: progresso do job).
+        time_budget (float): Tempo máximo (s) de treinamento (None = sem limite).
+        patience (int): Épocas sem melhora da validação antes de encerrar.
+        validation_fraction (float): Fração das janelas usada na validação.
+
+    Lança:
+        ValueError: Se não houver dados para o ticker.
+    """
+    # Busca os dados históricos
+    with track_stage("training", "data_fetch", ticker):
+        df = get_stock_data(ticker)
+    if df is None or df.empty:
+        raise ValueError(f"Nenhum dado encontrado para o ticker {ticker}.")
+
+    # Normaliza a série em float32; as janelas são geradas sob demanda durante o treinamento
+    with track_stage("training", "preprocess", ticker):
+        scaled_data, scaler = scale_training_series(df, dtype=np.float32)
+        train_series, validation_series = split_validation(scaled_data, validation_fraction, SEQUENCE_LENGTH)
+        dataset, samples = training_dataset(train_series, SEQUENCE_LENGTH)
+        validation = None
+        if validation_series is not None:
+            validation, _ = training_dataset(validation_series, SEQUENCE_LENGTH, shuffle=False)
+    if samples == 0:
+        raise ValueError(f"Dados insuficientes para treinar o modelo do ticker {ticker}.")
+
+    # Constrói e treina o modelo, registrando a duração e a vazão de cada época
+    with track_stage("training", "fit", ticker):
+        model = build_model(input_shape=(SEQUENCE_LENGTH, scaled_data.shape[1]))
+        schedule = schedule_callbacks(checkpoint_dir(model_dir, ticker), time_budget, patience,
+                                      monitor="val_loss" if validation is not None else "loss")
+        callbacks = list(schedule.values()) + list(callbacks or []) + [training_metrics_callback(ticker, samples)]
+        start = time.perf_counter()
+        history = train_model(model, dataset, epochs=epochs, callbacks=callbacks, validation_data=validation)
+        report = schedule_report(history, schedule, epochs, time.perf_counter() - start)
+
+    # Calcula as métricas uma única vez, ao final do treinamento
+    with track_stage("training", "evaluate", ticker):
+        metrics = evaluate_model(model, scaler, df)
+
+    # Publica o modelo, o scaler e os metadados como uma nova versão do pacote
+    with track_stage("training", "save", ticker):
+        metadata = build_metadata(ticker, df, history, samples, metrics, report)
+        metadata["bundle_version"] = write_bundle(model_dir, ticker, model, scaler, metadata)
+        save_metadata(model_dir, ticker, metadata)
+
+    print(f"Modelo para {ticker} salvo com sucesso ({report['epochs_run']} épocas, {report['stopped_by']}).")
+
+
+# Função para criar os callbacks que controlam a duração do treinamento
+def schedule_callbacks(backup_dir, time_budget=None, patience=EARLY_STOPPING_PATIENCE, monitor="val_loss"):
+    """
+    Cria os callbacks do Keras que controlam o treinamento completo.
+
+    Parâmetros:
+        backup_dir (str): Diretório dos checkpoints por época (None = sem checkpoints).
+        time_budget (float): Tempo máximo (s) de treinamento (None = sem limite).
+        patience (int): Épocas sem melhora de `monitor` antes de encerrar.
+        monitor (str): Perda acompanhada ('val_loss' ou 'loss').
+
+    Retorna:
+        dict: Callbacks por nome ('checkpoint', 'early_stopping', 'reduce_lr'
+        e 'time_budget'), na ordem em que devem ser passados ao Keras.
+    """
+    from tensorflow.keras.callbacks import BackupAndRestore, EarlyStopping, ReduceLROnPlateau
+
+    schedule = {}
+    if backup_dir:
+        # Restaura os pesos e a época da última execução interrompida; é removido ao final
+        schedule["checkpoint"] = BackupAndRestore(backup_dir)
+    schedule["early_stopping"] = EarlyStopping(monitor=monitor, patience=patience, restore_best_weights=True)
+    schedule["reduce_lr"] = ReduceLROnPlateau(monitor=monitor, factor=0.5, patience=max(1, patience - 1),
+                                              min_lr=1e-5)
+    if time_budget:
+        schedule["time_budget"] = time_budget_callback(time_budget)
+    return schedule
+
+
+def schedule_report(history, schedule, max_epochs, seconds):
+    """
+    Resume como o treinamento terminou.
+
+    Parâmetros:
+        history (History): Histórico retornado pelo Keras.
+        schedule (dict): Callbacks criados por `schedule_callbacks`.
+        max_epochs (int): Número máximo de épocas.
+        seconds (float): Duração do treinamento (s).
+
+    Retorna:
+        dict: Épocas executadas, motivo do encerramento ('early_stopping',
+        'time_budget' ou 'max_epochs'), época de retomada (se o treinamento
+        continuou de um checkpoint), melhor perda de validação e duração.
+    """
+    if schedule["early_stopping"].stopped_epoch > 0:
+        stopped_by = "early_stopping"
+    elif "time_budget" in schedule and schedule["time_budget"].stopped_epoch is not None:
+        stopped_by = "time_budget"
+    else:
+        stopped_by = "max_epochs"
+    val_losses = history.history.get("val_loss", [])
+    return {
+        "max_epochs": max_epochs,
+        "epochs_run": len(history.epoch),
+        "resumed_from_epoch": history.epoch[0] if history.epoch and history.epoch[0] > 0 else None,
+        "stopped_by": stopped_by,
+        "best_val_loss": float(min(val_losses)) if val_losses else None,
+        "seconds": seconds,
+    }
+
+
+# Função para atualizar um modelo existente apenas com os novos pregões
+def retrain_incremental(ticker, model_dir="models", epochs=INCREMENTAL_EPOCHS, callbacks=None,
+                        drift_tolerance=RETRAIN_DRIFT_TOLERANCE, time_budget=TRAINING_TIME_BUDGET,
+                        on_full_training=None):
+    """
+    Ajusta o modelo salvo (warm start) com os pregões posteriores à data final
+    do último treinamento (`data_end` nos metadados), mantendo o scaler, e
+    publica o resultado como uma nova versão do pacote. O custo do ajuste
+    cresce com a quantidade de novos pregões, não com o histórico; as métricas
+    de avaliação são recalculadas com o modelo ajustado, nos últimos 20% dos
+    dados, como no treinamento completo.
+
+    Quando os novos dados saem da faixa do scaler além de `drift_tolerance`,
+    o scaler precisa ser reajustado e é feito um treinamento completo (com o
+    número de épocas padrão do treinamento completo e o mesmo `time_budget`).
+
+    Parâmetros:
+        ticker (str): Código da ação.
+        model_dir (str): Diretório onde o modelo está salvo.
+        epochs (int): Número de épocas do ajuste incremental.
+        callbacks (list): Callbacks opcionais do Keras (ex.: progresso do job).
+        drift_tolerance (float): Tolerância da verificação de drift.
+        time_budget (float): Tempo máximo (s) de treinamento (None = sem limite).
+        on_full_training (callable): Chamada com o número máximo de épocas
+            antes do treinamento completo causado por drift (ex.: para
+            atualizar o total de épocas de um job).
+
+    Retorna:
+        dict: 'mode' ('incremental', 'full' ou 'up_to_date'), quantidade de
+        novos pregões ('new_bars'), janelas de treinamento ('samples') e o
+        resultado da verificação de drift ('drift').
+
+    Lança:
+        FileNotFoundError: Se o modelo, o scaler ou os metadados não existirem.
+        ValueError: Se não houver dados para o ticker.
+    """
+    from tensorflow.keras.optimizers import Adam
+
+    metadata = load_metadata(model_dir, ticker)
+    if not has_trained_model(model_dir, ticker) or not (metadata or {}).get("data_end"):
+        raise FileNotFoundError(f"Modelo ou metadados não encontrados para o ticker {ticker}.")
+
+    with track_stage("retrain", "data_fetch", ticker):
+        df = get_stock_data(ticker)
+    if df is None or df.empty:
+        raise ValueError(f"Nenhum dado encontrado para o ticker {ticker}.")
+
+    # Normaliza com o scaler existente apenas os novos pregões (e o contexto das janelas)
+    with track_stage("retrain", "preprocess", ticker):
+        scaler = load_saved_model(model_dir, ticker, scaler_only=True)
+        scaled_data, new_bars = scale_incremental_series(df, scaler, metadata["data_end"], dtype=np.float32)
+        drift = check_scaler_drift(scaler, df[df["Date"] > np.datetime64(metadata["data_end"])], drift_tolerance)
+    if new_bars == 0:
+        return {"ticker": ticker, "mode": "up_to_date", "new_bars": 0, "samples": 0, "drift": drift}
+
+    if drift["drift"]:
+        print(f"Drift nos dados de {ticker} (colunas {drift['columns']}); executando treinamento completo.")
+        if on_full_training is not None:
+            on_full_training(DEFAULT_EPOCHS)
+        train_and_save_model(ticker, model_dir, epochs=DEFAULT_EPOCHS, callbacks=callbacks, time_budget=time_budget)
+        return {"ticker": ticker, "mode": "full", "new_bars": new_bars, "samples": None, "drift": drift}
+
+    dataset, samples = training_dataset(scaled_data, SEQUENCE_LENGTH)
+    if samples == 0:
+        raise ValueError(f"Dados insuficientes para atualizar o modelo do ticker {ticker}.")
+
+    # Continua o treinamento a partir dos pesos salvos, com taxa de aprendizado menor
+    with track_stage("retrain", "fit", ticker):
+        model, _ = load_saved_model(model_dir, ticker)
+        model.compile(optimizer=Adam(learning_rate=INCREMENTAL_LEARNING_RATE), loss='mean_squared_error')
+        callbacks = list(callbacks or []) + [training_metrics_callback(ticker, samples)]
+        if time_budget:
+            callbacks.append(time_budget_callback(time_budget))
+        history = train_model(model, dataset, epochs=epochs, callbacks=callbacks)
+
+    # As métricas do treinamento anterior não valem para os novos pesos
+    with track_stage("retrain", "evaluate", ticker):
+        metrics = evaluate_model(model, scaler, df)
+
+    # Publica o modelo ajustado como uma nova versão do pacote; o scaler não muda
+    with track_stage("retrain", "save", ticker):
+        losses = history.history.get("loss", [])
+        metadata.update({
+            "trained_at": datetime.now(timezone.utc).isoformat(),
+            "data_end": str(df["Date"].iloc[-1].date()),
+            "metrics": metrics,
+            "metrics_computed_at": datetime.now(timezone.utc).isoformat(),
+            "incremental_updates": metadata.get("incremental_updates", 0) + 1,
+            "last_update": {
+                "mode": "incremental",
+                "new_bars": new_bars,
+                "samples": int(samples),
+                "epochs": len(losses),
+                "final_loss": float(losses[-1]) if losses else None,
+                "max_drift": drift["max_excess"],
+            },
+        })
+        metadata["bundle_version"] = write_bundle(model_dir, ticker, model, scaler, metadata)
+        save_metadata(model_dir, ticker, metadata)
+
+    print(f"Modelo para {ticker} atualizado com {new_bars} novos pregões.")
+    return {"ticker": ticker, "mode": "incremental", "new_bars": new_bars, "samples": int(samples), "drift": drift}
+
+
+# Função para carregar o modelo salvo de um ticker para continuar o treinamento
+def load_saved_model(model_dir, ticker, scaler_only=False):
+    """
+    Carrega o modelo Keras e o scaler da versão mais recente do pacote do
+    ticker ou, sem pacote, do `.h5` e do `.pkl` do formato anterior.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        ticker (str): Código da ação.
+        scaler_only (bool): Carrega apenas o scaler, sem o TensorFlow.
+
+    Retorna:
+        tuple ou MinMaxScaler: (modelo Keras, scaler), ou apenas o scaler.
+    """
+    import joblib
+
+    bundle = latest_bundle(model_dir, ticker)
+    if bundle is not None:
+        if scaler_only:
+            return scaler_from_state(read_bundle(bundle[1])[0]["scaler"])
+        return load_bundle(bundle[1], engine="keras", mmap=False)[:2]
+    model_path, scaler_path = model_paths(model_dir, ticker)
+    if scaler_only:
+        return joblib.load(scaler_path)
+    return load_trained_model(model_path), joblib.load(scaler_path)
+
+
+# Função para encontrar os modelos treinados antes dos últimos pregões disponíveis
+def find_stale_models(model_dir="models", tickers=None):
+    """
+    Atualiza os dados locais dos tickers com modelo (em consultas agrupadas à
+    fonte, apenas os intervalos que faltam) e lista os modelos cuja data final
+    de treinamento é anterior ao último pregão armazenado.
+
+    Parâmetros:
+        model_dir (str): Diretório onde os modelos são salvos.
+        tickers (list): Tickers a verificar (padrão: todos com modelo).
+
+    Retorna:
+        list: Tickers com modelo desatualizado.
+    """
+    tickers = list_trained_tickers(model_dir) if tickers is None else list(tickers)
+    if not tickers:
+        return []
+
+    end = data_end_date()
+    store = get_market_data_store()
+    store.refresh_many(tickers, START_DATE, end, settled_end=settled_end_date())
+
+    stale = []
+    for ticker in tickers:
+        data_end = (load_metadata(model_dir, ticker) or {}).get("data_end")
+        last_date = store.last_date(ticker, end)
+        if data_end and last_date and last_date > data_end:
+            stale.append(ticker)
+    return stale
+
+
+def build_metadata(ticker, df, history, samples, metrics, schedule=None):
+    """
+    Monta os metadados gravados ao lado do modelo treinado.
+
+    Parâmetros:
+        ticker (str): Código da ação.
+        df (pd.DataFrame): Dados históricos usados no treinamento.
+        history (History): Histórico retornado pelo Keras.
+        samples (int): Quantidade de janelas de treinamento.
+        metrics (dict): Métricas de avaliação.
+        schedule (dict): Resumo do encerramento do treinamento (`schedule_report`).
+
+    Retorna:
+        dict: Metadados do treinamento.
+    """
+    losses = history.history.get("loss", []) if history is not None else []
+    return {
+        "ticker": ticker,
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "data_start": str(df["Date"].iloc[0].date()),
+        "data_end": str(df["Date"].iloc[-1].date()),
+        "training_samples": int(samples),
+        "epochs": len(losses),
+        "final_loss": float(losses[-1]) if losses else None,
+        "schedule": schedule,
+        "metrics": metrics,
+        "metrics_computed_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def threads_per_worker(workers):
+    """Divide os núcleos disponíveis entre os processos de treinamento."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _train_one(ticker, model_dir, epochs=None, incremental=False, time_budget=TRAINING_TIME_BUDGET):
+    """
+    Treina (ou atualiza) um ticker dentro de um processo do pool e mede a
+    duração. Sem `epochs`, usa o padrão do modo (DEFAULT_EPOCHS ou INCREMENTAL_EPOCHS).
+    """
+    start = time.perf_counter()
+    try:
+        if incremental:
+            result = retrain_incremental(ticker, model_dir, epochs=epochs or INCREMENTAL_EPOCHS,
+                                         time_budget=time_budget)
+            return {"ticker": ticker, "status": result["mode"], "seconds": time.perf_counter() - start,
+                    "error": None}
+        train_and_save_model(ticker, model_dir, epochs=epochs or DEFAULT_EPOCHS, time_budget=time_budget)
+    except Exception as e:
+        return {"ticker": ticker, "status": "failed", "seconds": time.perf_counter() - start,
+                "error": str(e) or type(e).__name__}
+    return {"ticker": ticker, "status": "done", "seconds": time.perf_counter() - start, "error": None}
+
+
+# Função para treinar vários tickers em paralelo
+def train_many(tickers, model_dir="models", max_workers=None, epochs=None, skip_existing=True,
+               incremental=False, time_budget=TRAINING_TIME_BUDGET):
+    """
+    Treina modelos para vários tickers em processos paralelos.
+
+    Os dados de todos os tickers são buscados antes, em consultas agrupadas à
+    fonte, de modo que cada processo lê apenas o armazenamento local.
+
+    Parâmetros:
+        tickers (list): Códigos das ações.
+        model_dir (str): Diretório onde os modelos serão salvos.
+        max_workers (int): Quantidade máxima de processos (padrão: núcleos disponíveis).
+        epochs (int): Número máximo de épocas de treinamento (padrão:
+            DEFAULT_EPOCHS; no modo incremental, INCREMENTAL_EPOCHS).
+        skip_existing (bool): Se True, não treina tickers que já possuem modelo.
+        incremental (bool): Se True, atualiza os modelos existentes apenas com
+            os novos pregões (ver `retrain_incremental`).
+        time_budget (float): Tempo máximo (s) de treinamento de cada ticker (None = sem limite).
+
+    Retorna:
+        list: Um relatório por ticker com status ('done', 'failed', 'exists'
+        ou, no modo incremental, 'incremental', 'full', 'up_to_date'),
+        duração em segundos e mensagem de erro, se houver.
+    """
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    max_workers = max_workers or os.cpu_count() or 1
+
+    report = {}
+    pending = []
+    for ticker in tickers:
+        if skip_existing and not incremental and has_trained_model(model_dir, ticker):
+            report[ticker] = {"ticker": ticker, "status": "exists", "seconds": 0.0, "error": None}
+        else:
+            pending.append(ticker)
+
+    if pending:
+        # Busca agrupada dos dados, uma única vez para todos os tickers
+        get_market_data_store().refresh_many(pending, START_DATE, data_end_date(), settled_end=settled_end_date())
+
+        context = multiprocessing.get_context("spawn")
+        workers = min(max_workers, len(pending))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=configure_tf_threads,
+                                 initargs=(threads_per_worker(workers),)) as pool:
+            futures = [pool.submit(_train_one, ticker, model_dir, epochs, incremental, time_budget)
+                       for ticker in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                report[result["ticker"]] = result
+                print(f"[{len(report)}/{len(tickers)}] {result['ticker']}: {result['status']}")
+
+    return [report[ticker] for ticker in tickers]
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.training AAPL MSFT GOOG --workers 4 --epochs 10
+    #      python -m utils.training --refresh-stale
+    parser = argparse.ArgumentParser(description="Treina modelos LSTM para vários tickers em paralelo.")
+    parser.add_argument("tickers", nargs="*", help="Códigos das ações")
+    parser.add_argument("--file", help="Arquivo com um ticker por linha")
+    parser.add_argument("--workers", type=int, default=None, help="Processos em paralelo (padrão: núcleos)")
+    parser.add_argument("--epochs", type=int, default=None,
+                        help=f"Número máximo de épocas (padrão: {DEFAULT_EPOCHS}; "
+                             f"{INCREMENTAL_EPOCHS} no modo incremental)")
+    parser.add_argument("--time-budget", type=float, default=TRAINING_TIME_BUDGET,
+                        help="Tempo máximo (s) de treinamento por ticker")
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--retrain", action="store_true", help="Treina também os tickers que já têm modelo")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Atualiza os modelos existentes apenas com os novos pregões")
+    parser.add_argument("--refresh-stale", action="store_true",
+                        help="Atualiza (modo incremental) todos os modelos desatualizados do diretório")
+    parser.add_argument("--output", help="Grava o relatório em JSON neste arquivo")
+    args = parser.parse_args()
+
+    tickers = list(args.tickers)
+    if args.file:
+        with open(args.file) as f:
+            tickers.extend(line.strip() for line in f if line.strip())
+    if args.refresh_stale:
+        tickers = find_stale_models(args.model_dir, tickers or None)
+        if not tickers:
+            print("Todos os modelos estão atualizados.")
+            raise SystemExit(0)
+    elif not tickers:
+        parser.error("Informe ao menos um ticker.")
+
+    start = time.perf_counter()
+    results = train_many(tickers, args.model_dir, args.workers, args.epochs, skip_existing=not args.retrain,
+                         incremental=args.incremental or args.refresh_stale, time_budget=args.time_budget)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        print(f"{result['ticker']:>8}: {result['status']:<7} {result['seconds']:8.1f}s {result['error'] or ''}")
+    print(f"Total: {elapsed:.1f}s")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"seconds": elapsed, "results": results}, f, indent=2)
@@ -0,0 +1,166 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Tamanho padrão das sequências (janelas) temporais usadas pelo modelo
+SEQUENCE_LENGTH = 60
+
+
+# Função para criar as janelas temporais sem copiar os dados
+def sliding_windows(data, sequence_length=SEQUENCE_LENGTH, dtype=None):
+    """
+    Cria todas as janelas consecutivas de `sequence_length` linhas de uma série.
+
+    As janelas são uma visão (view) somente leitura sobre o array original,
+    sem cópia dos dados: a janela `i` corresponde a `data[i:i + sequence_length]`.
+
+    Parâmetros:
+        data (np.ndarray): Série com formato (n_amostras, n_features).
+        sequence_length (int): Número de passos de tempo de cada janela.
+        dtype (np.dtype): Tipo opcional dos dados (ex.: np.float32). A conversão,
+            quando necessária, é feita uma única vez sobre a série e não sobre as janelas.
+
+    Retorna:
+        np.ndarray: Visão com formato (n_amostras - sequence_length + 1, sequence_length, n_features).
+    """
+    data = np.asarray(data)
+    if dtype is not None:
+        data = data.astype(dtype, copy=False)
+
+    if len(data) < sequence_length:
+        return np.empty((0, sequence_length) + data.shape[1:], dtype=data.dtype)
+
+    # sliding_window_view coloca a dimensão da janela no final: (n, features, janela)
+    windows = sliding_window_view(data, sequence_length, axis=0)
+    return np.moveaxis(windows, -1, 1)
+
+
+# Função para criar os pares (janela, alvo) usados no treinamento e na avaliação
+def supervised_windows(data, sequence_length=SEQUENCE_LENGTH, target_column=0, dtype=None):
+    """
+    Cria as janelas de entrada e os respectivos valores-alvo de uma série.
+
+    A janela `i` contém as linhas `data[i:i + sequence_length]` e o alvo é o
+    valor de `target_column` na linha imediatamente seguinte.
+
+    Parâmetros:
+        data (np.ndarray): Série normalizada com formato (n_amostras, n_features).
+        sequence_length (int): Número de passos de tempo de cada janela.
+        target_column (int): Índice da coluna usada como alvo (0 = 'Close').
+        dtype (np.dtype): Tipo opcional dos dados.
+
+    Retorna:
+        tuple: X (visão somente leitura das janelas) e y (visão dos alvos).
+    """
+    data = np.asarray(data)
+    if dtype is not None:
+        data = data.astype(dtype, copy=False)
+
+    # A última linha não tem alvo seguinte, por isso fica fora das janelas
+    X = sliding_windows(data[:-1], sequence_length)
+    y = data[sequence_length:, target_column]
+    y = y.view()
+    y.flags.writeable = False
+    return X, y
+
+
+# Função para materializar apenas o trecho necessário das janelas
+def materialize(windows, start=None, stop=None):
+    """
+    Copia para um array contíguo apenas as janelas do intervalo [start, stop).
+
+    Parâmetros:
+        windows (np.ndarray): Visão criada por `sliding_windows`.
+        start (int): Índice inicial (aceita valores negativos).
+        stop (int): Índice final (exclusivo).
+
+    Retorna:
+        np.ndarray: Array contíguo e gravável com as janelas selecionadas.
+    """
+    return np.ascontiguousarray(windows[start:stop])
+
+
+# Função para criar o pipeline de treinamento que gera as janelas sob demanda
+def training_dataset(series, sequence_length=SEQUENCE_LENGTH, target_column=0, batch_size=32, shuffle=True, seed=None):
+    """
+    Cria um `tf.data.Dataset` com os lotes (janelas, alvos) de treinamento,
+    gerados sob demanda a partir da série normalizada.
+
+    Apenas a série (em float32) e o índice inicial de cada janela ficam em
+    memória; cada lote é montado com `tf.gather` no momento em que é
+    consumido e o próximo é preparado em paralelo (`prefetch`). Assim, a
+    memória cresce com o tamanho da série e não com o das janelas
+    (60 vezes maior), o que permite treinar com históricos longos ou com
+    vários tickers.
+
+    Parâmetros:
+        series (np.ndarray ou list): Série normalizada com formato
+            (n_amostras, n_features) ou uma lista de séries (por exemplo, uma
+            por ticker). As janelas nunca misturam séries diferentes.
+        sequence_length (int): Número de passos de tempo de cada janela.
+        target_column (int): Índice da coluna usada como alvo (0 = 'Close').
+        batch_size (int): Quantidade de janelas por lote.
+        shuffle (bool): Embaralha a ordem das janelas a cada época, como o
+            `model.fit` faz com arrays.
+        seed (int): Semente opcional do embaralhamento.
+
+    Retorna:
+        tuple: (dataset, quantidade de janelas por época). Os mesmos pares
+        produzidos por `supervised_windows`, em float32.
+    """
+    import tensorflow as tf
+
+    parts = series if isinstance(series, (list, tuple)) else [series]
+    parts = [np.asarray(part, dtype=np.float32) for part in parts]
+
+    # Índice inicial das janelas de cada série, na série concatenada
+    starts, offset = [], 0
+    for part in parts:
+        count = len(part) - sequence_length
+        if count > 0:
+            starts.append(np.arange(offset, offset + count, dtype=np.int64))
+        offset += len(part)
+    starts = np.concatenate(starts) if starts else np.empty(0, dtype=np.int64)
+
+    data = tf.constant(parts[0] if len(parts) == 1 else np.concatenate(parts))
+    targets = data[:, target_column]
+    steps = tf.range(sequence_length, dtype=tf.int64)
+
+    def gather(batch_starts):
+        windows = tf.gather(data, batch_starts[:, None] + steps[None, :])
+        return windows, tf.gather(targets, batch_starts + sequence_length)
+
+    dataset = tf.data.Dataset.from_tensors(tf.constant(starts))
+    if shuffle:
+        dataset = dataset.map(lambda indices: tf.random.shuffle(indices, seed=seed))
+    dataset = dataset.flat_map(lambda indices: tf.data.Dataset.from_tensor_slices(indices).batch(batch_size))
+    # Informa ao Keras a quantidade de lotes por época (barra de progresso e callbacks)
+    batches = -(-len(starts) // batch_size)
+    dataset = dataset.apply(tf.data.experimental.assert_cardinality(batches))
+    dataset = dataset.map(gather, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+    return dataset, len(starts)
+
+
+# Função para separar, em ordem cronológica, o trecho de validação da série
+def split_validation(series, validation_fraction=0.1, sequence_length=SEQUENCE_LENGTH):
+    """
+    Divide a série em um trecho de treinamento e um de validação, este com
+    as janelas mais recentes. O trecho de validação inclui as
+    `sequence_length` linhas anteriores como contexto, de modo que cada
+    janela (e cada alvo) pertence a exatamente um dos trechos.
+
+    Parâmetros:
+        series (np.ndarray): Série normalizada com formato (n_amostras, n_features).
+        validation_fraction (float): Fração das janelas usada na validação.
+        sequence_length (int): Número de passos de tempo de cada janela.
+
+    Retorna:
+        tuple: (série de treinamento, série de validação). A validação é None
+        se a fração resultar em nenhuma janela.
+    """
+    windows = len(series) - sequence_length
+    validation_windows = int(windows * validation_fraction) if windows > 0 else 0
+    if validation_windows == 0:
+        return series, None
+    split = len(series) - validation_windows
+    return series[:split], series[split - sequence_length:]